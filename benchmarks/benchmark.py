@@ -0,0 +1,209 @@
+"""
+    Benchmark suite for `xml.parse` & `xml.parse_file`.
+
+    Parses each synthetic corpus (see corpora.py) at several sizes and reports throughput (MB/s & nodes/s), peak
+    memory and the scaling exponent k in `time ~ size^k` (1 is linear, 2 is quadratic).
+
+    Results can be saved as a json baseline and compared against a previous baseline to catch regressions:
+
+        python benchmarks/benchmark.py --save baseline.json
+        python benchmarks/benchmark.py --compare baseline.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# The parser modules import each other relative to the package directory
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [REPOSITORY, os.path.join(REPOSITORY, "xml")]
+
+from xml import xml  # noqa: E402
+from Options import ParserOptions  # noqa: E402
+from corpora import CORPORA  # noqa: E402
+
+DEFAULT_SIZES = [16_000, 64_000, 256_000]
+
+
+"""
+    ============
+    MEASUREMENT
+    ============
+"""
+
+
+def count_nodes(element) -> int:
+    """
+        Counts every element, text & processing instruction in the tree below (and including) `element`
+    """
+    count = 1
+    stack = [element]
+    while stack:
+        current = stack.pop()
+        count += len(current.content)
+        stack.extend(current.children)
+    return count
+
+
+def measure(document_xml: str, repeat: int, from_file: bool, options: ParserOptions) -> Dict[str, float]:
+    """
+        Parses the document `repeat` times & returns the best time, throughput and peak memory
+    """
+    path = None
+    if from_file:
+        with tempfile.NamedTemporaryFile("w", suffix=".xml", delete=False, encoding="utf-8") as file:
+            file.write(document_xml)
+            path = file.name
+
+    def run():
+        return xml.parse_file(path, options) if from_file else xml.parse(document_xml, options)
+
+    try:
+        # Time the fastest of several runs to reduce noise
+        best = math.inf
+        document = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            document = run()
+            best = min(best, time.perf_counter() - start)
+
+        # Measure memory in a separate run as tracing slows the parser down
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        if path:
+            os.remove(path)
+
+    megabytes = len(document_xml.encode("utf-8")) / 1_000_000
+    nodes = count_nodes(document.root)
+    return {
+        "seconds": best,
+        "megabytes": megabytes,
+        "nodes": nodes,
+        "mb_per_s": megabytes / best,
+        "nodes_per_s": nodes / best,
+        "peak_bytes": peak,
+    }
+
+
+def scaling_exponent(sizes: List[int], seconds: List[float]) -> Optional[float]:
+    """
+        Least-squares slope of log(time) against log(size)
+    """
+    if len(sizes) < 2:
+        return None
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(second, 1e-9)) for second in seconds]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+
+def run_suite(corpora: List[str], sizes: List[int], repeat: int, from_file: bool, options: ParserOptions) -> Dict:
+    results = {}
+    for name in corpora:
+        generate = CORPORA[name]
+        runs = {}
+        for size in sizes:
+            runs[str(size)] = measure(generate(size), repeat, from_file, options)
+            report_run(name, size, runs[str(size)])
+        exponent = scaling_exponent(sizes, [runs[str(size)]["seconds"] for size in sizes])
+        results[name] = {"sizes": runs, "scaling_exponent": exponent}
+        if exponent is not None:
+            print(f"{name:>14}  scaling exponent {exponent:.2f}")
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "function": "parse_file" if from_file else "parse",
+            "repeat": repeat,
+            "validation": options.validation,
+        },
+        "results": results,
+    }
+
+
+"""
+    ==========
+    REPORTING
+    ==========
+"""
+
+
+def report_run(name: str, size: int, run: Dict[str, float]):
+    print(f"{name:>14} {size:>10,}B  {run['seconds'] * 1000:9.2f}ms  {run['mb_per_s']:7.2f} MB/s  "
+          f"{run['nodes_per_s']:12,.0f} nodes/s  peak {run['peak_bytes'] / 1_000_000:8.2f} MB")
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """
+        Compares the current results against a baseline & returns a description of every regression where the parse
+        time or peak memory grew by more than `threshold` (a fraction)
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        for size, run in result["sizes"].items():
+            old = previous["sizes"].get(size)
+            if old is None:
+                continue
+            for metric in ("seconds", "peak_bytes"):
+                change = run[metric] / old[metric] - 1 if old[metric] else 0
+                marker = "REGRESSION" if change > threshold else ""
+                print(f"{name:>14} {int(size):>10,}B  {metric:>10} {change:+8.1%} {marker}")
+                if marker:
+                    regressions.append(f"{name} @ {size}: {metric} {change:+.1%}")
+    return regressions
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", action="append", choices=sorted(CORPORA), help="Corpus to run (default: all)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Document sizes in characters")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (the fastest is kept)")
+    parser.add_argument("--from-file", action="store_true", help="Benchmark parse_file instead of parse")
+    parser.add_argument("--validation", default=ParserOptions.Validation.FULL,
+                        choices=[ParserOptions.Validation.FULL,
+                                 ParserOptions.Validation.STRUCTURAL,
+                                 ParserOptions.Validation.TRUSTED],
+                        help="Validation level to parse with (see ParserOptions)")
+    parser.add_argument("--save", metavar="PATH", help="Save the results as a json baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare the results against a json baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before flagging (fraction)")
+    options = parser.parse_args(arguments)
+
+    current = run_suite(options.corpus or list(CORPORA), sorted(options.sizes), options.repeat, options.from_file,
+                        ParserOptions(options.validation))
+
+    if options.save:
+        with open(options.save, "w") as file:
+            json.dump(current, file, indent=2)
+
+    if options.compare:
+        with open(options.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(baseline, current, options.threshold)
+        if regressions:
+            print("\n".join(["", "Regressions:"] + regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
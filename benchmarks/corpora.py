@@ -0,0 +1,118 @@
+"""
+    Synthetic document generators for the benchmark suite.
+
+    Every generator takes an approximate target size (in characters) and returns a well-formed xml document built to
+    stress one particular part of the parser. Documents are deterministic for a given size so that results can be
+    compared between runs.
+"""
+from typing import Callable, Dict
+
+
+def _fill(header: str, footer: str, unit: Callable[[int], str], size: int) -> str:
+    """
+        Repeats `unit(i)` between the given header & footer until the document reaches roughly `size` characters
+    """
+    parts = [header]
+    length = len(header) + len(footer)
+    index = 0
+    while length < size:
+        chunk = unit(index)
+        parts.append(chunk)
+        length += len(chunk)
+        index += 1
+    parts.append(footer)
+    return "".join(parts)
+
+
+"""
+    =======
+    SHAPES
+    =======
+"""
+
+
+def deep(size: int, depth: int = 64) -> str:
+    """
+        Chains of nested elements `depth` levels deep, repeated under the root.
+        Depth is capped well below the interpreter's recursion limit as elements are parsed recursively.
+    """
+    opening = "".join(f"<level{level}>" for level in range(depth))
+    closing = "".join(f"</level{level}>" for level in reversed(range(depth)))
+    return _fill("<root>", "</root>", lambda i: f"{opening}leaf {i}{closing}", size)
+
+
+def wide(size: int) -> str:
+    """
+        A flat root with a very large number of small children
+    """
+    return _fill("<root>", "</root>", lambda i: f"<item>{i}</item>", size)
+
+
+def attributes(size: int) -> str:
+    """
+        Elements carrying many attributes each
+    """
+    def unit(i: int) -> str:
+        attrs = " ".join(f'attribute{n}="value {i} {n}"' for n in range(16))
+        return f"<row {attrs}/>\n"
+    return _fill("<root>\n", "</root>", unit, size)
+
+
+def entities(size: int) -> str:
+    """
+        Text dense with general entity & character references
+    """
+    header = ("<!DOCTYPE root [\n"
+              "<!ENTITY company 'Example Holdings Limited'>\n"
+              "<!ENTITY nested 'See &company; for details'>\n"
+              "]>\n<root>")
+    return _fill(header, "</root>",
+                 lambda i: f"<p>&company; &amp; &nested; &#169; &#x263A; &lt;{i}&gt;</p>", size)
+
+
+def cdata(size: int) -> str:
+    """
+        Content made up mostly of CDATA sections containing markup-like characters
+    """
+    return _fill("<root>", "</root>",
+                 lambda i: f"<code><![CDATA[if (a < {i} && b > {i}) {{ return \"<tag>\"; }}]]></code>", size)
+
+
+def comments(size: int) -> str:
+    """
+        Content interleaved with large numbers of comments
+    """
+    return _fill("<root>", "</root>",
+                 lambda i: f"<!-- comment number {i} describing the next element --><value>{i}</value>", size)
+
+
+def unicode_names(size: int) -> str:
+    """
+        Element & attribute names drawn from outside the ascii range
+    """
+    return _fill("<données>", "</données>",
+                 lambda i: f"<élément_{i % 10} 属性='値{i}'><Ωμέγα>τιμή {i}</Ωμέγα></élément_{i % 10}>", size)
+
+
+def dtd(size: int) -> str:
+    """
+        A large internal DTD subset of entity, element & attribute list declarations with a small body
+    """
+    def unit(i: int) -> str:
+        return (f"<!ENTITY entity{i} 'replacement text {i}'>\n"
+                f"<!ELEMENT element{i} (#PCDATA)>\n"
+                f"<!ATTLIST element{i} id ID #IMPLIED kind CDATA 'default {i}'>\n")
+    return _fill("<!DOCTYPE root [\n", "]>\n<root>&entity0;</root>", unit, size)
+
+
+# All corpora, keyed by the name used in reports & baselines
+CORPORA = {
+    "deep": deep,
+    "wide": wide,
+    "attributes": attributes,
+    "entities": entities,
+    "cdata": cdata,
+    "comments": comments,
+    "unicode-names": unicode_names,
+    "dtd": dtd,
+}  # type: Dict[str, Callable[[int], str]]
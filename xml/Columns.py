@@ -0,0 +1,184 @@
+"""
+    Extracts fixed fields from record-oriented documents into columns, for analytics over many similar records.
+
+    Given a record path (see `Records.RecordPath`) & a list of fields, `extract_columns` parses the document's events
+    (see `Events`) & collects each field's values straight into a column, without building an Element or a dict per
+    record:
+
+        columns = Columns.extract_columns(xml, "/rows/row", [Field("id", "@id", Field.Type.INT),
+                                                              Field("price", "price", Field.Type.FLOAT),
+                                                              Field("name", "name")])
+        columns["price"]  # array('d', [...])
+
+    A field's source is one of:
+        @name   The record's attribute of that name
+        name    The text of the record's first child element of that name
+        .       The record's own text (excluding its children's text)
+
+    INT & FLOAT columns are `array.array`s of 64-bit integers & doubles, with each record's values converted & appended
+    as the record ends, & STR columns are lists. With `as_numpy=True` every column becomes a NumPy array instead: values
+    are collected as strings & converted by NumPy a whole column at a time once the document has been parsed (NumPy is
+    optional, & only needed for this).
+"""
+from array import array
+from typing import Any, Dict, List, Optional
+
+from Events import EventParser, START, END, TEXT
+from Options import ParserOptions
+from Records import RecordPath
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Field:
+    """
+        A field to extract from each record. See the module docstring for the `source` syntax.
+
+        Arguments:
+            name        The name of the field's column
+            source      Where the field's value is found within each record
+            dtype       The type of the column's values, one of STR (the default), INT or FLOAT
+            default     The value used for records without the field. If None, such records are an error
+    """
+    class Type:
+        STR = "str"
+        INT = "int"
+        FLOAT = "float"
+
+    # The array typecode, converter & NumPy dtype of each type
+    ARRAY_TYPECODES = {Type.INT: "q", Type.FLOAT: "d"}
+    CONVERTERS = {Type.INT: int, Type.FLOAT: float}
+    NUMPY_DTYPES = {Type.STR: "str", Type.INT: "int64", Type.FLOAT: "float64"}
+
+    def __init__(self, name: str, source: str, dtype: str = Type.STR, default: Optional[str] = None):
+        if dtype not in Field.NUMPY_DTYPES:
+            raise ValueError(f"Unknown type '{dtype}' for field '{name}'")
+        if not source or source == "@":
+            raise ValueError(f"Invalid source '{source}' for field '{name}'")
+
+        self.name = name  # type: str
+        self.source = source  # type: str
+        self.dtype = dtype  # type: str
+        self.default = default  # type: Optional[str]
+
+
+def extract_columns(xml: str,
+                    path: str,
+                    fields: List[Field],
+                    options: Optional[ParserOptions] = None,
+                    as_numpy: bool = False) -> Dict[str, Any]:
+    """
+        Parses the given xml, collecting the fields of each element matching `path` into columns
+    :param xml:
+    :param path: The path to the records (see `RecordPath`)
+    :param fields: The fields to extract from each record
+    :param options: The options to parse with (see `ParserOptions`)
+    :param as_numpy: Whether the columns are returned as NumPy arrays
+    :return: A dict of each field's name to its column, with one value per record in document order
+    """
+    if as_numpy and numpy is None:
+        raise ImportError("NumPy is required to extract columns as NumPy arrays")
+    if len({field.name for field in fields}) != len(fields):
+        raise ValueError("Field names must be unique")
+
+    columns = __collect(EventParser(xml, options), RecordPath(path), fields, as_numpy)
+    if as_numpy:
+        columns = [__to_numpy(field, column) for field, column in zip(fields, columns)]
+    return {field.name: column for field, column in zip(fields, columns)}
+
+
+def __collect(events: EventParser, record_path: RecordPath, fields: List[Field], as_strings: bool) -> List[Any]:
+    """
+        Collects the value of each field of each record, converting it to the field's type unless `as_strings`
+    """
+    # Each field's index, by where its value is found
+    attribute_fields = {field.source[1:]: index for index, field in enumerate(fields) if field.source[:1] == "@"}
+    child_fields = {field.source: index for index, field in enumerate(fields) if field.source[:1] not in ["@", "."]}
+    text_fields = [index for index, field in enumerate(fields) if field.source == "."]
+
+    if as_strings:
+        columns = [[] for _ in fields]  # type: List[Any]
+        converters = [None] * len(fields)
+    else:
+        columns = [array(Field.ARRAY_TYPECODES[field.dtype]) if field.dtype in Field.ARRAY_TYPECODES else []
+                   for field in fields]
+        converters = [Field.CONVERTERS.get(field.dtype) for field in fields]
+    names = []  # type: List[str]
+
+    # The current record's values, its depth, & the text being collected (for the record itself or one of its fields)
+    record = None  # type: Optional[List[Optional[str]]]
+    record_depth = 0
+    text = None  # type: Optional[List[str]]
+    text_index = None  # type: Optional[int]
+    record_text = []  # type: List[str]
+
+    for event in events:
+        kind = event[0]
+        if kind == TEXT:
+            if text is not None:
+                text.append(event[1])
+            elif record is not None and len(names) == record_depth:
+                record_text.append(event[1])
+
+        elif kind == START:
+            names.append(event[1])
+            if record is None:
+                if record_path.matches(names):
+                    record = [None] * len(fields)
+                    record_depth = len(names)
+                    record_text = []
+                    for name, value in event[2].items():
+                        index = attribute_fields.get(name)
+                        if index is not None:
+                            record[index] = value
+
+            # The first child element with a field's name holds its value
+            elif len(names) == record_depth + 1:
+                index = child_fields.get(event[1])
+                if index is not None and record[index] is None:
+                    text, text_index = [], index
+
+        elif kind == END:
+            if record is not None:
+                if len(names) == record_depth + 1 and text is not None:
+                    record[text_index] = "".join(text)
+                    text, text_index = None, None
+
+                elif len(names) == record_depth:
+                    for index in text_fields:
+                        record[index] = "".join(record_text)
+                    for index, value in enumerate(record):
+                        if value is None:
+                            value = fields[index].default
+                            if value is None:
+                                raise ValueError(f"Record {len(columns[index]) + 1} has no value for field "
+                                                 f"'{fields[index].name}'")
+                        converter = converters[index]
+                        if converter is None:
+                            columns[index].append(value)
+                            continue
+                        try:
+                            columns[index].append(converter(value))
+                        except (ValueError, OverflowError) as error:
+                            raise ValueError(f"Unable to convert field '{fields[index].name}' of record "
+                                             f"{len(columns[index]) + 1} to {fields[index].dtype}: {error}") from error
+                    record = None
+            names.pop()
+
+    return columns
+
+
+def __to_numpy(field: Field, values: List[str]) -> Any:
+    """
+        Converts a column of strings to a NumPy array of the field's type, all at once
+    """
+    column = numpy.array(values, dtype=str)
+    if field.dtype == Field.Type.STR:
+        return column
+    try:
+        return numpy.char.strip(column).astype(Field.NUMPY_DTYPES[field.dtype])
+    except (ValueError, OverflowError) as error:
+        raise ValueError(f"Unable to convert field '{field.name}' to {field.dtype}: {error}") from error
@@ -0,0 +1,135 @@
+"""
+    Converts documents into nested dicts & lists, e.g. for serialising as JSON.
+
+    Values are built straight from parse events (see `Events`), so no Element or Text objects are created:
+
+        >>> DictConverter().convert("<order id='7'><item>a</item><item>b</item><note/></order>")
+        {'order': {'@id': '7', 'item': ['a', 'b'], 'note': None}}
+
+    An element becomes:
+        - None if it has no attributes, children or text
+        - its text, if it has text but no attributes or children
+        - otherwise a dict of its attributes (keys prefixed by `attribute_prefix`), its children (keyed by name) & its
+          text (under `text_key`). A name used by several children maps to a list of their values, in document order,
+          as do the names in `force_list` even when used once
+
+    An element's text is all of its text joined together, even when split up by children. Comments & processing
+    instructions are dropped. Names are used as written, including any prefix.
+
+    For record-oriented documents, `iter_records` & `write_json_lines` convert each element matching a path (see
+    `Records.RecordPath`) as soon as its end-tag is parsed. Only the current record is built, & elements outside records
+    are not built at all. Records within a record are converted as part of it, rather than separately.
+"""
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from Events import EventParser, START, END, TEXT
+from Options import ParserOptions
+from Records import RecordPath
+
+
+class DictConverter:
+    """
+        Converts xml into dicts, following the conventions given. See the module docstring.
+
+        Arguments:
+            attribute_prefix    Prepended to attribute names, to keep them apart from child element names
+            text_key            The key of an element's text, when it has attributes or children
+            force_list          Names of elements whose values are always collected in a list
+            strip_whitespace    Whether leading & trailing whitespace is stripped from text. Whitespace-only text is
+                                then ignored, so indentation doesn't appear in the output
+    """
+    def __init__(self, attribute_prefix: str = "@", text_key: str = "#text", force_list: Iterable[str] = (),
+                 strip_whitespace: bool = True):
+        self.attribute_prefix = attribute_prefix  # type: str
+        self.text_key = text_key  # type: str
+        self.force_list = frozenset(force_list)
+        self.strip_whitespace = strip_whitespace  # type: bool
+
+    def convert(self, xml: str, options: Optional[ParserOptions] = None) -> Dict[str, Any]:
+        """
+            Converts the given document, returning a dict with the root element's name as its only key
+        """
+        return next(self.__convert(EventParser(xml, options), None))
+
+    def iter_records(self, xml: str, path: str, options: Optional[ParserOptions] = None) -> Iterator[Dict[str, Any]]:
+        """
+            Parses the given xml, yielding each element matching `path` as a dict with the element's name as its only
+            key. The whole document is checked, so errors after the last record are still raised
+        """
+        # Check the path now, rather than when the first record is requested
+        return self.__convert(EventParser(xml, options), RecordPath(path))
+
+    def write_json_lines(self, stream: TextIO, xml: str, path: str, options: Optional[ParserOptions] = None) -> int:
+        """
+            Writes each record (see `iter_records`) to the given text stream as a line of JSON.
+            Returns the number of records written
+        """
+        count = 0
+        for record in self.iter_records(xml, path, options):
+            stream.write(json.dumps(record, ensure_ascii=False))
+            stream.write("\n")
+            count += 1
+        return count
+
+    def __convert(self, events: Iterable[Tuple], record_path: Optional[RecordPath]) -> Iterator[Dict[str, Any]]:
+        """
+            Builds the value of each record from the given events, or the root element's if there is no record path
+        """
+        # The names of the open elements, & the values being built for those within the current record
+        names = []  # type: List[str]
+        stack = []  # type: List[Tuple[str, Dict[str, Any], List[str]]]
+        attribute_prefix = self.attribute_prefix
+
+        for event in events:
+            kind = event[0]
+            if kind == TEXT:
+                if stack:
+                    stack[-1][2].append(event[1])
+
+            elif kind == START:
+                names.append(event[1])
+                if stack or record_path is None or record_path.matches(names):
+                    attributes = {attribute_prefix + name: value for name, value in event[2].items()}
+                    stack.append((event[1], attributes, []))
+
+            elif kind == END:
+                names.pop()
+                if stack:
+                    name, value, text = stack.pop()
+                    value = self.__finish(value, text)
+                    if stack:
+                        self.__add_child(stack[-1][1], name, value)
+                    else:
+                        yield {name: value}
+
+    def __finish(self, value: Dict[str, Any], text: List[str]) -> Any:
+        text = "".join(text)
+        if self.strip_whitespace:
+            text = text.strip()
+
+        if not value:
+            return text or None
+        if text:
+            value[self.text_key] = text
+        return value
+
+    def __add_child(self, parent: Dict[str, Any], name: str, value: Any):
+        # Values are never lists themselves, so a list is always a repeated (or forced) name
+        if name in parent:
+            existing = parent[name]
+            if isinstance(existing, list):
+                existing.append(value)
+            else:
+                parent[name] = [existing, value]
+        elif name in self.force_list:
+            parent[name] = [value]
+        else:
+            parent[name] = value
+
+
+def to_dict(xml: str, options: Optional[ParserOptions] = None) -> Dict[str, Any]:
+    """
+        A convenience function to convert the given document with the default conventions. See `DictConverter`
+    """
+    return DictConverter().convert(xml, options)
@@ -0,0 +1,276 @@
+"""
+    Finds the differences between two versions of a document, as a script of edits.
+
+        for edit in Diff.diff(old_document, new_document, key_attributes=["id"]):
+            print(edit)  # e.g. Edit(update-text, '/feed[1]/entry[3]/title[1]/text()[1]', 'Old' -> 'New')
+
+    Every element, text & processing instruction is first given a digest of its whole subtree, built Merkle-style from
+    the digests of its content in a single pass over each tree. The trees are then compared top-down, & identical
+    subtrees are skipped by comparing their digests, so the work done depends on the size of the changes rather than
+    the size of the documents.
+
+    Where an element's content differs, the old & new content are aligned with an LCS (see `difflib.SequenceMatcher`)
+    of their digests, so unchanged content is matched as is. Elements with one of the given key attributes are aligned
+    by name & key instead, so an element with the same key is compared with its old version even if its content
+    changed. Aligned elements that differ are compared recursively, & anything left unaligned is deleted or inserted.
+
+    Edits are located by XPath-style paths into the old document (e.g. `/rows[1]/row[2]/text()[1]`, see `XPath`), with
+    positions counted among siblings of the same name. Applying the edits in order turns the old document into the new
+    one, where inserted nodes are placed at their `position` within the new content of the element at `path`.
+
+    Trees are only walked downwards, so trees sharing subtrees (see `ParserOptions.share_subtrees`) can be compared, &
+    shared subtrees are only digested once. Inserted nodes may then be shared, so should be copied before they are
+    modified.
+"""
+import difflib
+import hashlib
+from typing import Dict, Iterable, List, Optional, Union
+
+from classes.Document import Document
+from classes.Element import Element
+from classes.ProcessingInstruction import ProcessingInstruction
+from classes.Text import Text
+
+
+class Edit:
+    """
+        A single change to a document.
+
+        Attributes:
+            type        The kind of change, one of:
+                            INSERT              `node` (from the new document) is inserted into the element at `path`,
+                                                at `position` within its content
+                            DELETE              The node at `path` is deleted
+                            UPDATE_ATTRIBUTE    The attribute `name` of the element at `path` changes from `old_value`
+                                                to `new_value`. Either is None if the attribute is added or removed
+                            UPDATE_TEXT         The text at `path` changes from `old_value` to `new_value`
+            path        Where the change is, in the old document
+    """
+    class Type:
+        INSERT = "insert"
+        DELETE = "delete"
+        UPDATE_ATTRIBUTE = "update-attribute"
+        UPDATE_TEXT = "update-text"
+
+    def __init__(self, edit_type: str, path: str, name: Optional[str] = None, old_value: Optional[str] = None,
+                 new_value: Optional[str] = None, node: Union[Element, Text, ProcessingInstruction, None] = None,
+                 position: Optional[int] = None):
+        self.type = edit_type  # type: str
+        self.path = path  # type: str
+        self.name = name  # type: Optional[str]
+        self.old_value = old_value  # type: Optional[str]
+        self.new_value = new_value  # type: Optional[str]
+        self.node = node  # type: Union[Element, Text, ProcessingInstruction, None]
+        self.position = position  # type: Optional[int]
+
+    def __repr__(self):
+        if self.type == Edit.Type.INSERT:
+            return f"Edit({self.type}, {self.path!r}, {self.position}, {self.node!r})"
+        if self.type == Edit.Type.DELETE:
+            return f"Edit({self.type}, {self.path!r})"
+        if self.type == Edit.Type.UPDATE_ATTRIBUTE:
+            return f"Edit({self.type}, {self.path!r}, {self.name!r}, {self.old_value!r} -> {self.new_value!r})"
+        return f"Edit({self.type}, {self.path!r}, {self.old_value!r} -> {self.new_value!r})"
+
+
+class TreeDiff:
+    """
+        Compares two versions of a document. See the module docstring.
+
+        Arguments:
+            key_attributes  Names of attributes identifying elements among their siblings (e.g. "id"). An element's
+                            first key attribute (in the order given) is used
+    """
+    def __init__(self, key_attributes: Iterable[str] = ()):
+        self.key_attributes = list(key_attributes)  # type: List[str]
+        self.__digests = {}  # type: Dict[int, bytes]
+
+    def diff(self, old: Union[Document, Element], new: Union[Document, Element]) -> List[Edit]:
+        """
+            Returns the edits turning the old document (or element) into the new one
+        """
+        old_root = old.root if isinstance(old, Document) else old
+        new_root = new.root if isinstance(new, Document) else new
+        self.__digests = {}
+        self.__digest_tree(old_root)
+        self.__digest_tree(new_root)
+
+        edits = []  # type: List[Edit]
+        try:
+            if old_root.name != new_root.name:
+                edits.append(Edit(Edit.Type.DELETE, f"/{old_root.name}[1]"))
+                edits.append(Edit(Edit.Type.INSERT, "/", node=new_root, position=0))
+            else:
+                self.__compare(old_root, new_root, f"/{old_root.name}[1]", edits)
+        finally:
+            self.__digests = {}
+        return edits
+
+    """
+        ========
+        DIGESTS
+        ========
+        Digests are kept by node id for the duration of a diff. Names, values & text can't contain NUL characters (see
+        xmlspec::Char), so NUL separates the parts of a node, & child digests (which have a fixed length) are appended
+        as they are.
+    """
+
+    def __digest_tree(self, root: Element):
+        """
+            Digests every node within the given element, children first
+        """
+        digests = self.__digests
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if id(node) in digests:
+                continue
+
+            if isinstance(node, Text):
+                digests[id(node)] = self.__digest(b"T\0" + node.text.encode("utf-8", "surrogatepass"))
+            elif isinstance(node, ProcessingInstruction):
+                digests[id(node)] = self.__digest(f"P\0{node.target}\0{node.data or ''}".encode("utf-8",
+                                                                                                "surrogatepass"))
+            elif not children_done:
+                stack.append((node, True))
+                stack.extend((item, False) for item in node.content)
+            else:
+                parts = [f"E\0{node.name}"]
+                parts.extend(f"{name}\0{value}" for name, value in sorted(node.attributes.items()))
+                header = "\0".join(parts).encode("utf-8", "surrogatepass") + b"\0\0"
+                digests[id(node)] = self.__digest(header + b"".join(digests[id(item)] for item in node.content))
+
+    @staticmethod
+    def __digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    """
+        ===========
+        COMPARISON
+        ===========
+    """
+
+    def __compare(self, old: Element, new: Element, path: str, edits: List[Edit]):
+        """
+            Adds the edits turning the old element into the new one, which have the same name
+        """
+        digests = self.__digests
+        if digests[id(old)] == digests[id(new)]:
+            return
+
+        # Attributes
+        if old.attributes != new.attributes:
+            for name, value in old.attributes.items():
+                new_value = new.attributes.get(name)
+                if new_value != value:
+                    edits.append(Edit(Edit.Type.UPDATE_ATTRIBUTE, path, name, value, new_value))
+            for name, value in new.attributes.items():
+                if name not in old.attributes:
+                    edits.append(Edit(Edit.Type.UPDATE_ATTRIBUTE, path, name, None, value))
+
+        old_content, new_content = old.content, new.content
+        old_digests = [digests[id(item)] for item in old_content]
+        new_digests = [digests[id(item)] for item in new_content]
+        if old_digests == new_digests:
+            return
+
+        # Align the content by key or digest, skipping the common start & end
+        start = 0
+        while start < min(len(old_digests), len(new_digests)) and old_digests[start] == new_digests[start]:
+            start += 1
+        old_end, new_end = len(old_digests), len(new_digests)
+        while old_end > start and new_end > start and old_digests[old_end - 1] == new_digests[new_end - 1]:
+            old_end, new_end = old_end - 1, new_end - 1
+
+        paths = self.__child_paths(old_content, path)
+        matcher = difflib.SequenceMatcher(None, self.__alignment(old_content, old_digests, start, old_end),
+                                          self.__alignment(new_content, new_digests, start, new_end), autojunk=False)
+        for operation, old_start, old_stop, new_start, new_stop in matcher.get_opcodes():
+            old_start, old_stop, new_start, new_stop = (index + start for index in [old_start, old_stop, new_start,
+                                                                                    new_stop])
+            # Aligned content is compared pairwise. Otherwise each old item is compared with the next new item it can be
+            # compared with, inserting the new items skipped, or deleted if there is none
+            for old_index in range(old_start, old_stop):
+                new_index = new_start
+                if operation != "equal":
+                    while new_index < new_stop and not self.__comparable(old_content[old_index],
+                                                                         new_content[new_index]):
+                        new_index += 1
+                if new_index == new_stop:
+                    edits.append(Edit(Edit.Type.DELETE, paths[old_index]))
+                    continue
+
+                for index in range(new_start, new_index):
+                    edits.append(Edit(Edit.Type.INSERT, path, node=new_content[index], position=index))
+                self.__compare_item(old_content[old_index], new_content[new_index], paths[old_index], edits)
+                new_start = new_index + 1
+
+            for index in range(new_start, new_stop):
+                edits.append(Edit(Edit.Type.INSERT, path, node=new_content[index], position=index))
+
+    def __compare_item(self, old: Union[Element, Text], new: Union[Element, Text], path: str, edits: List[Edit]):
+        if self.__digests[id(old)] == self.__digests[id(new)]:
+            return
+        if isinstance(old, Element):
+            self.__compare(old, new, path, edits)
+        else:
+            edits.append(Edit(Edit.Type.UPDATE_TEXT, path, old_value=old.text, new_value=new.text))
+
+    def __comparable(self, old: Union[Element, Text, ProcessingInstruction],
+                     new: Union[Element, Text, ProcessingInstruction]) -> bool:
+        """
+            Whether the given old & new content can be compared, rather than one deleted & the other inserted: text
+            with text, & elements with elements of the same name & key
+        """
+        if isinstance(old, Element):
+            return isinstance(new, Element) and old.name == new.name and self.__key(old) == self.__key(new)
+        return isinstance(old, Text) and isinstance(new, Text)
+
+    def __alignment(self, content: List[Union[Element, Text, ProcessingInstruction]], digests: List[bytes],
+                    start: int, end: int) -> list:
+        """
+            The values the given content is aligned by: the name & key of elements with a key attribute, & digests
+            otherwise
+        """
+        if not self.key_attributes:
+            return digests[start:end]
+        alignment = []
+        for index in range(start, end):
+            item = content[index]
+            key = self.__key(item) if isinstance(item, Element) else None
+            alignment.append((item.name, key) if key is not None else digests[index])
+        return alignment
+
+    def __key(self, element: Element) -> Optional[str]:
+        for name in self.key_attributes:
+            value = element.attributes.get(name)
+            if value is not None:
+                return f"{name}\0{value}"
+        return None
+
+    @staticmethod
+    def __child_paths(content: List[Union[Element, Text, ProcessingInstruction]], path: str) -> List[str]:
+        """
+            The path of each item of an element's content, counting positions among siblings of the same name (or
+            node type)
+        """
+        counts = {}  # type: Dict[str, int]
+        paths = []
+        for item in content:
+            if isinstance(item, Element):
+                step = item.name
+            elif isinstance(item, Text):
+                step = "text()"
+            else:
+                step = "processing-instruction()"
+            counts[step] = counts.get(step, 0) + 1
+            paths.append(f"{path}/{step}[{counts[step]}]")
+        return paths
+
+
+def diff(old: Union[Document, Element], new: Union[Document, Element],
+         key_attributes: Iterable[str] = ()) -> List[Edit]:
+    """
+        A convenience function to compare two versions of a document. See `TreeDiff`
+    """
+    return TreeDiff(key_attributes).diff(old, new)
@@ -0,0 +1,260 @@
+"""
+    A pull parser, producing a stream of events rather than a tree of xml objects.
+
+    `iter_events` parses the document's root element into a series of tuples, without creating any Element or Text
+    objects:
+
+        (START, name, attributes)   An element's start-tag, with its attributes as a dict
+        (END, name)                 An element's end-tag (also produced straight after a self-closing start-tag)
+        (TEXT, text)                A block of text, with references expanded & CDATA sections included. As with Text
+                                    objects, text is only split by elements & processing instructions, so there are
+                                    never two TEXT events in a row
+        (PI, target, data)          A processing instruction within the root element
+
+    The prolog & epilog are parsed by `Document` as usual, & `EventParser.document` holds the result, e.g. its entities.
+    Events follow the same well-formedness checks, validation levels & whitespace handling as the tree parser (see
+    `ParserOptions`), but names are not resolved against namespaces, elements are not validated against the DTD and
+    `lazy` has no effect.
+"""
+import sys
+from typing import Dict, Generator, Iterator, List, Optional, Tuple
+
+import Helpers
+from Options import ParserOptions
+from RegularExpressions import RegEx
+from classes.Document import Document
+from classes.Element import Element
+from classes.Error import XMLError
+
+START = "start"
+END = "end"
+TEXT = "text"
+PI = "pi"
+
+
+def iter_events(xml: str, options: Optional[ParserOptions] = None) -> Iterator[Tuple]:
+    """
+        Parses the given xml, yielding an event for each piece of the root element's content. See the module docstring
+    """
+    return iter(EventParser(xml, options))
+
+
+class EventParser:
+    """
+        Parses a document into events. Iterating over the parser parses the document, so it can only be iterated once.
+
+        Errors are raised when the event they occur in is reached, so the events before an error have already been
+        produced. Errors are located within the document (see `XMLError.locate`).
+    """
+    def __init__(self, xml: str, options: Optional[ParserOptions] = None):
+        self.document = Document(xml, options)
+        self.options = self.document.options
+        self.__xml = xml
+
+        # The names of the currently open elements
+        self.__open_elements = []  # type: List[str]
+
+        # The text since the last element or processing instruction, and where it started
+        self.__text = []  # type: List[str]
+        self.__text_source = None  # type: Optional[str]
+        self.__text_position = 0  # type: int
+
+    def __iter__(self) -> Iterator[Tuple]:
+        xml = self.__xml
+        try:
+            position = len(xml) - len(self.document.parse_prolog())
+
+            # The root element's start-tag
+            name, attributes, self_closing, position = self.__parse_start_tag(xml, position)
+            yield START, name, attributes
+            if self_closing:
+                yield END, name
+            else:
+                self.__open_elements.append(name)
+                position = yield from self.__parse_content(xml, position, [])
+
+            self.document.parse_epilog(xml[position:])
+        except XMLError as error:
+            error.locate(xml)
+            raise
+
+    """
+        ========
+        CONTENT
+        ========
+    """
+
+    def __parse_content(self, source: str, position: int, seen_entities: List[str]) -> Generator[Tuple, None, int]:
+        """
+            Parses content from the given position in `source` (either the document or an entity's replacement text),
+            until the root element is closed or the replacement text is exhausted. Returns the position reached.
+        """
+        in_entity = len(seen_entities) > 0
+        depth = len(self.__open_elements)
+        check_structure = self.options.check_structure
+
+        while True:
+            # Jump to the next piece of markup, collecting the text in between
+            match = RegEx.Events_Markup.search(source, position)
+            index = match.start() if match else len(source)
+            if index > position:
+                chunk = source[position:index]
+                if check_structure and "]]>" in chunk:
+                    raise XMLError("Disallowed sequence ']]>' in text", source=source,
+                                   position=position + chunk.find("]]>"))
+                self.__add_text(Helpers.normalise_newlines(chunk) if not in_entity else chunk, source, position)
+                position = index
+
+            # Replacement text may only contain complete elements
+            if not match:
+                if not in_entity:
+                    raise XMLError(f"Unable to find end-tag for element '{self.__open_elements[-1]}'",
+                                   source=source, position=position)
+                if len(self.__open_elements) != depth:
+                    raise XMLError(f"Ill-formed expansion text for entity {seen_entities[-1]}", source=source)
+                return position
+
+            # End tags
+            if source.startswith("</", position):
+                if in_entity and len(self.__open_elements) == depth:
+                    raise XMLError(f"Ill-formed expansion text for entity {seen_entities[-1]}", source=source,
+                                   position=position)
+                yield from self.__flush_text()
+                name = self.__open_elements.pop()
+                position = Helpers.parse_end_tag(source, position, name, self.options.check_structure)
+                yield END, name
+                if not self.__open_elements:
+                    return position
+
+            # Comments
+            elif source.startswith("<!--", position):
+                position = Helpers.parse_comment(source, position, check_structure=check_structure,
+                                                 check_characters=self.options.check_characters)
+
+            # CDATA sections
+            elif source.startswith("<![CDATA[", position):
+                end_index = source.find("]]>", position + 9)
+                if end_index == -1:
+                    raise XMLError("Unable to find end of CDATA section", source=source, position=position)
+                cdata = source[position + 9:end_index]
+                self.__add_text(Helpers.normalise_newlines(cdata) if not in_entity else cdata, source, position)
+                position = end_index + 3
+
+            # Processing instructions
+            elif source.startswith("<?", position):
+                yield from self.__flush_text()
+                target, data, position = Helpers.parse_processing_instruction(
+                    source, position, check_characters=self.options.check_characters)
+                yield PI, target, data
+
+            # Start tags
+            elif source.startswith("<", position):
+                yield from self.__flush_text()
+                name, attributes, self_closing, position = self.__parse_start_tag(source, position)
+                yield START, name, attributes
+                if self_closing:
+                    yield END, name
+                    if not self.__open_elements:
+                        return position
+                else:
+                    self.__open_elements.append(name)
+
+            # Character references
+            elif source.startswith("&#", position):
+                end_index = source.find(";", position)
+                if end_index == -1:
+                    raise XMLError("Unable to find end of character reference", source=source, position=position)
+                try:
+                    expansion_text = Helpers.parse_reference(source[position:end_index + 1],
+                                                             expand_general_entities=False,
+                                                             expand_parameter_entities=False)
+                except XMLError as error:
+                    error.relocate(source, position)
+                    raise
+                self.__add_text(expansion_text, source, position)
+                position = end_index + 1
+
+            # Entity references, whose replacement text is parsed as content
+            else:
+                end_index = source.find(";", position)
+                if end_index == -1:
+                    raise XMLError("Unable to find end of entity reference", source=source, position=position)
+                reference = source[position:end_index + 1]
+                if reference in seen_entities:
+                    raise XMLError(f"Infinite recursion within entity {reference}", source=source, position=position)
+
+                try:
+                    expansion_text = Helpers.parse_reference(reference,
+                                                             general_entities=self.document.general_entities,
+                                                             expand_parameter_entities=False)
+                    yield from self.__parse_content(expansion_text, 0, seen_entities + [reference])
+                except XMLError as error:
+                    # The replacement text is not part of the document, so report errors at the reference
+                    error.relocate(source, position)
+                    raise
+                position = end_index + 1
+
+    """
+        ======
+        TEXT
+        ======
+    """
+
+    def __add_text(self, text: str, source: str, position: int):
+        if not self.__text:
+            self.__text_source, self.__text_position = source, position
+        self.__text.append(text)
+
+    def __flush_text(self) -> Iterator[Tuple]:
+        """
+            Produces the text collected since the last element or processing instruction, if there is any
+        """
+        if not self.__text:
+            return
+        text = "".join(self.__text)
+        self.__text = []
+
+        # Drop whitespace-only text if the options ask for it
+        if self.options.whitespace != ParserOptions.Whitespace.KEEP and RegEx.Whitespace.fullmatch(text):
+            if self.options.whitespace == ParserOptions.Whitespace.DROP or \
+                    self.__open_elements[-1] in self.document.element_only_content:
+                return
+
+        if self.options.check_characters:
+            Helpers.check_char_sequence(text, "text", self.__text_source, self.__text_position)
+        yield TEXT, text
+
+    """
+        =======
+        MARKUP
+        =======
+    """
+
+    def __parse_start_tag(self, source: str, position: int) -> Tuple[str, Dict[str, str], bool, int]:
+        """
+            Tokenizes the start-tag at the given position, as `Element.parse_opening_tag` does.
+            Returns the element's name, attributes, whether it is self-closing & the position after the tag
+        """
+        name = RegEx.StartTag_Name.match(source, position + 1)
+        attributes = {}
+        tag_end = None
+        if name:
+            if self.options.check_characters:
+                Helpers.check_name(name.group(), "element name", source, position + 1)
+            index = Helpers.parse_start_tag_attributes(source, name.end(), attributes, self.document.general_entities,
+                                                       check_structure=self.options.check_structure,
+                                                       check_characters=self.options.check_characters)
+            tag_end = RegEx.StartTag_End.match(source, index)
+        if not tag_end:
+            # Let the tree parser work out what is wrong with the tag
+            Element(source[position:], self.options).parse_opening_tag(source[position:],
+                                                                       self.document.general_entities)
+            raise XMLError("Unable to find end of start-tag for element", source=source, position=position)
+
+        # Complete the attributes from the DTD, as for elements
+        name = sys.intern(name.group())
+        attribute_list = self.document.attribute_lists.get(name)
+        if attribute_list is not None:
+            attribute_list.apply(attributes)
+
+        return name, attributes, tag_end.group(1) == "/>", tag_end.end()
@@ -0,0 +1,664 @@
+"""
+    A flat, array-backed encoding of parsed content, which can be handed between processes without pickling.
+
+    A `FlatTree` holds a forest of nodes (e.g. the content of an element) in parallel arrays indexed by node, in
+    document order:
+
+        kinds           The kind of each node (see `FlatTree.Kind`)
+        parents         The index of each node's parent element, or -1 for top-level nodes
+        first_children  The index of each element's first child node, or -1
+        next_siblings   The index of each node's next sibling, or -1
+        names           The string index of each element's name & processing instruction's target, or -1 for text
+        values          The string index of each text's text & processing instruction's data, or -1
+        attributes      Each node's attributes are the attribute names & values (as string indices) from
+                        `attribute_starts[index]` up to `attribute_starts[index + 1]`
+
+    Strings are stored in a heap of UTF-8, located by the `string_offsets` array. Names & attribute values are stored
+    once each, so repeating them takes no extra space.
+
+    A tree takes 25 bytes per node, 8 per attribute & 8 per string plus its UTF-8, against roughly a kilobyte per node
+    for Element & Text objects, so `parse` builds one straight from a document for documents too large to hold
+    as objects. It is read through `FlatNode` cursors with the read-only interface of the object tree:
+
+        tree = Flat.parse(xml)
+        for row in tree.root.iter("row"):
+            print(row.get("id"), row.text_content())
+
+    `to_bytes` & `write` lay the arrays out in a single buffer, & `FlatTree.from_buffer` reads them back without
+    copying, as memoryviews over the buffer, so a tree written into `multiprocessing.shared_memory` by one process is
+    read in place by another:
+
+        segment = FlatTree.encode(element.content).to_shared_memory()           # in a worker
+        tree = FlatTree.from_shared_memory(name)                                # in the parent
+        element.content = [tree.materialise(index, element) for index in tree.roots()]
+        tree.release()
+
+    Strings are only decoded as they are read, & Element, Text & ProcessingInstruction objects only created as they are
+    materialised.
+"""
+import struct
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, List, Optional, Union
+
+from Events import EventParser, START, END, TEXT
+from Options import ParserOptions
+from classes.Document import Document
+from classes.Element import Element
+from classes.ProcessingInstruction import ProcessingInstruction
+from classes.Text import Text
+
+
+class FlatTree:
+    """
+        Parsed content encoded as arrays. See the module docstring.
+
+        Trees are built with `parse`, `encode` or `FlatTreeBuilder`, or read with `from_buffer`, & are read-only.
+        Nodes are read through `FlatNode` cursors (see `root` & `node`), or materialised as objects.
+    """
+    class Kind:
+        ELEMENT = 0
+        EMPTY_ELEMENT = 1
+        TEXT = 2
+        PROCESSING_INSTRUCTION = 3
+
+    # The buffer's header: a tag, the layout version, & the number of nodes, attributes & strings & size of the heap
+    HEADER = struct.Struct("<4sIqqqq")
+    TAG = b"XMLF"
+    VERSION = 1
+
+    # The arrays in the order they are laid out in a buffer, with their typecodes
+    ARRAYS = [("kinds", "B"), ("parents", "i"), ("first_children", "i"), ("next_siblings", "i"), ("names", "i"),
+              ("values", "i"), ("attribute_starts", "i"), ("attribute_names", "i"), ("attribute_values", "i"),
+              ("string_offsets", "q"), ("heap", "B")]
+
+    def __init__(self, arrays: Dict[str, Union[array, memoryview]]):
+        self.kinds = arrays["kinds"]  # type: Union[array, memoryview]
+        self.parents = arrays["parents"]  # type: Union[array, memoryview]
+        self.first_children = arrays["first_children"]  # type: Union[array, memoryview]
+        self.next_siblings = arrays["next_siblings"]  # type: Union[array, memoryview]
+        self.names = arrays["names"]  # type: Union[array, memoryview]
+        self.values = arrays["values"]  # type: Union[array, memoryview]
+        self.attribute_starts = arrays["attribute_starts"]  # type: Union[array, memoryview]
+        self.attribute_names = arrays["attribute_names"]  # type: Union[array, memoryview]
+        self.attribute_values = arrays["attribute_values"]  # type: Union[array, memoryview]
+        self.string_offsets = arrays["string_offsets"]  # type: Union[array, memoryview]
+        self.heap = arrays["heap"]  # type: Union[array, memoryview]
+
+        # The document the tree was parsed from, if it was parsed by `parse`
+        self.document = None  # type: Optional[Document]
+
+        # Decoded names, which are few & repeated
+        self.__names = {}  # type: Dict[int, str]
+
+        # The buffer & shared memory segment the arrays are views of, if any
+        self.__buffer = None  # type: Optional[memoryview]
+        self.__segment = None  # type: Optional[shared_memory.SharedMemory]
+
+    def __len__(self):
+        return len(self.kinds)
+
+    """
+        =========
+        ENCODING
+        =========
+    """
+
+    @classmethod
+    def encode(cls, content: List[Union[Element, Text, ProcessingInstruction]],
+               indices: Optional[Dict[int, int]] = None) -> 'FlatTree':
+        """
+            Encodes the given content & everything within it
+        :param content: The top-level nodes, e.g. an element's content or `[document.root]`
+        :param indices: If given, filled with the index of each element (by id), e.g. to encode references to them
+        :return: The encoded tree
+        """
+        builder = FlatTreeBuilder()
+        stack = list(reversed(content))
+        while stack:
+            node = stack.pop()
+            # Each element's content is followed by None, marking its end
+            if node is None:
+                builder.end()
+            elif isinstance(node, Element):
+                index = builder.start(node.name, node.attributes, node.is_self_closing)
+                if indices is not None:
+                    indices[id(node)] = index
+                stack.append(None)
+                stack.extend(reversed(node.content))
+            elif isinstance(node, Text):
+                builder.text(node.text)
+            else:
+                builder.processing_instruction(node.target, node.data)
+        return builder.build(cls)
+
+    """
+        ========
+        BUFFERS
+        ========
+        Each array starts at a multiple of 8 bytes from the start of the buffer, so it can be viewed in place.
+    """
+
+    @property
+    def nbytes(self) -> int:
+        """
+            The size of the buffer the tree is laid out in (see `write`)
+        """
+        size = FlatTree.HEADER.size
+        for name, _ in FlatTree.ARRAYS:
+            size += -size % 8 + self.__nbytes(getattr(self, name))
+        return size
+
+    def write(self, buffer: memoryview) -> int:
+        """
+            Lays the tree out at the start of the given writable buffer, which must hold at least `nbytes` bytes.
+            Returns the number of bytes written
+        """
+        buffer = memoryview(buffer).cast("B")
+        FlatTree.HEADER.pack_into(buffer, 0, FlatTree.TAG, FlatTree.VERSION, len(self.kinds),
+                                  len(self.attribute_names), len(self.string_offsets) - 1, len(self.heap))
+        position = FlatTree.HEADER.size
+        for name, _ in FlatTree.ARRAYS:
+            position += -position % 8
+            values = memoryview(getattr(self, name)).cast("B")
+            buffer[position:position + len(values)] = values
+            position += len(values)
+        return position
+
+    def to_bytes(self) -> bytes:
+        buffer = bytearray(self.nbytes)
+        self.write(buffer)
+        return bytes(buffer)
+
+    @classmethod
+    def from_buffer(cls, buffer) -> 'FlatTree':
+        """
+            Reads a tree laid out by `write`, viewing its arrays in place rather than copying them. The buffer must
+            not change while the tree is in use
+        """
+        buffer = memoryview(buffer).cast("B")
+        tag, version, node_count, attribute_count, string_count, heap_size = FlatTree.HEADER.unpack_from(buffer)
+        if tag != FlatTree.TAG or version != FlatTree.VERSION:
+            raise ValueError("Buffer does not hold a flat tree")
+
+        lengths = {"attribute_starts": node_count + 1, "attribute_names": attribute_count,
+                   "attribute_values": attribute_count, "string_offsets": string_count + 1, "heap": heap_size}
+        arrays = {}
+        position = FlatTree.HEADER.size
+        for name, typecode in FlatTree.ARRAYS:
+            position += -position % 8
+            size = lengths.get(name, node_count) * array(typecode).itemsize
+            if position + size > len(buffer):
+                raise ValueError("Buffer is too short for the flat tree it holds")
+            arrays[name] = buffer[position:position + size].cast(typecode)
+            position += size
+
+        tree = cls(arrays)
+        tree.__buffer = buffer
+        return tree
+
+    def to_shared_memory(self) -> shared_memory.SharedMemory:
+        """
+            Writes the tree into a new shared memory segment, to be read by another process with `from_shared_memory`.
+            The reader owns the segment & frees it (see `release`), so the segment outlives this process
+        """
+        segment = shared_memory.SharedMemory(create=True, size=max(self.nbytes, 1))
+        self.write(segment.buf)
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+    @classmethod
+    def from_shared_memory(cls, name: str) -> 'FlatTree':
+        """
+            Reads a tree written by `to_shared_memory` in place. The segment is freed by `release`
+        """
+        segment = shared_memory.SharedMemory(name)
+        try:
+            tree = cls.from_buffer(segment.buf)
+        except ValueError:
+            segment.close()
+            segment.unlink()
+            raise
+        tree.__segment = segment
+        return tree
+
+    def release(self):
+        """
+            Releases the buffer the tree was read from, freeing its shared memory segment if it has one. The tree can't
+            be used afterwards, but anything materialised from it can
+        """
+        for name, _ in FlatTree.ARRAYS:
+            values = getattr(self, name)
+            if isinstance(values, memoryview):
+                values.release()
+        if self.__buffer is not None:
+            self.__buffer.release()
+            self.__buffer = None
+        if self.__segment is not None:
+            self.__segment.close()
+            self.__segment.unlink()
+            self.__segment = None
+
+    @staticmethod
+    def __nbytes(values: Union[array, memoryview]) -> int:
+        return values.nbytes if isinstance(values, memoryview) else len(values) * values.itemsize
+
+    """
+        ========
+        READING
+        ========
+    """
+
+    def string(self, index: int) -> str:
+        """
+            Decodes the string at the given index
+        """
+        offsets = self.string_offsets
+        return str(self.heap[offsets[index]:offsets[index + 1]], "utf-8", "surrogatepass")
+
+    def name(self, index: int) -> str:
+        """
+            Decodes the name (or target) at the given string index, decoding each name only once
+        """
+        name = self.__names.get(index)
+        if name is None:
+            name = self.__names[index] = self.string(index)
+        return name
+
+    @property
+    def root(self) -> Optional['FlatNode']:
+        """
+            The first top-level node, i.e. the root element of a parsed document
+        """
+        return FlatNode(self, 0) if len(self.kinds) else None
+
+    def node(self, index: int) -> 'FlatNode':
+        """
+            A cursor over the node at the given index
+        """
+        if not 0 <= index < len(self.kinds):
+            raise IndexError(f"No node at index {index}")
+        return FlatNode(self, index)
+
+    def subtree_end(self, index: int) -> int:
+        """
+            The index after the last node within the node at the given index. Nodes are in document order, so the
+            nodes within it are exactly those numbered `index` + 1 ... `subtree_end(index)` - 1
+        """
+        parents, next_siblings = self.parents, self.next_siblings
+        while index != -1:
+            if next_siblings[index] != -1:
+                return next_siblings[index]
+            index = parents[index]
+        return len(self.kinds)
+
+    def roots(self) -> Iterator[int]:
+        """
+            The indices of the top-level nodes, in order
+        """
+        index = 0 if len(self.kinds) else -1
+        while index != -1:
+            yield index
+            index = self.next_siblings[index]
+
+    def child_indices(self, index: int) -> Iterator[int]:
+        """
+            The indices of the child nodes of the element at the given index, in order
+        """
+        index = self.first_children[index]
+        while index != -1:
+            yield index
+            index = self.next_siblings[index]
+
+    def attributes(self, index: int) -> Dict[str, str]:
+        """
+            The attributes of the element at the given index
+        """
+        start, end = self.attribute_starts[index], self.attribute_starts[index + 1]
+        return {self.name(self.attribute_names[position]): self.string(self.attribute_values[position])
+                for position in range(start, end)}
+
+    def materialise(self, index: int, parent: Optional[Element] = None, options: Optional[ParserOptions] = None,
+                    nodes: Optional[Dict[int, Union[Element, Text, ProcessingInstruction]]] = None) \
+            -> Union[Element, Text, ProcessingInstruction]:
+        """
+            Builds the node at the given index & everything within it as Element, Text & ProcessingInstruction objects
+        :param index: The node's index
+        :param parent: The element the node belongs to, which it is not added to. If namespaces are enabled, names
+                       are resolved within its scope
+        :param options: The options the node was parsed with (see `ParserOptions`)
+        :param nodes: If given, filled with each node built by its index, e.g. to decode references to them
+        :return: The node
+        """
+        options = options or (parent.options if parent is not None else None)
+        kinds, values = self.kinds, self.values
+        top = None
+        elements = []  # type: List[Element]
+        stack = [(index, parent)]
+        while stack:
+            index, parent = stack.pop()
+            kind = kinds[index]
+            if kind <= FlatTree.Kind.EMPTY_ELEMENT:
+                node = Element.build(self.name(self.names[index]), self.attributes(index), options,
+                                     is_self_closing=kind == FlatTree.Kind.EMPTY_ELEMENT)
+                node.parent = parent
+                if node.options.namespaces:
+                    node.resolve_namespaces("")
+                elements.append(node)
+                stack.extend((child, node) for child in reversed(list(self.child_indices(index))))
+            elif kind == FlatTree.Kind.TEXT:
+                node = Text(options)
+                node.text = self.string(values[index])
+            else:
+                node = object.__new__(ProcessingInstruction)
+                ProcessingInstruction.__init__(node, "", options)
+                node.target = self.name(self.names[index])
+                node.data = self.string(values[index]) if values[index] != -1 else None
+
+            node.parent = parent
+            if top is None:
+                top = node
+            else:
+                parent.content.append(node)
+            if nodes is not None:
+                nodes[index] = node
+
+        for element in elements:
+            element.sort_content()
+        return top
+
+
+class FlatTreeBuilder:
+    """
+        Builds a `FlatTree` from a stream of nodes in document order, e.g. parse events (see `parse`)
+    """
+    def __init__(self):
+        self.__arrays = {name: array(typecode) for name, typecode in FlatTree.ARRAYS}
+        self.__arrays["string_offsets"].append(0)
+
+        # The index of each shared string (names & attribute values) in the heap
+        self.__strings = {}  # type: Dict[str, int]
+
+        # The open elements, & the last node added within each of them (& at the top level, first), or -1
+        self.__open_elements = []  # type: List[int]
+        self.__last_children = [-1]  # type: List[int]
+
+    def start(self, name: str, attributes: Dict[str, str], is_self_closing: bool = False) -> int:
+        """
+            Adds an element, which contains the nodes added until it is ended (see `end`). Returns its index
+        """
+        kind = FlatTree.Kind.EMPTY_ELEMENT if is_self_closing else FlatTree.Kind.ELEMENT
+        index = self.__add(kind, self.__string(name), -1)
+        attribute_names, attribute_values = self.__arrays["attribute_names"], self.__arrays["attribute_values"]
+        for attribute_name, value in attributes.items():
+            attribute_names.append(self.__string(attribute_name))
+            attribute_values.append(self.__string(value))
+
+        self.__open_elements.append(index)
+        self.__last_children.append(-1)
+        return index
+
+    def end(self):
+        """
+            Ends the last element started
+        """
+        if not self.__open_elements:
+            raise ValueError("There is no element to end")
+        self.__open_elements.pop()
+        self.__last_children.pop()
+
+    def text(self, text: str) -> int:
+        # Text is rarely repeated, so isn't shared
+        return self.__add(FlatTree.Kind.TEXT, -1, self.__string(text, share=False))
+
+    def processing_instruction(self, target: str, data: Optional[str]) -> int:
+        return self.__add(FlatTree.Kind.PROCESSING_INSTRUCTION, self.__string(target),
+                          self.__string(data) if data is not None else -1)
+
+    def build(self, tree_type: type = FlatTree) -> FlatTree:
+        """
+            Returns the tree of the nodes added. The builder can't be used afterwards
+        """
+        if self.__open_elements:
+            raise ValueError("Every element must be ended before the tree is built")
+        arrays = self.__arrays
+        arrays["attribute_starts"].append(len(arrays["attribute_names"]))
+        self.__strings = {}
+        return tree_type(arrays)
+
+    def __add(self, kind: int, name: int, value: int) -> int:
+        arrays = self.__arrays
+        kinds = arrays["kinds"]
+        index = len(kinds)
+
+        # Link the node to its parent or previous sibling
+        parent = self.__open_elements[-1] if self.__open_elements else -1
+        previous = self.__last_children[-1]
+        if previous != -1:
+            arrays["next_siblings"][previous] = index
+        elif parent != -1:
+            arrays["first_children"][parent] = index
+        self.__last_children[-1] = index
+
+        kinds.append(kind)
+        arrays["parents"].append(parent)
+        arrays["first_children"].append(-1)
+        arrays["next_siblings"].append(-1)
+        arrays["names"].append(name)
+        arrays["values"].append(value)
+        arrays["attribute_starts"].append(len(arrays["attribute_names"]))
+        return index
+
+    def __string(self, value: str, share: bool = True) -> int:
+        """
+            Adds the given string to the heap, unless it is shared & already there. Returns its index
+        """
+        if share:
+            index = self.__strings.get(value)
+            if index is not None:
+                return index
+
+        string_offsets, heap = self.__arrays["string_offsets"], self.__arrays["heap"]
+        heap.frombytes(value.encode("utf-8", "surrogatepass"))
+        string_offsets.append(len(heap))
+        index = len(string_offsets) - 2
+        if share:
+            self.__strings[value] = index
+        return index
+
+
+class FlatNode:
+    """
+        A cursor over a node of a `FlatTree`, with the read-only interface of the Element, Text or
+        ProcessingInstruction the node would be materialised as (see `materialise`).
+
+        Cursors hold nothing but the tree & the node's index, & are created as they are needed, so compare them with
+        `==` rather than `is`. Names & values are decoded from the tree on each access.
+
+        Attributes:
+            tree    The tree the node is in
+            index   The node's index within the tree, which is also its position in document order (see `order`)
+    """
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree: FlatTree, index: int):
+        self.tree = tree  # type: FlatTree
+        self.index = index  # type: int
+
+    def __eq__(self, other):
+        return isinstance(other, FlatNode) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self):
+        kind = self.kind
+        if kind <= FlatTree.Kind.EMPTY_ELEMENT:
+            return f"FlatNode(<{self.name}>, {self.index})"
+        if kind == FlatTree.Kind.TEXT:
+            return f"FlatNode({self.text!r}, {self.index})"
+        return f"FlatNode(<?{self.target}?>, {self.index})"
+
+    @property
+    def kind(self) -> int:
+        return self.tree.kinds[self.index]
+
+    @property
+    def is_element(self) -> bool:
+        return self.tree.kinds[self.index] <= FlatTree.Kind.EMPTY_ELEMENT
+
+    @property
+    def is_self_closing(self) -> bool:
+        return self.tree.kinds[self.index] == FlatTree.Kind.EMPTY_ELEMENT
+
+    @property
+    def order(self) -> int:
+        return self.index
+
+    @property
+    def end_order(self) -> int:
+        """
+            The position of the node's last descendant, or its own if it has none (see `Element.end_order`)
+        """
+        return self.tree.subtree_end(self.index) - 1
+
+    @property
+    def parent(self) -> Optional['FlatNode']:
+        parent = self.tree.parents[self.index]
+        return FlatNode(self.tree, parent) if parent != -1 else None
+
+    """
+        ===========
+        PROPERTIES
+        ===========
+        Each applies to the kinds of node it applies to in the object tree, & is None (or empty) for the others.
+    """
+
+    @property
+    def name(self) -> Optional[str]:
+        """
+            The element's name
+        """
+        return self.tree.name(self.tree.names[self.index]) if self.is_element else None
+
+    @property
+    def target(self) -> Optional[str]:
+        """
+            The processing instruction's target
+        """
+        if self.kind != FlatTree.Kind.PROCESSING_INSTRUCTION:
+            return None
+        return self.tree.name(self.tree.names[self.index])
+
+    @property
+    def data(self) -> Optional[str]:
+        """
+            The processing instruction's data
+        """
+        value = self.tree.values[self.index]
+        if self.kind != FlatTree.Kind.PROCESSING_INSTRUCTION or value == -1:
+            return None
+        return self.tree.string(value)
+
+    @property
+    def attributes(self) -> Dict[str, str]:
+        return self.tree.attributes(self.index)
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """
+            The value of the attribute with the given name, without decoding the others
+        """
+        tree = self.tree
+        for position in range(tree.attribute_starts[self.index], tree.attribute_starts[self.index + 1]):
+            if tree.name(tree.attribute_names[position]) == name:
+                return tree.string(tree.attribute_values[position])
+        return default
+
+    @property
+    def content(self) -> List['FlatNode']:
+        return [FlatNode(self.tree, index) for index in self.tree.child_indices(self.index)] \
+            if self.is_element else []
+
+    @property
+    def children(self) -> List['FlatNode']:
+        return [node for node in self.content if node.is_element]
+
+    @property
+    def text(self) -> Union[str, List['FlatNode'], None]:
+        """
+            The text of a text node, or the text within an element as a list of text nodes (see `Element.text`)
+        """
+        kind = self.kind
+        if kind == FlatTree.Kind.TEXT:
+            return self.tree.string(self.tree.values[self.index])
+        if kind == FlatTree.Kind.PROCESSING_INSTRUCTION:
+            return None
+        return [node for node in self.content if node.kind == FlatTree.Kind.TEXT]
+
+    @property
+    def processing_instructions(self) -> List['FlatNode']:
+        return [node for node in self.content if node.kind == FlatTree.Kind.PROCESSING_INSTRUCTION]
+
+    """
+        ===========
+        TRAVERSAL
+        ===========
+        The nodes within a node are the nodes numbered after it up to the end of its subtree, so traversals are scans of
+        consecutive indices.
+    """
+
+    def iter(self, name: Optional[str] = None) -> Iterator['FlatNode']:
+        """
+            The elements within this node in document order, optionally only those with the given name
+        """
+        tree = self.tree
+        kinds, names = tree.kinds, tree.names
+        for index in range(self.index + 1, tree.subtree_end(self.index)):
+            if kinds[index] <= FlatTree.Kind.EMPTY_ELEMENT and (name is None or tree.name(names[index]) == name):
+                yield FlatNode(tree, index)
+
+    def text_content(self) -> str:
+        """
+            All the text within this node, in document order
+        """
+        tree = self.tree
+        kinds, values = tree.kinds, tree.values
+        if kinds[self.index] == FlatTree.Kind.TEXT:
+            return tree.string(values[self.index])
+        return "".join(tree.string(values[index]) for index in range(self.index + 1, tree.subtree_end(self.index))
+                       if kinds[index] == FlatTree.Kind.TEXT)
+
+    def is_ancestor_of(self, node: 'FlatNode') -> bool:
+        return node.tree is self.tree and self.index < node.index < self.tree.subtree_end(self.index)
+
+    def materialise(self, options: Optional[ParserOptions] = None) -> Union[Element, Text, ProcessingInstruction]:
+        """
+            Builds the node & everything within it as objects (see `FlatTree.materialise`)
+        """
+        return self.tree.materialise(self.index, options=options)
+
+
+def parse(xml: str, options: Optional[ParserOptions] = None) -> FlatTree:
+    """
+        Parses the given document straight into a flat tree, without creating an object for any node. The document's
+        root element is the tree's `root`, & the tree's `document` holds the prolog, e.g. its entities.
+
+        The document is parsed into events (see `Events`), so names are not resolved against namespaces, elements are
+        not validated against the DTD, & elements are never marked as self-closing
+    """
+    events = EventParser(xml, options)
+    builder = FlatTreeBuilder()
+    for event in events:
+        kind = event[0]
+        if kind == START:
+            builder.start(event[1], event[2])
+        elif kind == END:
+            builder.end()
+        elif kind == TEXT:
+            builder.text(event[1])
+        else:
+            builder.processing_instruction(event[1], event[2])
+
+    tree = builder.build()
+    tree.document = events.document
+    return tree
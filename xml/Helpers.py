@@ -13,6 +13,19 @@ from classes.Error import XMLError, DisallowedCharacterError
 """
 
 
+def normalise_newlines(text: str) -> str:
+    """
+        Normalises line endings (#xD#xA & lone #xD) to #xA. See xml spec ch2.11.
+
+        Applied to each chunk of text as it is copied out of the document, rather than to the whole document up front,
+        so text without any #xD is returned as-is. Not applied to entity replacement text, where any #xD comes from a
+        character reference and must be kept.
+    """
+    if "\u000d" not in text:
+        return text
+    return text.replace("\u000d\u000a", "\u000a").replace("\u000d", "\u000a")
+
+
 def parse_reference(reference: str,
                     general_entities: Dict[str, Entity] = None,
                     parameter_entities: Dict[str, Entity] = None,
@@ -131,6 +144,10 @@ def parse_string_literal(text: str,
                                          expand_general_entities,
                                          expand_parameter_entities)
 
+        # External entities have no replacement text, & may not be referenced in literals (see xml spec ch4.4.4)
+        if expansion_text is None:
+            raise XMLError(f"Reference to external entity {reference.group()} in literal", source=text)
+
         # Normalise whitespace
         if normalise_whitespace and reference.group()[1] != "#":
             expansion_text = expansion_text.replace("\u000a", "\u0020")
@@ -166,6 +183,192 @@ def parse_string_literal(text: str,
     return parsed_text
 
 
+def parse_attribute_value(attribute_value: str,
+                          general_entities: Dict[str, Entity],
+                          source: str,
+                          position: int,
+                          check_structure: bool = True,
+                          check_characters: bool = True) -> str:
+    """
+        Expands & checks an attribute's value
+    :param attribute_value: The value, as written between its delimiters
+    :param general_entities: A dictionary of general entities for the current document
+    :param source: The xml the value was found in
+    :param position: The position of the value's opening delimiter in `source`, where errors are reported
+    :param check_structure: Whether to check the value doesn't contain '<'
+    :param check_characters: Whether to check the value conforms to xmlspec::Char
+    :return: The attribute value
+    """
+    attribute_value = normalise_newlines(attribute_value)
+
+    # Attribute values may not contain '<'
+    if check_structure and "<" in attribute_value:
+        raise DisallowedCharacterError(attribute_value, "attribute value", conforms_to="<",
+                                       source=source, position=position)
+
+    # Expand attribute value references & normalise whitespace
+    try:
+        attribute_value = parse_string_literal(attribute_value,
+                                               general_entities=general_entities,
+                                               expand_parameter_entities=False,
+                                               normalise_whitespace=True)
+    except XMLError as error:
+        # Report reference errors at the start of the attribute value
+        error.relocate(source, position)
+        raise
+
+    # Attribute values must conform to xmlspec::Char
+    if check_characters and not RegEx.CharSequence.fullmatch(attribute_value):
+        raise DisallowedCharacterError(attribute_value, "attribute value", conforms_to="Char",
+                                       source=source, position=position)
+
+    return attribute_value
+
+
+"""
+    =======
+    MARKUP
+    =======
+    Well-formedness checks shared by the tree parser (`Element`, `Comment`, `ProcessingInstruction`, `Text`) & the
+    event parser (`Events`). Each works in place at a position within its source, & reports errors there.
+"""
+
+
+def check_name(name: str, where: str, source: str, position: int, reserved_allowed: bool = False):
+    """
+        Ensures the given name conforms to xmlspec::Name, or is a reserved name (e.g. xmlns, xml:lang) if allowed
+    :param where: What the name is of, for the error message
+    """
+    if not RegEx.Name.fullmatch(name) and not (reserved_allowed and RegEx.ReservedAttributeName.fullmatch(name)):
+        raise DisallowedCharacterError(name, where, conforms_to="Name", source=source, position=position)
+
+
+def check_char_sequence(text: str, where: str, source: str, position: int = 0, start: int = 0,
+                        end: Optional[int] = None):
+    """
+        Ensures `text[start:end]` conforms to xmlspec::Char, without slicing it
+    :param where: What the text is, for the error message
+    """
+    end = len(text) if end is None else end
+    if not RegEx.CharSequence.fullmatch(text, start, end):
+        raise DisallowedCharacterError(text[start:end], where, conforms_to="Char", source=source, position=position)
+
+
+def parse_start_tag_attributes(source: str,
+                               position: int,
+                               attributes: Dict[str, str],
+                               general_entities: Dict[str, Entity],
+                               check_structure: bool = True,
+                               check_characters: bool = True) -> int:
+    """
+        Parses every attribute of a start-tag from the given position (just after the element's name) into
+        `attributes`, checking names are valid & unique & expanding values (see `parse_attribute_value`)
+    :return: The position immediately after the last attribute
+    """
+    while True:
+        attribute = RegEx.StartTag_Attribute.match(source, position)
+        if not attribute:
+            return position
+
+        # The value is in whichever quoted group matched
+        name = attribute.group(1)
+        value_group = attribute.lastindex
+
+        if check_characters:
+            check_name(name, "attribute name", source, attribute.start(1), reserved_allowed=True)
+        if name in attributes:
+            raise XMLError(f"Repeated attribute '{name}' in element", source=source, position=attribute.start(1))
+
+        attributes[name] = parse_attribute_value(attribute.group(value_group), general_entities, source,
+                                                 attribute.start(value_group) - 1, check_structure=check_structure,
+                                                 check_characters=check_characters)
+        position = attribute.end()
+
+
+def parse_end_tag(source: str, position: int, name: str, check_structure: bool = True,
+                  start_tag: Optional[str] = None) -> int:
+    """
+        Checks the end-tag at the given position closes the named element. The name is compared in place, so a
+        matching end-tag is never sliced or searched
+    :param start_tag: The xml from the element's start-tag, where a mismatch is reported. Defaults to the end-tag
+    :return: The position immediately after the end-tag
+    """
+    # Compare the expected name in place, followed by '>' or whitespace & '>'
+    name_end = position + 2 + len(name)
+    if source.startswith(name, position + 2):
+        if source.startswith(">", name_end):
+            return name_end + 1
+        tag_end = RegEx.EndTag_End.match(source, name_end)
+        if tag_end:
+            return tag_end.end()
+
+    # Otherwise the end-tag does not match, so isolate the end-tag name
+    end_index = source.find(">", position)
+    if end_index == -1:
+        raise XMLError(f"Unable to find end of end-tag for element '{name}'", source=source, position=position)
+
+    # Trusted xml is assumed to be correctly nested
+    if not check_structure:
+        return end_index + 1
+
+    end_name = source[position + 2:end_index].rstrip(" \u0009\u000D\u000A")
+    if start_tag is not None:
+        raise XMLError(f"Mismatched start ('{name}') and end ('{end_name}') tags for element", source=start_tag)
+    raise XMLError(f"Mismatched start ('{name}') and end ('{end_name}') tags for element", source=source,
+                   position=position)
+
+
+def parse_comment(source: str, position: int, check_structure: bool = True, check_characters: bool = True) -> int:
+    """
+        Checks the comment at the given position is terminated, conforms to xmlspec::Char & doesn't contain '--' or
+        end with '--->'
+    :return: The position immediately after the comment
+    """
+    end_index = source.find("-->", position + 4)
+    if end_index == -1:
+        raise XMLError("Unable to find end of comment", source=source, position=position)
+
+    if check_characters and not RegEx.CharSequence.fullmatch(source, position, end_index):
+        raise DisallowedCharacterError(source[position:end_index + 3], "comment", conforms_to="Char",
+                                       source=source, position=position)
+    if check_structure:
+        hyphens = source.find("--", position + 4, end_index)
+        if hyphens != -1:
+            raise DisallowedCharacterError(source[position:end_index + 3], "comment", conforms_to="--",
+                                           source=source, position=hyphens)
+        if source[end_index - 1] == "-":
+            raise XMLError("Comments may not end with '--->'", source=source, position=end_index - 1)
+    return end_index + 3
+
+
+def parse_processing_instruction(source: str, position: int,
+                                 check_characters: bool = True) -> (str, Optional[str], int):
+    """
+        Parses the processing instruction at the given position, checking its target conforms to xmlspec::Name & its
+        data to xmlspec::Char. Line endings in the data are normalised
+    :return: The target, the data (None if there is none) & the position immediately after the processing instruction
+    """
+    target_end = RegEx.ProcessingInstruction_TargetEnd.search(source, position + 2)
+    if not target_end:
+        raise XMLError("Unable to find end of processing instruction", source=source, position=position)
+
+    target = source[position + 2:target_end.start()]
+    if check_characters:
+        check_name(target, "processing instruction target", source, position)
+
+    # Special case: no attached data
+    if target_end.group() == "?>":
+        return target, None, target_end.end()
+
+    end_index = source.find("?>", target_end.end())
+    if end_index == -1:
+        raise XMLError("Unable to find end of processing instruction", source=source, position=position)
+    data = normalise_newlines(source[target_end.end():end_index])
+    if check_characters:
+        check_char_sequence(data, "processing instruction data", source, position)
+    return target, data, end_index + 2
+
+
 """
     =====
     URIs    
@@ -173,10 +376,14 @@ def parse_string_literal(text: str,
 """
 
 
-def parse_external_reference(xml: str, look_for_notation: bool = True) -> (str, str, Optional[str], Optional[str]):
+def parse_external_reference(xml: str,
+                             look_for_notation: bool = True,
+                             check_characters: bool = True) -> (str, str, Optional[str], Optional[str]):
     """
        Returns (remaining_xml, public, system, notation)
 
+       If `check_characters` is False, the URIs & notation are not checked against xmlspec::Char & xmlspec::Name
+
        todo - TESTS!! And this is also a mess :(
     """
     # The URI type (system or public) runs up to the next whitespace
@@ -191,11 +398,11 @@ def parse_external_reference(xml: str, look_for_notation: bool = True) -> (str,
                        source=xml)
 
     # Parse the second uri
-    uri1, xml = parse_uri(xml[whitespace.start():])
+    uri1, xml = parse_uri(xml[whitespace.start():], check_characters)
 
     # If this is a PUBLIC reference there is another uri
     if uri_type == "PUBLIC":
-        uri2, xml = parse_uri(xml)
+        uri2, xml = parse_uri(xml, check_characters)
 
     # Check for a notation
     ndata = re.match(f"{RegEx.whitespace}NDATA{RegEx.whitespace}", xml)
@@ -203,13 +410,15 @@ def parse_external_reference(xml: str, look_for_notation: bool = True) -> (str,
         # Notation is up to next whitespace or `>`
         notation_end = RegEx.Whitespace_Or_GT.search(xml, pos=ndata.end())
         if not notation_end:
-            raise XMLError()
+            raise XMLError("Unable to find end of external reference notation", source=xml)
         notation = xml[ndata.end():notation_end.start()]
+        xml_before_notation = xml
         xml = xml[notation_end.start():]
 
         # Notation must conform to xmlspec::Name
-        if not RegEx.Name.fullmatch(notation):
-            raise DisallowedCharacterError(notation, "external reference notation", conforms_to="Name", source=None)
+        if check_characters and not RegEx.Name.fullmatch(notation):
+            raise DisallowedCharacterError(notation, "external reference notation", conforms_to="Name",
+                                           source=xml_before_notation, position=ndata.end())
 
         if uri_type == "PUBLIC":
             return xml, uri2, uri1, notation
@@ -222,7 +431,7 @@ def parse_external_reference(xml: str, look_for_notation: bool = True) -> (str,
         return xml, uri1, None, None
 
 
-def parse_uri(remaining_xml: str) -> (str, str):
+def parse_uri(remaining_xml: str, check_characters: bool = True) -> (str, str):
     # Strip whitespace
     whitespace = RegEx.Whitespace.match(remaining_xml)
     if not whitespace:
@@ -236,11 +445,11 @@ def parse_uri(remaining_xml: str) -> (str, str):
 
     # Parse the URI
     end_index = remaining_xml.find(delimiter, 1)
-    uri = remaining_xml[1: end_index]
+    uri = normalise_newlines(remaining_xml[1: end_index])
 
     # URI must conform to xmlspec::char
-    if not RegEx.CharSequence.fullmatch(uri):
-        raise DisallowedCharacterError(uri, "URI", conforms_to="Char", source=None)
+    if check_characters and not RegEx.CharSequence.fullmatch(uri):
+        raise DisallowedCharacterError(uri, "URI", conforms_to="Char", source=remaining_xml)
 
     # Return uri and unparsed xml
     return uri, remaining_xml[end_index + 1:]
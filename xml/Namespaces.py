@@ -0,0 +1,132 @@
+"""
+    Support for xml namespaces. See the Namespaces in XML 1.0 spec at https://www.w3.org/TR/xml-names/
+
+    Resolved names are `QName` objects interned in a `NameTable`, so every occurrence of the same expanded name (the
+    pair of namespace uri & local name) is the same object, and names can be compared by identity:
+
+        element.qname is table.qname("http://www.w3.org/1999/xhtml", "p")
+
+    The prefixes in scope at each element are held in a `NamespaceScope`. Scopes are inherited: an element which
+    declares no namespaces shares its parent's scope, and an element which does declares a new scope holding every
+    binding in force, so resolving a prefix is a single lookup however deeply elements are nested.
+"""
+import sys
+from typing import Dict, Optional, Tuple
+
+from classes.Error import XMLError
+
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+XMLNS_NAMESPACE = "http://www.w3.org/2000/xmlns/"
+
+
+class QName:
+    """
+        An expanded name: a local name within an (optional) namespace. Create QNames through a `NameTable` rather than
+        directly, so that equal names are the same object.
+
+        Attributes:
+            namespace_uri   The namespace's uri, or None if the name is not in a namespace
+            local_name      The name within the namespace
+    """
+    __slots__ = ("namespace_uri", "local_name")
+
+    def __init__(self, namespace_uri: Optional[str], local_name: str):
+        self.namespace_uri = namespace_uri  # type: Optional[str]
+        self.local_name = local_name  # type: str
+
+    def __repr__(self):
+        if self.namespace_uri is None:
+            return self.local_name
+        return f"{{{self.namespace_uri}}}{self.local_name}"
+
+    def __reduce__(self):
+        # Unpickled names are interned in the shared table, so they stay comparable by identity
+        return intern_qname, (self.namespace_uri, self.local_name)
+
+
+class NameTable:
+    """
+        Interns expanded names, returning the same `QName` object every time the same name is requested.
+        Tables only ever grow, so one table is shared by every parse (see `NAME_TABLE`).
+    """
+    def __init__(self):
+        self.__names = {}  # type: Dict[Tuple[Optional[str], str], QName]
+
+    def __len__(self):
+        return len(self.__names)
+
+    def qname(self, namespace_uri: Optional[str], local_name: str) -> QName:
+        key = (namespace_uri, local_name)
+        name = self.__names.get(key)
+        if name is None:
+            name = QName(None if namespace_uri is None else sys.intern(namespace_uri), sys.intern(local_name))
+            self.__names[key] = name
+        return name
+
+
+# The table shared by every parse
+NAME_TABLE = NameTable()
+
+
+def intern_qname(namespace_uri: Optional[str], local_name: str) -> QName:
+    """
+        Returns the name from the shared table (see `NAME_TABLE`)
+    """
+    return NAME_TABLE.qname(namespace_uri, local_name)
+
+
+class NamespaceScope:
+    """
+        The namespace prefixes in scope at an element.
+
+        Attributes:
+            bindings    Every prefix in scope & the uri it is bound to. The default namespace has the prefix ''
+    """
+    def __init__(self, bindings: Dict[str, str]):
+        self.bindings = bindings  # type: Dict[str, str]
+
+    def resolve(self, prefix: str) -> Optional[str]:
+        """
+            Returns the uri bound to the given prefix (or the default namespace for ''), or None if it is not bound
+        """
+        return self.bindings.get(prefix)
+
+    def declare(self, declarations: Dict[str, str]) -> 'NamespaceScope':
+        """
+            Returns a new scope for an element making the given declarations (prefix to uri), checking each against
+            the namespace constraints. An empty uri undeclares the default namespace.
+        """
+        bindings = dict(self.bindings)
+        for prefix, uri in declarations.items():
+            if prefix == "xmlns":
+                raise XMLError("The prefix 'xmlns' may not be declared", None)
+            if prefix == "xml" and uri != XML_NAMESPACE:
+                raise XMLError(f"The prefix 'xml' may only be bound to '{XML_NAMESPACE}'", None)
+            if prefix != "xml" and uri == XML_NAMESPACE:
+                raise XMLError(f"Only the prefix 'xml' may be bound to '{XML_NAMESPACE}'", None)
+            if uri == XMLNS_NAMESPACE:
+                raise XMLError(f"No prefix may be bound to '{XMLNS_NAMESPACE}'", None)
+
+            if uri:
+                bindings[prefix] = uri
+            elif prefix == "":
+                bindings.pop("", None)
+            else:
+                raise XMLError(f"The prefix '{prefix}' may not be undeclared", None)
+        return NamespaceScope(bindings)
+
+
+# The scope of the root element, where only the 'xml' prefix is bound
+ROOT_SCOPE = NamespaceScope({"xml": XML_NAMESPACE})
+
+
+def split_name(name: str) -> Tuple[str, str]:
+    """
+        Splits a qualified name into its prefix ('' if there is none) and local part
+    """
+    prefix, colon, local_name = name.partition(":")
+    if not colon:
+        return "", name
+    if not prefix or not local_name or ":" in local_name:
+        raise XMLError(f"Invalid qualified name '{name}'", None)
+    return prefix, local_name
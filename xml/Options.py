@@ -0,0 +1,82 @@
+"""
+    Options controlling how documents are parsed, shared by every xml class taking part in a parse.
+"""
+
+
+class ParserOptions:
+    """
+        Options controlling how a document is parsed.
+
+        Attributes:
+            validation          How thoroughly the xml is checked, one of:
+                                    FULL        Full well-formedness checking, including conformance of every name
+                                                to xmlspec::Name and all text to xmlspec::Char (the default)
+                                    STRUCTURAL  Skips the Name & Char conformance checks but still checks the
+                                                document's structure: tag matching, ']]>' in text, '--' in
+                                                comments and '<' in attribute values
+                                    TRUSTED     Skips the structural checks as well, keeping only what is needed to
+                                                find the end of each construct. For machine-generated xml from a
+                                                trusted source, where checking is pure overhead
+            lazy                Whether elements are built lazily. If True, the root element is only scanned to find
+                                the extents of the elements within it, and each element is only built when its
+                                attributes or content are first accessed (see `LazyElement`)
+            namespaces          Whether element & attribute names are resolved against the namespaces in scope (see
+                                `Namespaces`), giving each element a `qname` & `qualified_attributes`
+            whitespace          Which whitespace-only text is dropped rather than kept as Text content, one of:
+                                    KEEP        None, all text is kept (the default)
+                                    IGNORABLE   Whitespace within elements which the DTD declares may only contain
+                                                child elements, where it is ignorable whitespace by definition
+                                    DROP        All whitespace-only text, e.g. the indentation of pretty-printed
+                                                documents. Also drops whitespace in mixed content, such as the
+                                                space in `<b>bold</b> <i>italic</i>`
+            validate            Whether elements are validated against the element declarations in the DTD (see
+                                `ElementDeclaration`), raising a `ValidityError` for undeclared elements & content
+                                their declaration does not allow. Elements built lazily are validated as they are
+                                built, & IDREFs are only checked once the whole tree is built by
+                                `LazyElement.materialise(recursive=True)` on the root element
+            share_subtrees      Whether identical subtrees are shared rather than duplicated (see `SubtreeTable`).
+                                Each completed element is replaced by an identical one already built, if there is one,
+                                & equal text & attribute values are shared. For documents with much repeated content,
+                                this saves most of the memory the repeats would take. An element occurring more than
+                                once has no `parent`, & modifying it modifies every occurrence, so the tree must be
+                                treated as read-only. Nodes are not numbered in document order (see `Element.order`),
+                                so such trees can't be queried with `XPath`. Elements built lazily are not shared
+            check_characters    Whether names & text are checked against xmlspec::Name & xmlspec::Char
+            check_structure     Whether the structural well-formedness constraints are checked
+
+        Options are read on every token so the derived flags are computed once on creation; create a new
+        ParserOptions object rather than modifying an existing one.
+    """
+    class Validation:
+        FULL = "full"
+        STRUCTURAL = "structural"
+        TRUSTED = "trusted"
+
+    class Whitespace:
+        KEEP = "keep"
+        IGNORABLE = "ignorable"
+        DROP = "drop"
+
+    def __init__(self, validation: str = Validation.FULL, lazy: bool = False, namespaces: bool = False,
+                 whitespace: str = Whitespace.KEEP, validate: bool = False, share_subtrees: bool = False):
+        if validation not in [ParserOptions.Validation.FULL,
+                              ParserOptions.Validation.STRUCTURAL,
+                              ParserOptions.Validation.TRUSTED]:
+            raise ValueError(f"Unknown validation level '{validation}'")
+        if whitespace not in [ParserOptions.Whitespace.KEEP,
+                              ParserOptions.Whitespace.IGNORABLE,
+                              ParserOptions.Whitespace.DROP]:
+            raise ValueError(f"Unknown whitespace handling '{whitespace}'")
+
+        self.validation = validation  # type: str
+        self.lazy = lazy  # type: bool
+        self.namespaces = namespaces  # type: bool
+        self.whitespace = whitespace  # type: str
+        self.validate = validate  # type: bool
+        self.share_subtrees = share_subtrees and not lazy  # type: bool
+        self.check_characters = validation == ParserOptions.Validation.FULL  # type: bool
+        self.check_structure = validation != ParserOptions.Validation.TRUSTED  # type: bool
+
+
+# The options used when none are given
+DEFAULT_OPTIONS = ParserOptions()
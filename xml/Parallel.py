@@ -0,0 +1,289 @@
+"""
+    Parses a single large document on several processes at once.
+
+    The prolog (including the DTD) & the root element's start-tag are parsed first, then the root element's content is
+    scanned (see `Scanner.find_split_points`) to split it between its children into chunks of about `chunk_size`
+    characters, skipping quoted values, comments, CDATA sections & processing instructions. Each chunk is parsed in a
+    worker process & the parsed content is sent back, then stitched into the root element in document order:
+
+        document = Parallel.parse(xml, processes=8)
+
+    or, for record-oriented documents, yielded one child of the root element at a time as each chunk arrives:
+
+        for row in Parallel.iter_children(xml):
+            process(row)
+
+    Each worker parses the prolog once when it starts, so it has the same general entities & attribute-list
+    declarations as the main process. At most two chunks per process are in flight at once, so the whole document is
+    never copied to the workers at once. Errors are reported at their offset in the document, as by `Document.parse`.
+
+    Workers write the content they parse into shared memory as a `Flat.FlatTree`, which the main process reads in
+    place, building each node only as it is reached, so iterating over children only holds one chunk's worth of
+    objects. Otherwise (or when sharing subtrees, see `ParserOptions.share_subtrees`) parsed content is pickled, which
+    costs more per node than the parse itself for simple content. Subtrees are only shared within a chunk.
+
+    Elements are not built lazily, & the root element's content can't be validated in pieces, so `lazy` & `validate`
+    are not supported.
+"""
+import collections
+import concurrent.futures
+import os
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+import Scanner
+from Flat import FlatTree
+from Options import ParserOptions, DEFAULT_OPTIONS
+from classes.Document import Document
+from classes.Element import Element
+from classes.Error import XMLError
+from classes.ProcessingInstruction import ProcessingInstruction
+from classes.Text import Text
+
+# The default length of the chunks of the root element's content parsed by each worker
+CHUNK_SIZE = 1 << 22
+
+# Whether workers send parsed content through shared memory by default. A segment must outlive the worker's handle to
+# it until the main process reads it, which POSIX shared memory does but Windows' does not
+SHARED_MEMORY = os.name == "posix"
+
+# The worker's document, the xml of the root element's start-tag & whether to use shared memory, set up when the worker
+# starts
+__worker = None  # type: Optional[Tuple[Document, str, bool]]
+
+
+def parse(xml: str, options: Optional[ParserOptions] = None, processes: Optional[int] = None,
+          chunk_size: int = CHUNK_SIZE, shared_memory: bool = SHARED_MEMORY) -> Document:
+    """
+        Parses the given document, splitting the root element's content between processes
+    :param xml:
+    :param options: The options to parse with (see `ParserOptions`)
+    :param processes: The number of worker processes, by default one per CPU
+    :param chunk_size: The approximate length of the chunks of content given to each worker
+    :param shared_memory: Whether workers send parsed content through shared memory (see `Flat`) rather than pickling
+    :return: The parsed document
+    """
+    document, root, split_points = __prepare(xml, options, chunk_size)
+    if root is None:
+        return document
+
+    try:
+        root.content.extend(__parse_chunks(xml, document, root, split_points, processes,
+                                           shared_memory and not document.options.share_subtrees))
+        root.sort_content()
+        document.root = root
+        document.parse_epilog(root.parse_end_tag(xml[split_points[-1]:]))
+    except XMLError as error:
+        error.locate(xml)
+        raise
+    return document
+
+
+def iter_children(xml: str, options: Optional[ParserOptions] = None, processes: Optional[int] = None,
+                  chunk_size: int = CHUNK_SIZE, shared_memory: bool = SHARED_MEMORY) -> Iterator[Element]:
+    """
+        Parses the given document as `parse` does, yielding each child element of the root element in document order
+        as soon as the chunk containing it has been parsed. Children are not kept in the root element's content, & the
+        whole document is checked, so errors after the last child are still raised
+    """
+    document, root, split_points = __prepare(xml, options, chunk_size)
+    if root is None:
+        yield from document.root.children
+        return
+
+    try:
+        for item in __parse_chunks(xml, document, root, split_points, processes,
+                                   shared_memory and not document.options.share_subtrees):
+            if isinstance(item, Element):
+                yield item
+        document.root = root
+        document.parse_epilog(root.parse_end_tag(xml[split_points[-1]:]))
+    except XMLError as error:
+        error.locate(xml)
+        raise
+
+
+def __prepare(xml: str, options: Optional[ParserOptions], chunk_size: int) \
+        -> Tuple[Document, Optional[Element], List[int]]:
+    """
+        Parses the prolog & the root element's start-tag, & splits the root element's content. If the content is a
+        single chunk, the document is parsed in this process instead, & no root element is returned
+    """
+    options = options or DEFAULT_OPTIONS
+    if options.lazy or options.validate:
+        raise ValueError("Documents can't be parsed in parallel lazily or with validation")
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be positive")
+
+    document = Document(xml, options)
+    try:
+        remaining_xml = document.parse_prolog()
+        root = Element(remaining_xml, options)
+        root.document = document
+        content = root.parse_opening_tag(remaining_xml, document.general_entities)
+    except XMLError as error:
+        error.locate(xml)
+        raise
+
+    # The scan only finds where the content's structure breaks down, so if it fails the document is parsed serially
+    # below to report the error as `Document.parse` does, e.g. at the unclosed element rather than at the root
+    try:
+        split_points = [] if root.is_self_closing else \
+            Scanner.find_split_points(xml, len(xml) - len(content), chunk_size)
+    except XMLError:
+        split_points = []
+
+    if len(split_points) <= 2:
+        document = Document(xml, options)
+        document.parse()
+        return document, None, split_points
+    return document, root, split_points
+
+
+def __parse_chunks(xml: str, document: Document, root: Element, split_points: List[int], processes: Optional[int],
+                   shared_memory: bool) -> Iterator[Union[Element, Text, ProcessingInstruction]]:
+    """
+        Parses the chunks between the split points in worker processes, yielding the root element's content in order
+        once each node has been added to the document (see `__adopt`)
+    """
+    prolog = xml[:split_points[0]]
+    processes = processes or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(processes, initializer=__start_worker,
+                                                initargs=(prolog, document.options, shared_memory)) as executor:
+        # Keep a bounded number of chunks in flight, so the document isn't copied to the workers all at once
+        in_flight = processes * 2
+        pending = collections.deque()  # type: Deque[concurrent.futures.Future]
+        chunks = iter(zip(split_points, split_points[1:]))
+        try:
+            for start, end in chunks:
+                pending.append(executor.submit(__parse_chunk, start, xml[start:end]))
+                if len(pending) >= in_flight:
+                    break
+
+            while pending:
+                result, ids, error = pending.popleft().result()
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    pending.append(executor.submit(__parse_chunk, next_chunk[0], xml[next_chunk[0]:next_chunk[1]]))
+
+                if error is not None:
+                    error_type, message, offset = error
+                    raise __rebuild_error(error_type, message, xml, offset)
+                if shared_memory:
+                    yield from __read_chunk(result, ids, root, document)
+                else:
+                    for item in result:
+                        __adopt(item, root, document)
+                        yield item
+                    for value, element in ids.items():
+                        document.ids.setdefault(value, element)
+        finally:
+            # Free the results of chunks that won't be read, e.g. after an error
+            for future in pending:
+                if not future.cancel() and shared_memory and future.exception() is None:
+                    result = future.result()[0]
+                    if result is not None:
+                        FlatTree.from_shared_memory(result).release()
+
+
+def __read_chunk(segment: str, ids: Dict[str, int], root: Element, document: Document) \
+        -> Iterator[Union[Element, Text, ProcessingInstruction]]:
+    """
+        Materialises the content of a chunk from the shared memory segment it was written to, one node at a time
+    """
+    tree = FlatTree.from_shared_memory(segment)
+    try:
+        id_values = {index: value for value, index in ids.items()}
+        for index in tree.roots():
+            nodes = {} if id_values else None
+            item = tree.materialise(index, root, document.options, nodes)
+            __adopt(item, root, document)
+            if nodes:
+                for node_index in id_values.keys() & nodes.keys():
+                    document.ids.setdefault(id_values[node_index], nodes[node_index])
+            yield item
+    finally:
+        tree.release()
+
+
+def __rebuild_error(error_type: type, message: str, xml: str, offset: int) -> XMLError:
+    """
+        Recreates an error raised by a worker (whose subclasses may not be picklable) at its offset in the document
+    """
+    error = error_type.__new__(error_type)
+    XMLError.__init__(error, message, xml, offset)
+    return error
+
+
+def __adopt(item: Union[Element, Text, ProcessingInstruction], root: Element, document: Document):
+    """
+        Links a node of the root element's content parsed by a worker into the root element & document, & numbers it &
+        everything within it in document order
+    """
+    number = not document.options.share_subtrees
+    item.parent = root
+
+    # Each element is visited again once its content has been numbered, to record its last descendant
+    stack = [item]
+    while stack:
+        node = stack.pop()
+        if type(node) is tuple:
+            node[0].end_order = document.node_count - 1
+            continue
+        if number:
+            node.order = document.node_count
+            document.node_count += 1
+        if isinstance(node, Element):
+            node.document = document
+            if number:
+                stack.append((node,))
+            stack.extend(reversed(node.content))
+
+
+def __start_worker(prolog: str, options: ParserOptions, shared_memory: bool):
+    """
+        Sets up a worker process, parsing the prolog & the root element's start-tag
+    """
+    global __worker
+    document = Document(prolog, options)
+    start_tag = document.parse_prolog()
+    __worker = (document, start_tag, shared_memory)
+
+
+def __parse_chunk(offset: int, chunk: str) -> tuple:
+    """
+        Parses a chunk of the root element's content in a worker process.
+        Returns the parsed content (or the name of the shared memory segment it was written to) & the IDs found within
+        it, or any error (as its type, message & offset in the document)
+    """
+    document, start_tag, shared_memory = __worker
+    document.ids = {}
+
+    # The chunk is parsed as the content of a copy of the root element. Its start-tag is parsed outside the document,
+    # so the root element isn't checked against the document again
+    container = Element(start_tag, document.options)
+    container.parse_opening_tag(start_tag, document.general_entities)
+    container.document = document
+
+    # The root element's end-tag is appended, so text at the end of the chunk is completed. Text refers to the chunk
+    # until it is sent
+    end_tag = f"</{container.name}>"
+    xml = chunk + end_tag
+    document.text_buffer = xml
+    try:
+        remaining_xml = container.parse_xml_block(xml, document.general_entities)
+        if len(remaining_xml) != len(end_tag):
+            raise XMLError(f"Mismatched end-tag within element '{container.name}'", source=remaining_xml)
+    except XMLError as error:
+        position = offset
+        if error.source is not None and xml.endswith(error.source):
+            position += min(len(xml) - len(error.source) + error.position, len(chunk))
+        return None, None, (type(error), error.message, position)
+
+    if not shared_memory:
+        return container.content, dict(document.ids), None
+
+    # Elements with IDs are sent by their index in the tree
+    indices = {}  # type: Dict[int, int]
+    segment = FlatTree.encode(container.content, indices).to_shared_memory()
+    segment.close()
+    return segment.name, {value: indices[id(element)] for value, element in document.ids.items()}, None
@@ -0,0 +1,302 @@
+"""
+    Opt-in instrumentation of the parser.
+
+    While an `instrument(sink)` block is active, the parsing methods of the xml classes, the text helpers and the
+    compiled regular expressions are temporarily replaced by timing wrappers which report every call to the sink.
+    Nothing is wrapped outside of the block, so the parser pays no instrumentation cost when profiling is disabled.
+
+    The wrappers are installed process-wide by the first active block & removed when the last one exits, so blocks may
+    overlap on different threads. Calls are reported to the sink of the innermost block active on the calling thread,
+    & calls on other threads (e.g. documents parsed concurrently without profiling) are not timed.
+
+    A sink is any object with a `record(construct, phase, elapsed, own_elapsed)` method, where
+        construct   The name of the instrumented function, e.g. `Element.parse_attributes`
+        phase       The parsing phase the construct belongs to (see `PHASES`). Regular expressions belong to the phase
+                    of the construct calling them
+        elapsed     Inclusive time of the call in seconds. Recursive calls of a construct already being timed report 0
+                    so that inclusive times are not counted twice
+        own_elapsed Exclusive time of the call in seconds, i.e. time not spent in other instrumented calls.
+                    Own times never overlap so they sum to the total instrumented time
+"""
+import functools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Callable
+
+import Helpers
+from RegularExpressions import RegEx
+from classes.AttributeListDeclaration import AttributeList, AttributeListDeclaration
+from classes.Comment import Comment
+from classes.Document import Document
+from classes.Element import Element
+from classes.ElementDeclaration import ElementDeclaration
+from classes.Entity import Entity
+from classes.LazyElement import LazyElement
+from classes.ProcessingInstruction import ProcessingInstruction
+from classes.Text import Text
+
+# Phase names, in rough order of occurrence within a document
+PHASES = ["xml declaration", "dtd", "entity expansion", "tags", "text", "misc", "validation"]
+
+
+class ConstructStats:
+    """
+        Accumulated timings for a single instrumented construct
+
+        Attributes:
+            phase       The parsing phase the construct belongs to
+            calls       The number of times the construct was called
+            total_time  Inclusive time spent in the construct (seconds)
+            own_time    Exclusive time spent in the construct (seconds)
+    """
+    def __init__(self, phase: str):
+        self.phase = phase
+        self.calls = 0  # type: int
+        self.total_time = 0.0  # type: float
+        self.own_time = 0.0  # type: float
+
+
+class ParseStats:
+    """
+        The default sink: collects the timings & call counts of an instrumented parse per construct and per phase.
+
+        An optional second sink can be given to receive every record as well (e.g. to stream them to a log).
+    """
+    def __init__(self, sink=None):
+        self.__sink = sink
+        self.constructs = {}  # type: Dict[str, ConstructStats]
+
+    def record(self, construct: str, phase: str, elapsed: float, own_elapsed: float):
+        stats = self.constructs.get(construct)
+        if stats is None:
+            stats = self.constructs[construct] = ConstructStats(phase)
+        stats.calls += 1
+        stats.total_time += elapsed
+        stats.own_time += own_elapsed
+
+        if self.__sink is not None:
+            self.__sink.record(construct, phase, elapsed, own_elapsed)
+
+    @property
+    def phases(self) -> Dict[str, ConstructStats]:
+        """
+            Timings summed by phase. Phase total & own times are both the sum of their constructs' own times, so no
+            time is attributed to two phases
+        """
+        phases = {}  # type: Dict[str, ConstructStats]
+        for stats in self.constructs.values():
+            phase = phases.get(stats.phase)
+            if phase is None:
+                phase = phases[stats.phase] = ConstructStats(stats.phase)
+            phase.calls += stats.calls
+            phase.total_time += stats.own_time
+            phase.own_time += stats.own_time
+        return phases
+
+    @property
+    def total_time(self) -> float:
+        return sum(stats.own_time for stats in self.constructs.values())
+
+    def as_dict(self) -> Dict[str, Dict]:
+        """
+            Returns the recorded stats as plain dictionaries (suitable for json)
+        """
+        def convert(stats: ConstructStats) -> Dict:
+            return {"phase": stats.phase, "calls": stats.calls,
+                    "total_time": stats.total_time, "own_time": stats.own_time}
+        return {
+            "phases": {name: convert(stats) for name, stats in self.phases.items()},
+            "constructs": {name: convert(stats) for name, stats in self.constructs.items()},
+        }
+
+    def report(self, limit: Optional[int] = 20) -> str:
+        """
+            A human-readable table of the phases & the constructs with the most own time
+        """
+        lines = [f"{'phase':<40} {'calls':>10} {'own ms':>10}"]
+        phases = self.phases
+        for name in PHASES:
+            if name in phases:
+                lines.append(f"{name:<40} {phases[name].calls:>10} {phases[name].own_time * 1000:>10.2f}")
+
+        lines.append("")
+        lines.append(f"{'construct':<40} {'calls':>10} {'own ms':>10} {'total ms':>10}")
+        constructs = sorted(self.constructs.items(), key=lambda item: item[1].own_time, reverse=True)
+        for name, stats in constructs[:limit]:
+            lines.append(f"{name:<40} {stats.calls:>10} {stats.own_time * 1000:>10.2f} "
+                         f"{stats.total_time * 1000:>10.2f}")
+        return "\n".join(lines)
+
+
+"""
+    ================
+    INSTRUMENTATION
+    ================
+"""
+
+
+class _Timer:
+    """
+        Times wrapped calls on one thread, keeping a stack of child times to derive exclusive (own) times, & of phases
+        so regular expressions are attributed to the phase of their caller
+    """
+    def __init__(self, sink):
+        self.sink = sink
+        self.child_times = []  # type: List[float]
+        self.phases = []  # type: List[str]
+        self.depths = {}  # type: Dict[str, int]
+
+    def call(self, construct: str, phase: Optional[str], function: Callable, args: tuple, kwargs: dict):
+        if phase is None:
+            phase = self.phases[-1] if self.phases else "misc"
+        depth = self.depths.get(construct, 0)
+        self.depths[construct] = depth + 1
+        self.child_times.append(0.0)
+        self.phases.append(phase)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases.pop()
+            child_time = self.child_times.pop()
+            self.depths[construct] = depth
+            if self.child_times:
+                self.child_times[-1] += elapsed
+            self.sink.record(construct, phase, elapsed if depth == 0 else 0.0, elapsed - child_time)
+
+
+# The timer of the innermost active block on each thread
+_active = threading.local()
+
+# The number of active blocks, & the functions replaced while any are active
+_lock = threading.Lock()
+_blocks = 0
+_originals = []  # type: List[tuple]
+
+
+def _wrap(construct: str, phase: Optional[str], function: Callable) -> Callable:
+    """
+        Wraps a function to be timed by the calling thread's timer, if it has one. A phase of None is the caller's
+    """
+    @functools.wraps(function)
+    def instrumented(*args, **kwargs):
+        timer = getattr(_active, "timer", None)
+        if timer is None:
+            return function(*args, **kwargs)
+        return timer.call(construct, phase, function, args, kwargs)
+
+    return instrumented
+
+
+class _PatternProxy:
+    """
+        Stands in for a compiled regular expression, timing its matching methods
+    """
+    METHODS = ["match", "fullmatch", "search", "finditer", "findall", "sub", "split"]
+
+    def __init__(self, pattern, name: str):
+        self.__pattern = pattern
+        for method in self.METHODS:
+            setattr(self, method, _wrap(f"{name}.{method}", None, getattr(pattern, method)))
+
+    def __getattr__(self, item):
+        return getattr(self.__pattern, item)
+
+
+def _phase(construct: str) -> str:
+    """
+        Categorises an instrumented class method into a parsing phase
+    """
+    if "validate" in construct or construct.endswith("check_content_complete"):
+        return "validation"
+    if construct.startswith("Document.") and any(part in construct for part in ["xml_declaration", "version",
+                                                                                 "encoding", "standalone"]):
+        return "xml declaration"
+    if construct.startswith("Document.") and "misc" not in construct and construct != "Document.parse":
+        return "dtd"
+    if construct.split(".")[0] in ["Entity", "ElementDeclaration", "AttributeListDeclaration"]:
+        return "dtd"
+    if construct.startswith("Text.") or construct.startswith("Element.parse_text") or "text_block" in construct:
+        return "text"
+    if construct.startswith("Element.") or construct.startswith("LazyElement."):
+        return "tags"
+    return "misc"
+
+
+def _targets() -> List[tuple]:
+    """
+        Returns every (owner, attribute, construct, phase) to instrument
+    """
+    targets = []
+
+    # Class methods
+    classes = [Document, Element, LazyElement, Text, Comment, ProcessingInstruction, Entity, ElementDeclaration,
+               AttributeListDeclaration, AttributeList]
+    for cls in classes:
+        for attribute, value in vars(cls).items():
+            if not callable(value) or isinstance(value, type):
+                continue
+            # Strip name mangling so private methods are reported as e.g. `Document.parse_subset`
+            name = re.sub(f"^_{cls.__name__}__", "", attribute)
+            if name.startswith("parse") or name.startswith("validate") or \
+                    name in ["add_text", "check_wellformedness", "close_current_text_block", "categorise_entity",
+                             "load_initial_entities", "materialise", "check_content_complete"]:
+                construct = f"{cls.__name__}.{name}"
+                targets.append((cls, attribute, construct, _phase(construct)))
+
+    # Helper functions
+    for name in ["parse_reference", "parse_string_literal"]:
+        targets.append((Helpers, name, f"Helpers.{name}", "entity expansion"))
+    for name in ["parse_external_reference", "parse_uri"]:
+        targets.append((Helpers, name, f"Helpers.{name}", "dtd"))
+    targets.append((Helpers, "normalise_newlines", "Helpers.normalise_newlines", "text"))
+
+    return targets
+
+
+def _install():
+    try:
+        for owner, attribute, construct, phase in _targets():
+            _originals.append((owner, attribute, vars(owner)[attribute]))
+            setattr(owner, attribute, _wrap(construct, phase, getattr(owner, attribute)))
+
+        for attribute, value in list(vars(RegEx).items()):
+            if isinstance(value, re.Pattern):
+                _originals.append((RegEx, attribute, value))
+                setattr(RegEx, attribute, _PatternProxy(value, f"RegEx.{attribute}"))
+    except BaseException:
+        _restore()
+        raise
+
+
+def _restore():
+    for owner, attribute, original in reversed(_originals):
+        setattr(owner, attribute, original)
+    _originals.clear()
+
+
+@contextmanager
+def instrument(sink):
+    """
+        Instruments the parser for the duration of the block, reporting every call made on this thread to
+        `sink.record`. All original functions are restored when the last active block exits, even if parsing fails.
+    """
+    global _blocks
+    with _lock:
+        if _blocks == 0:
+            _install()
+        _blocks += 1
+
+    previous = getattr(_active, "timer", None)
+    _active.timer = _Timer(sink)
+    try:
+        yield sink
+    finally:
+        _active.timer = previous
+        with _lock:
+            _blocks -= 1
+            if _blocks == 0:
+                _restore()
@@ -0,0 +1,205 @@
+"""
+    Streams record-oriented documents one record at a time.
+
+    For documents made up of many similar records (e.g. `/feed/entry` or `/rows/row`), `iter_records` yields each
+    element matching a path as soon as it has been parsed, fully built as an `Element`:
+
+        for row in Records.iter_records(xml, "/rows/row"):
+            process(row)
+
+    Yielded records are not kept in their parent's `content` or `children`, so once the caller releases a record only
+    the elements on the path to the next record (& their other content) remain in memory. For pretty-printed files,
+    parse with `ParserOptions(whitespace=ParserOptions.Whitespace.DROP)` so the indentation between records is not kept
+    either. The document's source text is held in memory throughout.
+
+    A path is a series of element names separated by '/', where '*' matches any name. Paths starting with '/' are
+    matched from the root element, & paths starting with '//' are matched at any depth. Names are matched as written,
+    including any prefix. An optional `predicate` is given each matching element once built, & elements it rejects are
+    discarded rather than yielded.
+"""
+from typing import Callable, Dict, Generator, Iterator, List, Optional
+
+import Helpers
+from Options import ParserOptions
+from RegularExpressions import RegEx
+from classes.Document import Document
+from classes.Element import Element
+from classes.Entity import Entity
+from classes.Error import XMLError
+
+
+class RecordPath:
+    """
+        A path to the records within a document. See the module docstring for the syntax.
+    """
+    def __init__(self, path: str):
+        if path.startswith("//"):
+            self.anywhere = True
+            self.steps = path[2:].split("/")
+        elif path.startswith("/"):
+            self.anywhere = False
+            self.steps = path[1:].split("/")
+        else:
+            raise ValueError(f"Record path '{path}' must start with '/' or '//'")
+
+        if not all(self.steps):
+            raise ValueError(f"Record path '{path}' contains an empty step")
+
+    def matches(self, names: List[str]) -> bool:
+        """
+            Whether an element is a record, given the names of the elements from the root element down to it
+        """
+        if len(names) < len(self.steps) or (not self.anywhere and len(names) != len(self.steps)):
+            return False
+        return all(step == "*" or step == name for step, name in zip(self.steps, names[-len(self.steps):]))
+
+    def may_contain(self, names: List[str]) -> bool:
+        """
+            Whether records may be found within an element, given the names of the elements from the root element down
+            to it
+        """
+        if self.anywhere:
+            return True
+        if len(names) >= len(self.steps):
+            return False
+        return all(step == "*" or step == name for step, name in zip(self.steps, names))
+
+
+def iter_records(xml: str,
+                 path: str,
+                 predicate: Optional[Callable[[Element], bool]] = None,
+                 options: Optional[ParserOptions] = None) -> Iterator[Element]:
+    """
+        Parses the given xml, yielding each element matching `path` (& accepted by `predicate`) as soon as it is built
+    :param xml:
+    :param path: The path to the records (see `RecordPath`)
+    :param predicate: An optional filter, given each matching element
+    :param options: The options to parse with (see `ParserOptions`). Records are never built lazily
+    :return:
+    """
+    # Check the path now, rather than when the first record is requested
+    return __iter_records(xml, RecordPath(path), predicate, options)
+
+
+def iter_records_file(file_path: str,
+                      path: str,
+                      predicate: Optional[Callable[[Element], bool]] = None,
+                      options: Optional[ParserOptions] = None) -> Iterator[Element]:
+    """
+        A convenience function to stream the records from the xml file at the given path. See `iter_records`
+    """
+    with open(file_path) as file:
+        xml = file.read()
+    return iter_records(xml, path, predicate, options)
+
+
+def __iter_records(xml: str,
+                   record_path: RecordPath,
+                   predicate: Optional[Callable[[Element], bool]],
+                   options: Optional[ParserOptions]) -> Iterator[Element]:
+    document = Document(xml, options)
+    try:
+        remaining_xml = document.parse_prolog()
+
+        document.root = Element(remaining_xml, document.options)
+        document.root.document = document
+        names = [__element_name(remaining_xml)]
+
+        # The whole document may be a single record
+        if record_path.matches(names):
+            remaining_xml = document.root.parse_to_end(document.general_entities)
+            if predicate is None or predicate(document.root):
+                yield document.root
+        else:
+            remaining_xml = yield from __stream(document.root, remaining_xml, names, record_path, predicate,
+                                                document.general_entities)
+
+        document.parse_epilog(remaining_xml)
+    except XMLError as error:
+        error.locate(xml)
+        raise
+
+
+def __stream(element: Element,
+             xml: str,
+             names: List[str],
+             record_path: RecordPath,
+             predicate: Optional[Callable[[Element], bool]],
+             general_entities: Dict[str, Entity]) -> Generator[Element, None, str]:
+    """
+        Parses an element which may contain records, yielding the records within it instead of adding them to its
+        content. Returns the xml after the element's end-tag.
+    """
+    xml = element.parse_opening_tag(xml, general_entities)
+    if element.is_self_closing:
+        return xml
+
+    xml = yield from __stream_content(element, xml, names, record_path, predicate, general_entities, [])
+    element.sort_content()
+    return element.parse_end_tag(xml)
+
+
+def __stream_content(element: Element,
+                     xml: str,
+                     names: List[str],
+                     record_path: RecordPath,
+                     predicate: Optional[Callable[[Element], bool]],
+                     general_entities: Dict[str, Entity],
+                     seen_entities: List[str]) -> Generator[Element, None, str]:
+    """
+        Parses the content of an element from the given xml (either the document or an entity's replacement text),
+        yielding the records within it. Returns the xml from the element's end-tag, or "" at the end of replacement
+        text.
+    """
+    while True:
+        # Parse content up to the next child element, or entity reference which may contain one
+        xml = element.parse_xml_block(xml, general_entities, seen_entities, stop_at_child=True)
+
+        # Replacement text is streamed in turn, so records within entities are yielded too
+        if xml[:1] == "&":
+            reference = xml[:xml.find(";") + 1]
+            expansion_text = Helpers.parse_reference(reference, general_entities=general_entities,
+                                                     expand_parameter_entities=False)
+            try:
+                unparsed_xml = yield from __stream_content(element, expansion_text, names, record_path, predicate,
+                                                           general_entities, seen_entities + [reference])
+            except XMLError as error:
+                # The replacement text is not part of the document, so report errors at the reference
+                error.relocate(xml)
+                raise
+            if len(unparsed_xml) > 0:
+                raise XMLError(f"Ill-formed expansion text for entity {reference}", source=xml)
+            xml = xml[len(reference):]
+            continue
+
+        if xml[:1] != "<" or xml[:2] == "</":
+            return xml
+
+        child = Element(xml, element.options)
+        child.parent = element
+        child.document = element.document
+        child.in_replacement_text = element.in_replacement_text or len(seen_entities) > 0
+        child_names = names + [__element_name(xml)]
+        child_xml = xml
+
+        if record_path.matches(child_names):
+            xml = child.parse_to_end(general_entities)
+            element.validate_child(child, child_xml)
+            if predicate is None or predicate(child):
+                yield child
+        elif record_path.may_contain(child_names):
+            xml = yield from __stream(child, xml, child_names, record_path, predicate, general_entities)
+            element.validate_child(child, child_xml)
+            element.add_content(child)
+        else:
+            xml = child.parse_to_end(general_entities)
+            element.validate_child(child, child_xml)
+            element.add_content(child)
+
+
+def __element_name(xml: str) -> str:
+    """
+        The name of the element whose start-tag begins the given xml, without parsing the start-tag
+    """
+    name = RegEx.StartTag_Name.match(xml, 1)
+    return name.group() if name else ""
@@ -27,6 +27,8 @@ class RegEx:
     namestartchar = '(?:[A-Z]|:|_|[a-z]|[\u00C0-\u00D6]|[\u00D8-\u00F6]|[\u00F8-\u02FF]|[\u0370-\u037D]|[\u037F-\u1FFF]|[\u200C-\u200D]|[\u2070-\u218F]|[\u2C00-\u2FEF]|[\u3001-\uD7FF]|[\uF900-\uFDCF]|[\uFDF0-\uFFFD]|[\U00010000-\U000EFFFF])'
     namechar = f'(?:{namestartchar})|-|\\.|[0-9]|\u00B7|[\u0300-\u036F]|[\u203F-\u2040]'
     name = f"(?!{xml})(?:{namestartchar})(?:{namechar})*"  # Names must start with a StartChar and follow with allowed NameChars and cannot start with xml
+    unreserved_name = f"(?:{namestartchar})(?:{namechar})*"
+    reserved_attribute_name = f"xmlns(?::{unreserved_name})?|xml:{unreserved_name}"  # Attributes defined by the specs
     nmtoken = f"(?:{namechar})+"  # Name Tokens can start with any allowed NameChar
     nmtokens = f"(?:{nmtoken})(?:\u0020{nmtoken})*"  # A series of Name Tokens separated by spaces
 
@@ -46,6 +48,12 @@ class RegEx:
     DTD_NameEnd = re.compile(f"(?:(?:(?:{whitespace})?>)|(?:(?:{whitespace})?\\[)|{whitespace})")
     ProcessingInstruction_TargetEnd = re.compile(f"(?:({whitespace})|\\?>)")
     Eq = re.compile(eq)
+    NotationDeclaration = re.compile(f"<!NOTATION{whitespace}([^\u0020\u0009\u000D\u000A>]+){whitespace}"
+                                     f"(?:SYSTEM{whitespace}(\"[^\"]*\"|'[^']*')|PUBLIC{whitespace}(\"[^\"]*\"|'[^']*')"
+                                     f"(?:{whitespace}(\"[^\"]*\"|'[^']*'))?)(?:{whitespace})?>")
+    PubidLiteral = re.compile("[\u0020\u000D\u000Aa-zA-Z0-9\\-'()+,./:=?;!*#@$_%]*")
+    AttributeType = re.compile("CDATA|ID(?:REFS?)?|ENTIT(?:Y|IES)|NMTOKENS?|NOTATION")
+    ContentModel_Name = re.compile("[^\u0020\u0009\u000D\u000A|,()?*+>]+")
 
     Char = re.compile(char)
     CharSequence = re.compile(charsequence)
@@ -53,5 +61,33 @@ class RegEx:
     NameStartChar = re.compile(namestartchar)
     NameChar = re.compile(namechar)
     Name = re.compile(name)
+    ReservedAttributeName = re.compile(reserved_attribute_name)
+    Nmtoken = re.compile(nmtoken)
 
     Reference = re.compile(__Reference)
+
+    # Start-tag tokenizing (see Element.parse_opening_tag). Each is matched anchored at a position within the tag
+    StartTag_Name = re.compile("[^\u0020\u0009\u000D\u000A/>]+")
+    StartTag_AttributeName = re.compile("[^\u0020\u0009\u000D\u000A=/>]+")
+    StartTag_Attribute = re.compile("[\u0020\u0009\u000D\u000A]+([^\u0020\u0009\u000D\u000A=/>]+)"
+                                    "[\u0020\u0009\u000D\u000A]*=[\u0020\u0009\u000D\u000A]*"
+                                    "(?:\"([^\"]*)\"|'([^']*)')")
+    StartTag_End = re.compile("[\u0020\u0009\u000D\u000A]*(/?>)")
+    EndTag_End = re.compile("[\u0020\u0009\u000D\u000A]*>")
+
+    # Structural scanning (see Scanner.py). Tags are matched loosely, skipping quoted attribute values
+    Scanner_StartTag = re.compile("<([^\u0020\u0009\u000D\u000A/>]+)[^>\"']*(?:(?:\"[^\"]*\"|'[^']*')[^>\"']*)*>")
+    Scanner_EndTag = re.compile(f"</([^\u0020\u0009\u000D\u000A>]+)(?:{whitespace})?>")
+
+    # Event parsing (see Events.py). The start of the next piece of markup or reference within content
+    Events_Markup = re.compile("[<&]")
+
+    # XPath tokenizing (see XPath.py). Names are matched loosely, up to the next delimiter, with an optional prefix
+    XPath_Token = re.compile("[\u0020\u0009\u000D\u000A]*(?:"
+                             "(?P<number>[0-9]+(?:\\.[0-9]*)?|\\.[0-9]+)|"
+                             "(?P<literal>\"[^\"]*\"|'[^']*')|"
+                             "(?P<operator>//|::|\\.\\.|!=|<=|>=|[/.@\\[\\](),|=<>*])|"
+                             "(?P<name>[^\u0020\u0009\u000D\u000A0-9.\\-/@\\[\\](),|=!<>*:'\"]"
+                             "[^\u0020\u0009\u000D\u000A/@\\[\\](),|=!<>*:'\"]*"
+                             "(?::[^\u0020\u0009\u000D\u000A0-9.\\-/@\\[\\](),|=!<>*:'\"]"
+                             "[^\u0020\u0009\u000D\u000A/@\\[\\](),|=!<>*:'\"]*)?))")
@@ -0,0 +1,185 @@
+"""
+    A fast structural scanner for xml elements.
+
+    The scanner finds the extent of an element and of every element nested within it without building any xml objects.
+    It jumps from one '<' to the next, skipping comments, processing instructions, CDATA sections and quoted attribute
+    values, and checks only that every construct is terminated and that start & end tags are correctly nested.
+    Everything else (names, characters, attributes, entity references) is left to the full parser.
+"""
+import sys
+from array import array
+from typing import Iterator, List
+
+from RegularExpressions import RegEx
+from classes.Error import XMLError
+
+
+class ElementSpans:
+    """
+        The extents of the elements within a scanned block of xml, in document order (so element 0 is the scanned
+        element itself).
+
+        Attributes:
+            names   The name of each element
+            starts  The offset of each element's start-tag ('<')
+            ends    The offset immediately after each element's end-tag (or self-closing start-tag)
+            sizes   The number of descendants of each element, so element i's descendants are i+1 ... i+sizes[i]
+    """
+    def __init__(self):
+        self.names = []  # type: List[str]
+        self.starts = array("q")
+        self.ends = array("q")
+        self.sizes = array("q")
+
+    def __len__(self):
+        return len(self.names)
+
+    def children(self, index: int) -> Iterator[int]:
+        """
+            Iterates through the indices of the direct children of the element at the given index
+        """
+        child = index + 1
+        last = index + self.sizes[index]
+        while child <= last:
+            yield child
+            child += self.sizes[child] + 1
+
+
+def scan_element(xml: str, position: int = 0) -> ElementSpans:
+    """
+        Scans the element whose start-tag begins at `xml[position]` through to its end-tag.
+        Offsets in the returned spans are relative to the start of `xml`.
+    """
+    spans = ElementSpans()
+    names, starts, ends, sizes = spans.names, spans.starts, spans.ends, spans.sizes
+    open_elements = []  # type: List[int]
+
+    # The scanned xml must begin with an element, not a declaration, CDATA section or processing instruction
+    if not (RegEx.Scanner_StartTag.match(xml, position) and RegEx.NameStartChar.match(xml, position + 1)):
+        raise XMLError("Unable to find start-tag of element", source=xml, position=position)
+
+    index = position
+    while True:
+        index = xml.find("<", index)
+        if index == -1:
+            unclosed = open_elements[-1]
+            raise XMLError(f"Unable to find end-tag for element '{names[unclosed]}'",
+                           source=xml, position=starts[unclosed])
+
+        # End tags close the most recently opened element
+        if xml.startswith("</", index):
+            end_tag = RegEx.Scanner_EndTag.match(xml, index)
+            if not end_tag:
+                raise XMLError("Unable to find end of end-tag", source=xml, position=index)
+
+            element = open_elements.pop()
+            if end_tag.group(1) != names[element]:
+                raise XMLError(f"Mismatched start ('{names[element]}') and end ('{end_tag.group(1)}') tags for "
+                               f"element", source=xml, position=starts[element])
+
+            ends[element] = end_tag.end()
+            sizes[element] = len(names) - element - 1
+            if not open_elements:
+                return spans
+            index = end_tag.end()
+
+        # Comments
+        elif xml.startswith("<!--", index):
+            end_index = xml.find("-->", index + 4)
+            if end_index == -1:
+                raise XMLError("Unable to find end of comment", source=xml, position=index)
+            index = end_index + 3
+
+        # CDATA sections
+        elif xml.startswith("<![CDATA[", index):
+            end_index = xml.find("]]>", index + 9)
+            if end_index == -1:
+                raise XMLError("Unable to find end of CDATA section", source=xml, position=index)
+            index = end_index + 3
+
+        # Processing instructions
+        elif xml.startswith("<?", index):
+            end_index = xml.find("?>", index + 2)
+            if end_index == -1:
+                raise XMLError("Unable to find end of processing instruction", source=xml, position=index)
+            index = end_index + 2
+
+        # Start tags
+        else:
+            start_tag = RegEx.Scanner_StartTag.match(xml, index)
+            if not start_tag:
+                raise XMLError("Unable to find end of start-tag for element", source=xml, position=index)
+
+            names.append(sys.intern(start_tag.group(1)))
+            starts.append(index)
+            ends.append(start_tag.end())
+            sizes.append(0)
+
+            # Self-closing elements are complete already
+            if xml[start_tag.end() - 2] != "/":
+                open_elements.append(len(names) - 1)
+            elif not open_elements:
+                return spans
+            index = start_tag.end()
+
+
+def find_split_points(xml: str, position: int, chunk_size: int) -> List[int]:
+    """
+        Finds points between the children of an element at which its content can be split into pieces of about
+        `chunk_size` characters, each holding whole children (see `Parallel`).
+    :param xml:
+    :param position: The start of the element's content, immediately after its start-tag
+    :param chunk_size: The minimum length of each piece, except the last
+    :return: The offsets of the split points, starting with `position` & ending with the start of the element's end-tag
+    """
+    split_points = [position]
+    depth = 0
+    index = position
+    while True:
+        index = xml.find("<", index)
+        if index == -1:
+            raise XMLError("Unable to find end-tag for element", source=xml, position=position)
+
+        # End tags. The element's own end-tag ends the content
+        if xml.startswith("</", index):
+            end_tag = RegEx.Scanner_EndTag.match(xml, index)
+            if not end_tag:
+                raise XMLError("Unable to find end of end-tag", source=xml, position=index)
+            if depth == 0:
+                split_points.append(index)
+                return split_points
+            depth -= 1
+            index = end_tag.end()
+
+        # Comments, CDATA sections & processing instructions are skipped whole
+        elif xml.startswith("<!--", index):
+            end_index = xml.find("-->", index + 4)
+            if end_index == -1:
+                raise XMLError("Unable to find end of comment", source=xml, position=index)
+            index = end_index + 3
+            continue
+        elif xml.startswith("<![CDATA[", index):
+            end_index = xml.find("]]>", index + 9)
+            if end_index == -1:
+                raise XMLError("Unable to find end of CDATA section", source=xml, position=index)
+            index = end_index + 3
+            continue
+        elif xml.startswith("<?", index):
+            end_index = xml.find("?>", index + 2)
+            if end_index == -1:
+                raise XMLError("Unable to find end of processing instruction", source=xml, position=index)
+            index = end_index + 2
+            continue
+
+        # Start tags
+        else:
+            start_tag = RegEx.Scanner_StartTag.match(xml, index)
+            if not start_tag:
+                raise XMLError("Unable to find end of start-tag for element", source=xml, position=index)
+            if xml[start_tag.end() - 2] != "/":
+                depth += 1
+            index = start_tag.end()
+
+        # Split after a child element once the current piece is long enough
+        if depth == 0 and index - split_points[-1] >= chunk_size:
+            split_points.append(index)
@@ -0,0 +1,245 @@
+"""
+    An incremental xml writer, for generating documents too large to build as a tree first.
+
+    Markup is written as a series of calls which mirror the xml classes (`start` & `end` for an Element, `text` for Text,
+    `pi` for a ProcessingInstruction), and parsed objects can be written with `write`, so trees & calls can be mixed:
+
+        with open("export.xml", "wb") as file, XMLWriter(file) as writer:
+            writer.start("rows")
+            for row in rows:
+                writer.start("row", {"id": row.id})
+                writer.text(row.value)
+                writer.end("row")
+            writer.write(footer_element)
+            writer.end("rows")
+
+    Output is encoded & written to the binary stream in large chunks. The writer checks that every start-tag is closed
+    by the matching end-tag, that text & attribute values only contain characters allowed in xml (xmlspec::Char), and
+    (unless disabled) that names conform to xmlspec::Name.
+"""
+import codecs
+from typing import BinaryIO, Dict, List, Optional, Union
+
+from RegularExpressions import RegEx
+from classes.Document import Document
+from classes.Element import Element
+from classes.ProcessingInstruction import ProcessingInstruction
+from classes.Text import Text
+
+# Escapes for character data & (double-quoted) attribute values. Whitespace characters are escaped in attribute values
+# so they survive attribute value normalisation, & carriage returns everywhere so they survive line end normalisation
+TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", "\u000d": "&#13;"})
+ATTRIBUTE_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", "\"": "&quot;",
+                                   "\u0009": "&#9;", "\u000a": "&#10;", "\u000d": "&#13;"})
+
+
+class XMLWriter:
+    """
+        Writes xml markup to a binary stream.
+
+        Arguments:
+            stream          The binary stream to write to
+            encoding        The encoding to write in. Characters the encoding cannot represent are written as
+                            character references
+            buffer_size     The number of characters to collect before encoding & writing them to the stream
+            check_names     Whether element, attribute & processing instruction target names are checked against
+                            xmlspec::Name
+    """
+    def __init__(self, stream: BinaryIO, encoding: str = "utf-8", buffer_size: int = 1 << 20,
+                 check_names: bool = True):
+        self.stream = stream
+        self.encoding = encoding  # type: str
+        self.buffer_size = buffer_size  # type: int
+        self.check_names = check_names  # type: bool
+
+        # A single encoder is used for the whole document, so encodings with a byte order mark only write it once
+        self.__encoder = codecs.getincrementalencoder(encoding)("xmlcharrefreplace")
+        self.__buffer = []  # type: List[str]
+        self.__buffered = 0  # type: int
+        self.__written = False  # type: bool
+
+        # The names of the currently open elements, and whether the last start-tag is still waiting for its '>'
+        self.__open_elements = []  # type: List[str]
+        self.__start_tag_open = False  # type: bool
+        self.__root_written = False  # type: bool
+
+    def __enter__(self) -> 'XMLWriter':
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        # Don't mask the original error with a complaint about unclosed elements
+        if exception_type is None:
+            self.close()
+        else:
+            self.flush()
+
+    """
+        =======
+        MARKUP
+        =======
+    """
+
+    def declaration(self, version: str = "1.0", standalone: Optional[bool] = None):
+        """
+            Writes the xml declaration, which must come first
+        """
+        if self.__written:
+            raise ValueError("The xml declaration must be written first")
+        declaration = f"<?xml version=\"{version}\" encoding=\"{self.encoding}\""
+        if standalone is not None:
+            declaration += f" standalone=\"{'yes' if standalone else 'no'}\""
+        self.__write(declaration + "?>\n")
+
+    def start(self, name: str, attributes: Optional[Dict[str, str]] = None):
+        """
+            Writes the start-tag of an element. The tag is left open, so an element ended without any content is
+            written as a self-closing tag
+        """
+        if not self.__open_elements and self.__root_written:
+            raise ValueError(f"Unable to start element '{name}' after the root element")
+        self.__check_name(name, "element name")
+        self.__close_start_tag()
+
+        tag = "<" + name
+        if attributes:
+            for attribute_name, value in attributes.items():
+                self.__check_name(attribute_name, "attribute name", reserved_allowed=True)
+                self.__check_characters(value, f"value of attribute '{attribute_name}'")
+                tag += f" {attribute_name}=\"{value.translate(ATTRIBUTE_ESCAPES)}\""
+        self.__write(tag)
+
+        self.__open_elements.append(name)
+        self.__start_tag_open = True
+        self.__root_written = True
+
+    def end(self, name: Optional[str] = None):
+        """
+            Writes the end-tag of the most recently started element, checking it has the given name if there is one
+        """
+        if not self.__open_elements:
+            raise ValueError(f"Unable to end element '{name}' as no element is open")
+        open_name = self.__open_elements.pop()
+        if name is not None and name != open_name:
+            raise ValueError(f"Unable to end element '{name}' as the open element is '{open_name}'")
+
+        if self.__start_tag_open:
+            self.__start_tag_open = False
+            self.__write("/>")
+        else:
+            self.__write(f"</{open_name}>")
+
+    def text(self, text: str):
+        """
+            Writes character data within the current element
+        """
+        if not self.__open_elements:
+            raise ValueError("Text must be written within an element")
+        if text:
+            self.__check_characters(text, "text")
+            self.__close_start_tag()
+            self.__write(text.translate(TEXT_ESCAPES))
+
+    def pi(self, target: str, data: Optional[str] = None):
+        """
+            Writes a processing instruction
+        """
+        self.__check_name(target, "processing instruction target")
+        if data is not None and "?>" in data:
+            raise ValueError("Processing instruction data may not contain '?>'")
+        self.__close_start_tag()
+        self.__write(f"<?{target} {data}?>" if data else f"<?{target}?>")
+
+    def comment(self, text: str):
+        """
+            Writes a comment
+        """
+        if "--" in text or text.endswith("-"):
+            raise ValueError("Comments may not contain '--' or end with '-'")
+        self.__close_start_tag()
+        self.__write(f"<!--{text}-->")
+
+    def write(self, markup: Union[Document, Element, Text, ProcessingInstruction]):
+        """
+            Writes a parsed document, element (including all its content), text or processing instruction
+        """
+        if isinstance(markup, Document):
+            epilog_start = markup.epilog_start
+            if epilog_start is None:
+                epilog_start = len(markup.processing_instructions)
+            for processing_instruction in markup.processing_instructions[:epilog_start]:
+                self.write(processing_instruction)
+            self.write(markup.root)
+            for processing_instruction in markup.processing_instructions[epilog_start:]:
+                self.write(processing_instruction)
+        elif isinstance(markup, Element):
+            self.__write_element(markup)
+        elif isinstance(markup, Text):
+            self.text(markup.text)
+        elif isinstance(markup, ProcessingInstruction):
+            self.pi(markup.target, markup.data)
+        else:
+            raise TypeError(f"Unable to write object of type '{type(markup).__name__}'")
+
+    def __write_element(self, element: Element):
+        # Elements are written without recursion, so deeply nested trees don't reach the recursion limit
+        stack = [iter([element])]
+        while stack:
+            markup = next(stack[-1], None)
+            if markup is None:
+                stack.pop()
+                if stack:
+                    self.end()
+            elif isinstance(markup, Element):
+                self.start(markup.name, markup.attributes)
+                stack.append(iter(markup.content))
+            else:
+                self.write(markup)
+
+    """
+        ==========
+        BUFFERING
+        ==========
+    """
+
+    def flush(self):
+        """
+            Encodes & writes all buffered output to the stream
+        """
+        if self.__buffer:
+            self.stream.write(self.__encoder.encode("".join(self.__buffer)))
+            self.__buffer = []
+            self.__buffered = 0
+
+    def close(self):
+        """
+            Flushes all output, ensuring the document is complete. Does not close the stream
+        """
+        if self.__open_elements:
+            raise ValueError(f"Unable to close writer with unclosed element '{self.__open_elements[-1]}'")
+        if not self.__root_written:
+            raise ValueError("Unable to close writer before a root element is written")
+        self.flush()
+        self.stream.write(self.__encoder.encode("", final=True))
+
+    def __write(self, xml: str):
+        self.__written = True
+        self.__buffer.append(xml)
+        self.__buffered += len(xml)
+        if self.__buffered >= self.buffer_size:
+            self.flush()
+
+    def __close_start_tag(self):
+        if self.__start_tag_open:
+            self.__start_tag_open = False
+            self.__write(">")
+
+    def __check_name(self, name: str, where: str, reserved_allowed: bool = False):
+        if not self.check_names or RegEx.Name.fullmatch(name):
+            return
+        if not (reserved_allowed and RegEx.ReservedAttributeName.fullmatch(name)):
+            raise ValueError(f"Invalid {where} '{name}'")
+
+    @staticmethod
+    def __check_characters(value: str, where: str):
+        if not RegEx.CharSequence.fullmatch(value):
+            raise ValueError(f"Invalid character in {where}")
@@ -0,0 +1,751 @@
+"""
+    Selects nodes from parsed documents with a subset of XPath 1.0.
+
+        rows = XPath.select(document, "/rows/row[@type='a'][2]")
+        names = XPath.select(document.root, "//person[age > 30]/name/text()")
+        total = XPath.evaluate(document, "count(//row)")
+
+    The subset supported is:
+        Axes        child (the default), descendant, descendant-or-self, self, parent & attribute, with the
+                    abbreviations '//', '.', '..' & '@'
+        Node tests  Names (matched as written, including any prefix), '*', text(), processing-instruction() & node()
+        Predicates  Positions ([2], [last()], [position() < 3]) & conditions built from paths, string & number literals,
+                    the comparisons = != < <= > >=, `and`, `or`, & the functions last(), position(), count(), not(),
+                    true(), false(), string(), string-length(), normalize-space(), contains(), starts-with(), name() &
+                    id()
+        Unions      path | path
+
+    `select` returns the matching elements, `Text` objects & processing instructions in document order, with attributes
+    given as their values. `evaluate` also accepts expressions of other types, returning a float, string or bool.
+
+    Expressions are compiled once & kept in an LRU cache (see `compile`), so repeated queries only pay for evaluation.
+    Evaluation uses the numbering of nodes in document order (see `Element.order`) to sort results & to find
+    descendants, the document's name index (see `Document.elements_by_name`, not used for lazily built documents) so
+    `//name` finds elements without visiting the rest of the tree, & the IDs of the document's elements (see
+    `Document.ids`) for id().
+"""
+import functools
+import math
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from RegularExpressions import RegEx
+from classes.Document import Document
+from classes.Element import Element
+from classes.LazyElement import LazyElement
+from classes.ProcessingInstruction import ProcessingInstruction
+from classes.Text import Text
+
+# Axes
+CHILD = "child"
+DESCENDANT = "descendant"
+DESCENDANT_OR_SELF = "descendant-or-self"
+SELF = "self"
+PARENT = "parent"
+ATTRIBUTE = "attribute"
+AXES = [CHILD, DESCENDANT, DESCENDANT_OR_SELF, SELF, PARENT, ATTRIBUTE]
+
+# Node tests: an element or attribute name, any name ('*'), or a node type
+NAME = "name"
+ANY = "*"
+NODE_TYPES = ["text", "processing-instruction", "node"]
+
+# The number of arguments each function takes, as (minimum, maximum)
+FUNCTIONS = {
+    "last": (0, 0), "position": (0, 0), "count": (1, 1), "not": (1, 1), "true": (0, 0), "false": (0, 0),
+    "string": (0, 1), "string-length": (0, 1), "normalize-space": (0, 1), "contains": (2, 2), "starts-with": (2, 2),
+    "name": (0, 1), "id": (1, 1),
+}
+COMPARISONS = ["=", "!=", "<", "<=", ">", ">="]
+
+# Nodes are elements, text, processing instructions, documents (the parent of the root element) & attributes, which
+# are represented by (element, attribute name) pairs
+Node = Union[Document, Element, Text, ProcessingInstruction, Tuple[Element, str]]
+
+
+class XPath:
+    """
+        A compiled XPath expression. See the module docstring for the subset supported.
+
+        Expressions are compiled into trees of tuples, whose first item is the kind of expression:
+            ("path", absolute, start, steps)    A location path. `start` is an expression giving the nodes the path
+                                                starts from (e.g. `id('a')/b`), or None
+            ("literal", value)                  A string or number
+            ("call", name, arguments)           A function call
+            ("or" | "and", left, right)
+            ("compare", operator, left, right)
+            ("union", left, right)
+            ("filter", expression, predicates)  A node-set filtered by predicates (e.g. `(//a)[2]`)
+        Each step of a path is a tuple of (axis, node test, name, predicates).
+    """
+    def __init__(self, expression: str):
+        self.expression = expression  # type: str
+        self.__tokens = self.__tokenize(expression)
+        self.__position = 0
+        self.__tree = self.__parse_expression()
+        if self.__position < len(self.__tokens):
+            self.__error("Unexpected")
+
+    def select(self, context: Union[Document, Element]) -> List[Union[Element, Text, ProcessingInstruction, str]]:
+        """
+            Selects the nodes the expression matches from the given document or element, in document order
+        """
+        self.__check_context(context)
+        nodes = self.__evaluate(self.__tree, context, 1, 1)
+        if not isinstance(nodes, list):
+            raise ValueError(f"XPath expression '{self.expression}' does not select nodes")
+        return [node[0].attributes[node[1]] if type(node) is tuple else node for node in nodes]
+
+    def evaluate(self, context: Union[Document, Element]) -> Any:
+        """
+            Evaluates the expression from the given document or element. Nodes are returned as by `select`
+        """
+        if self.__tree[0] in ["path", "union", "filter"]:
+            return self.select(context)
+        self.__check_context(context)
+        return self.__evaluate(self.__tree, context, 1, 1)
+
+    @staticmethod
+    def __check_context(context: Union[Document, Element]):
+        """
+            Trees sharing subtrees have no document order, & shared elements have no parent
+            (see `ParserOptions.share_subtrees`)
+        """
+        if context.options.share_subtrees:
+            raise ValueError("XPath expressions can't be evaluated in trees sharing subtrees")
+
+    """
+        ========
+        PARSING
+        ========
+        Expressions are tokenized up front, then parsed by recursive descent, one function per level of precedence.
+    """
+
+    def __tokenize(self, expression: str) -> List[Tuple[str, str, int]]:
+        tokens = []
+        position = 0
+        while position < len(expression):
+            token = RegEx.XPath_Token.match(expression, position)
+            if not token:
+                if not expression[position:].strip():
+                    break
+                raise ValueError(f"Invalid character in XPath expression '{expression}' at position {position}")
+            tokens.append((token.lastgroup, token.group(token.lastgroup), token.start(token.lastgroup)))
+            position = token.end()
+        return tokens
+
+    def __peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        """
+            The kind & value of the token at the given offset from the current one
+        """
+        if self.__position + offset < len(self.__tokens):
+            kind, value, _ = self.__tokens[self.__position + offset]
+            return kind, value
+        return None, None
+
+    def __next(self) -> str:
+        self.__position += 1
+        return self.__tokens[self.__position - 1][1]
+
+    def __expect(self, value: str):
+        if self.__peek() != ("operator", value):
+            self.__error(f"Expected '{value}' instead of")
+        self.__position += 1
+
+    def __error(self, message: str):
+        if self.__position < len(self.__tokens):
+            _, value, position = self.__tokens[self.__position]
+            raise ValueError(f"{message} '{value}' in XPath expression '{self.expression}' at position {position}")
+        raise ValueError(f"Unexpected end of XPath expression '{self.expression}'")
+
+    def __parse_expression(self) -> tuple:
+        left = self.__parse_and()
+        while self.__peek() == ("name", "or"):
+            self.__position += 1
+            left = ("or", left, self.__parse_and())
+        return left
+
+    def __parse_and(self) -> tuple:
+        left = self.__parse_comparison()
+        while self.__peek() == ("name", "and"):
+            self.__position += 1
+            left = ("and", left, self.__parse_comparison())
+        return left
+
+    def __parse_comparison(self) -> tuple:
+        left = self.__parse_union()
+        while self.__peek()[0] == "operator" and self.__peek()[1] in COMPARISONS:
+            operator = self.__next()
+            left = ("compare", operator, left, self.__parse_union())
+        return left
+
+    def __parse_union(self) -> tuple:
+        left = self.__parse_path()
+        while self.__peek() == ("operator", "|"):
+            self.__position += 1
+            left = ("union", left, self.__parse_path())
+        return left
+
+    def __parse_path(self) -> tuple:
+        kind, value = self.__peek()
+
+        # Literals & function calls may start a path, or be values in their own right
+        start = None
+        if kind in ["number", "literal"]:
+            self.__position += 1
+            return "literal", float(value) if kind == "number" else value[1:-1]
+        if kind == "operator" and value == "(":
+            self.__position += 1
+            start = self.__parse_expression()
+            self.__expect(")")
+        elif kind == "name" and self.__peek(1) == ("operator", "(") and value not in NODE_TYPES:
+            start = self.__parse_call()
+        if start is not None:
+            predicates = self.__parse_predicates()
+            if predicates:
+                start = "filter", start, predicates
+            if self.__peek() not in [("operator", "/"), ("operator", "//")]:
+                return start
+            return "path", False, start, self.__parse_steps()
+
+        # Absolute paths, including the document itself ('/')
+        if kind == "operator" and value in ["/", "//"]:
+            if value == "/" and not self.__starts_step(1):
+                self.__position += 1
+                return "path", True, None, ()
+            return "path", True, None, self.__parse_steps()
+
+        if not self.__starts_step():
+            self.__error("Unexpected")
+        return "path", False, None, self.__parse_steps(relative=True)
+
+    def __parse_call(self) -> tuple:
+        name = self.__next()
+        if name not in FUNCTIONS:
+            self.__position -= 1
+            self.__error("Unknown function")
+        self.__expect("(")
+
+        arguments = []
+        if self.__peek() != ("operator", ")"):
+            arguments.append(self.__parse_expression())
+            while self.__peek() == ("operator", ","):
+                self.__position += 1
+                arguments.append(self.__parse_expression())
+        self.__expect(")")
+
+        minimum, maximum = FUNCTIONS[name]
+        if not minimum <= len(arguments) <= maximum:
+            raise ValueError(f"Wrong number of arguments to {name}() in XPath expression '{self.expression}'")
+        return "call", name, tuple(arguments)
+
+    def __starts_step(self, offset: int = 0) -> bool:
+        kind, value = self.__peek(offset)
+        return kind == "name" or (kind == "operator" and value in [".", "..", "@", "*"])
+
+    def __parse_steps(self, relative: bool = False) -> tuple:
+        """
+            Parses the steps of a location path, from its first '/' or '//' unless it is `relative`
+        """
+        steps = []
+        if relative:
+            steps.append(self.__parse_step())
+        while self.__peek() in [("operator", "/"), ("operator", "//")]:
+            if self.__next() == "//":
+                steps.append((DESCENDANT_OR_SELF, "node", None, ()))
+            steps.append(self.__parse_step())
+        return self.__optimise(steps)
+
+    def __parse_step(self) -> tuple:
+        kind, value = self.__peek()
+        if kind == "operator" and value in [".", ".."]:
+            self.__position += 1
+            return SELF if value == "." else PARENT, "node", None, ()
+
+        # The axis
+        axis = CHILD
+        if kind == "operator" and value == "@":
+            self.__position += 1
+            axis = ATTRIBUTE
+        elif kind == "name" and self.__peek(1) == ("operator", "::"):
+            if value not in AXES:
+                self.__error("Unsupported axis")
+            axis = self.__next()
+            self.__position += 1
+
+        # The node test
+        kind, value = self.__peek()
+        if kind == "operator" and value == "*":
+            self.__position += 1
+            test, name = ANY, None
+        elif kind == "name" and value in NODE_TYPES and self.__peek(1) == ("operator", "("):
+            self.__position += 1
+            self.__expect("(")
+            self.__expect(")")
+            test, name = value, None
+        elif kind == "name":
+            test, name = NAME, self.__next()
+        else:
+            self.__error("Expected a name or node test instead of")
+
+        return axis, test, name, self.__parse_predicates()
+
+    def __parse_predicates(self) -> tuple:
+        predicates = []
+        while self.__peek() == ("operator", "["):
+            self.__position += 1
+            predicates.append(self.__parse_expression())
+            self.__expect("]")
+        return tuple(predicates)
+
+    def __optimise(self, steps: List[tuple]) -> tuple:
+        """
+            Replaces each '//name' (a descendant-or-self::node() step followed by a child step) with a single
+            descendant step, unless the child step's predicates depend on its position among its siblings
+        """
+        optimised = []
+        for step in steps:
+            if optimised and optimised[-1] == (DESCENDANT_OR_SELF, "node", None, ()) and step[0] == CHILD and \
+                    not any(self.__is_positional(predicate) for predicate in step[3]):
+                optimised[-1] = (DESCENDANT,) + step[1:]
+            else:
+                optimised.append(step)
+        return tuple(optimised)
+
+    def __is_positional(self, expression: tuple) -> bool:
+        """
+            Whether a predicate may select by position: if its value may be a number, or it uses the context position
+            or size
+        """
+        if expression[0] == "literal":
+            return not isinstance(expression[1], str)
+        if expression[0] == "call":
+            return expression[1] in ["last", "position", "count", "string-length"] or \
+                any(self.__uses_position(argument) for argument in expression[2])
+        return self.__uses_position(expression)
+
+    def __uses_position(self, expression: tuple) -> bool:
+        kind = expression[0]
+        if kind == "call":
+            return expression[1] in ["last", "position"] or \
+                any(self.__uses_position(argument) for argument in expression[2])
+        if kind == "filter":
+            return self.__uses_position(expression[1])
+        if kind in ["or", "and", "union"]:
+            return self.__uses_position(expression[1]) or self.__uses_position(expression[2])
+        if kind == "compare":
+            return self.__uses_position(expression[2]) or self.__uses_position(expression[3])
+        # The predicates within paths have their own context
+        return kind == "path" and expression[2] is not None and self.__uses_position(expression[2])
+
+    """
+        ===========
+        EVALUATION
+        ===========
+        Node-sets are lists of nodes in document order. Each step of a path is applied to each node in turn, & the
+        results are merged back into document order by their numbers (see `Element.order`).
+    """
+
+    def __evaluate(self, expression: tuple, node: Node, position: int, size: int) -> Any:
+        kind = expression[0]
+        if kind == "path":
+            return self.__select_path(expression, node)
+        if kind == "literal":
+            return expression[1]
+        if kind == "call":
+            return self.__call(expression[1], expression[2], node, position, size)
+        if kind == "or":
+            return self.__boolean(self.__evaluate(expression[1], node, position, size)) or \
+                self.__boolean(self.__evaluate(expression[2], node, position, size))
+        if kind == "and":
+            return self.__boolean(self.__evaluate(expression[1], node, position, size)) and \
+                self.__boolean(self.__evaluate(expression[2], node, position, size))
+        if kind == "compare":
+            return self.__compare(expression[1], self.__evaluate(expression[2], node, position, size),
+                                  self.__evaluate(expression[3], node, position, size))
+        if kind == "filter":
+            nodes = self.__evaluate(expression[1], node, position, size)
+            if not isinstance(nodes, list):
+                raise ValueError(f"Only node-sets can be filtered in XPath expression '{self.expression}'")
+            return self.__filter(nodes, expression[2])
+
+        left = self.__evaluate(expression[1], node, position, size)
+        right = self.__evaluate(expression[2], node, position, size)
+        if not isinstance(left, list) or not isinstance(right, list):
+            raise ValueError(f"Only node-sets can be combined with '|' in XPath expression '{self.expression}'")
+        return self.__document_order(left + right)
+
+    def __select_path(self, path: tuple, node: Node) -> List[Node]:
+        _, absolute, start, steps = path
+        if start is not None:
+            nodes = self.__evaluate(start, node, 1, 1)
+            if not isinstance(nodes, list):
+                raise ValueError(f"Paths can only start from node-sets in XPath expression '{self.expression}'")
+        elif absolute:
+            nodes = [self.__document_of(node)]
+        else:
+            nodes = [node]
+
+        for step in steps:
+            selected = []
+            for context in nodes:
+                selected.extend(self.__select_step(step, context))
+            # The nodes selected from a single node are already in document order
+            nodes = selected if len(nodes) <= 1 else self.__document_order(selected)
+        return nodes
+
+    def __select_step(self, step: tuple, node: Node) -> List[Node]:
+        axis, test, name, predicates = step
+        return self.__filter(self.__select_axis(axis, test, name, node), predicates)
+
+    def __filter(self, nodes: List[Node], predicates: tuple) -> List[Node]:
+        for predicate in predicates:
+            # Shortcuts for the common positions
+            if predicate[0] == "literal" and not isinstance(predicate[1], str):
+                index = predicate[1]
+                nodes = nodes[int(index) - 1:int(index)] if index >= 1 and index == int(index) else []
+                continue
+            if predicate == ("call", "last", ()):
+                nodes = nodes[-1:]
+                continue
+
+            size = len(nodes)
+            selected = []
+            for position, candidate in enumerate(nodes, 1):
+                value = self.__evaluate(predicate, candidate, position, size)
+                if value == position if type(value) is float else self.__boolean(value):
+                    selected.append(candidate)
+            nodes = selected
+        return nodes
+
+    def __select_axis(self, axis: str, test: str, name: Optional[str], node: Node) -> List[Node]:
+        if axis == ATTRIBUTE:
+            if not isinstance(node, Element) or test not in [NAME, ANY, "node"]:
+                return []
+            if test == NAME:
+                return [(node, name)] if name in node.attributes else []
+            return [(node, attribute_name) for attribute_name in node.attributes]
+
+        if axis == CHILD:
+            if isinstance(node, Document):
+                return [node.root] if self.__matches(node.root, test, name) else []
+            if not isinstance(node, Element):
+                return []
+            if test == NAME:
+                return [child for child in node.children if child.name == name]
+            if test == ANY:
+                return list(node.children)
+            if test == "text":
+                return list(node.text)
+            if test == "processing-instruction":
+                return list(node.processing_instructions)
+            return list(node.content)
+
+        if axis in [DESCENDANT, DESCENDANT_OR_SELF]:
+            nodes = [node] if axis == DESCENDANT_OR_SELF and self.__matches(node, test, name) else []
+            indexed = self.__indexed_descendants(node, name) if test == NAME else None
+            nodes.extend(indexed if indexed is not None else self.__descendants(node, test, name))
+            return nodes
+
+        if axis == SELF:
+            return [node] if self.__matches(node, test, name) else []
+
+        # The parent axis
+        if type(node) is tuple:
+            parent = node[0]
+        elif isinstance(node, Document):
+            return []
+        else:
+            parent = node.parent
+            if parent is None and isinstance(node, Element):
+                parent = node.document
+        return [parent] if parent is not None and self.__matches(parent, test, name) else []
+
+    @staticmethod
+    def __matches(node: Node, test: str, name: Optional[str]) -> bool:
+        if test == NAME:
+            return isinstance(node, Element) and node.name == name
+        if test == ANY:
+            return isinstance(node, Element)
+        if test == "text":
+            return isinstance(node, Text)
+        if test == "processing-instruction":
+            return isinstance(node, ProcessingInstruction)
+        return True
+
+    def __descendants(self, node: Node, test: str, name: Optional[str]) -> List[Node]:
+        """
+            Finds the matching descendants of the given node by walking its content
+        """
+        if isinstance(node, Document):
+            stack = [node.root]
+        elif isinstance(node, Element):
+            stack = list(reversed(node.content))
+        else:
+            return []
+
+        descendants = []
+        while stack:
+            descendant = stack.pop()
+            if self.__matches(descendant, test, name):
+                descendants.append(descendant)
+            if isinstance(descendant, Element):
+                stack.extend(reversed(descendant.content))
+        return descendants
+
+    @staticmethod
+    def __indexed_descendants(node: Node, name: str) -> Optional[List[Element]]:
+        """
+            Finds the descendant elements of the given node with the given name from its document's name index (see
+            `Document.elements_by_name`), or returns None if the index can't be used
+        """
+        document = node if isinstance(node, Document) else getattr(node, "document", None)
+        if document is None or document.root is None or document.root.end_order is None:
+            return None
+
+        # Indexing a lazily built document would build every element in it, rather than only those visited
+        if isinstance(document.root, LazyElement):
+            return None
+        index = document.elements_by_name()
+        if node is document:
+            return list(index.get(name, []))
+        if node.end_order is None:
+            return None
+
+        # Elements detached from the tree (e.g. records streamed by `Records`) are not in the index
+        peers = index.get(node.name, [])
+        position = bisect(peers, node.order - 1)
+        if position == len(peers) or peers[position] is not node:
+            return None
+
+        elements = index.get(name, [])
+        return elements[bisect(elements, node.order):bisect(elements, node.end_order)]
+
+    def __document_of(self, node: Node) -> Document:
+        if type(node) is tuple:
+            node = node[0]
+        while not isinstance(node, Document) and node is not None:
+            document = getattr(node, "document", None)
+            node = document if document is not None else node.parent
+        if node is None:
+            raise ValueError(f"Absolute paths can only be selected within a document in XPath expression "
+                             f"'{self.expression}'")
+        return node
+
+    @staticmethod
+    def __document_order(nodes: List[Node]) -> List[Node]:
+        """
+            Sorts the given nodes into document order, without duplicates
+        """
+        nodes = list(dict.fromkeys(nodes))
+        keys = {}  # type: Dict[Node, Tuple[int, int]]
+        for node in nodes:
+            if type(node) is tuple:
+                element, name = node
+                if element.order is None:
+                    break
+                keys[node] = (element.order, list(element.attributes).index(name))
+            elif isinstance(node, Document):
+                keys[node] = (-1, 0)
+            elif node.order is None:
+                break
+            else:
+                keys[node] = (node.order, -1)
+        else:
+            return sorted(nodes, key=keys.__getitem__)
+
+        # Nodes outside a document (or text in a lazily built one) are not numbered, so number them by walking the tree
+        top = nodes[0][0] if type(nodes[0]) is tuple else nodes[0]
+        while getattr(top, "parent", None) is not None:
+            top = top.parent
+        ranks = {}  # type: Dict[int, int]
+        stack = [top]
+        while stack:
+            node = stack.pop()
+            ranks[id(node)] = len(ranks)
+            if isinstance(node, Element):
+                stack.extend(reversed(node.content))
+            elif isinstance(node, Document):
+                stack.append(node.root)
+
+        def rank(node: Node) -> Tuple[int, int]:
+            if type(node) is tuple:
+                return ranks.get(id(node[0]), len(ranks)), list(node[0].attributes).index(node[1])
+            return ranks.get(id(node), len(ranks)), -1
+        return sorted(nodes, key=rank)
+
+    """
+        ==========
+        FUNCTIONS
+        ==========
+    """
+
+    def __call(self, name: str, arguments: tuple, node: Node, position: int, size: int) -> Any:
+        if name == "last":
+            return float(size)
+        if name == "position":
+            return float(position)
+        if name == "true":
+            return True
+        if name == "false":
+            return False
+
+        values = [self.__evaluate(argument, node, position, size) for argument in arguments]
+        if name == "count":
+            if not isinstance(values[0], list):
+                raise ValueError(f"count() requires a node-set in XPath expression '{self.expression}'")
+            return float(len(values[0]))
+        if name == "not":
+            return not self.__boolean(values[0])
+        if name == "name":
+            nodes = values[0] if values else [node]
+            if not isinstance(nodes, list):
+                raise ValueError(f"name() requires a node-set in XPath expression '{self.expression}'")
+            return self.__name(nodes[0]) if nodes else ""
+        if name == "id":
+            return self.__id(values[0], node)
+
+        strings = [self.__string(value) for value in values] or [string_value(node)]
+        if name == "string":
+            return strings[0]
+        if name == "string-length":
+            return float(len(strings[0]))
+        if name == "normalize-space":
+            return " ".join(strings[0].split())
+        if name == "contains":
+            return strings[1] in strings[0]
+        return strings[0].startswith(strings[1])
+
+    @staticmethod
+    def __name(node: Node) -> str:
+        if type(node) is tuple:
+            return node[1]
+        if isinstance(node, Element):
+            return node.name
+        if isinstance(node, ProcessingInstruction):
+            return node.target
+        return ""
+
+    def __id(self, value: Any, node: Node) -> List[Element]:
+        """
+            Finds the elements with the given IDs (see `Document.ids`), as a whitespace-separated string or the string
+            values of a node-set
+        """
+        document = self.__document_of(node)
+        values = [string_value(item) for item in value] if isinstance(value, list) else [self.__string(value)]
+        elements = [document.ids.get(token) for value in values for token in value.split()]
+        return self.__document_order([element for element in elements if element is not None])
+
+    """
+        =============
+        CONVERSIONS
+        =============
+        Values are node-sets (lists), strings, numbers (floats) & booleans, converted as by the XPath 1.0 spec.
+    """
+
+    @staticmethod
+    def __boolean(value: Any) -> bool:
+        if type(value) is float:
+            return value != 0 and not math.isnan(value)
+        return bool(value)
+
+    @staticmethod
+    def __string(value: Any) -> str:
+        if isinstance(value, list):
+            return string_value(value[0]) if value else ""
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if type(value) is float:
+            return str(int(value)) if value == int(value) else str(value)
+        return value
+
+    def __number(self, value: Any) -> float:
+        if isinstance(value, bool) or type(value) is float:
+            return float(value)
+        try:
+            return float(self.__string(value).strip())
+        except ValueError:
+            return math.nan
+
+    def __compare(self, operator: str, left: Any, right: Any) -> bool:
+        # Node-sets are compared by comparing each of their nodes' string values, except with booleans
+        if isinstance(left, list) and not isinstance(right, bool):
+            return any(self.__compare(operator, string_value(node), right) for node in left)
+        if isinstance(right, list) and not isinstance(left, bool):
+            return any(self.__compare(operator, left, string_value(node)) for node in right)
+
+        if operator in ["=", "!="]:
+            if isinstance(left, bool) or isinstance(right, bool):
+                left, right = self.__boolean(left), self.__boolean(right)
+            elif type(left) is float or type(right) is float:
+                left, right = self.__number(left), self.__number(right)
+            return (left == right) == (operator == "=")
+
+        left, right = self.__number(left), self.__number(right)
+        if operator == "<":
+            return left < right
+        if operator == "<=":
+            return left <= right
+        if operator == ">":
+            return left > right
+        return left >= right
+
+
+def string_value(node: Node) -> str:
+    """
+        The string value of a node: the text an element (or document) contains, including its descendants' text, or
+        the value of an attribute, text or processing instruction
+    """
+    if type(node) is tuple:
+        return node[0].attributes[node[1]]
+    if isinstance(node, Text):
+        return node.text
+    if isinstance(node, ProcessingInstruction):
+        return node.data or ""
+
+    stack = [node.root if isinstance(node, Document) else node]
+    text = []
+    while stack:
+        item = stack.pop()
+        if isinstance(item, Element):
+            stack.extend(reversed(item.content))
+        elif isinstance(item, Text):
+            text.append(item.text)
+    return "".join(text)
+
+
+def bisect(elements: List[Element], order: int) -> int:
+    """
+        The index of the first of the given elements (in document order) numbered after `order`
+    """
+    low, high = 0, len(elements)
+    while low < high:
+        middle = (low + high) // 2
+        if elements[middle].order <= order:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+@functools.lru_cache(maxsize=256)
+def compile(expression: str) -> XPath:
+    """
+        Compiles the given expression, returning the compiled expression for it from the cache if it has been compiled
+        recently
+    """
+    return XPath(expression)
+
+
+def select(context: Union[Document, Element], expression: str) \
+        -> List[Union[Element, Text, ProcessingInstruction, str]]:
+    """
+        Selects the nodes the expression matches from the given document or element. See `XPath.select`
+    """
+    return compile(expression).select(context)
+
+
+def evaluate(context: Union[Document, Element], expression: str) -> Any:
+    """
+        Evaluates the expression from the given document or element. See `XPath.evaluate`
+    """
+    return compile(expression).evaluate(context)
@@ -0,0 +1,279 @@
+import sys
+from typing import Dict, List, Optional
+
+import Helpers
+from Options import ParserOptions, DEFAULT_OPTIONS
+from RegularExpressions import RegEx
+from .Entity import Entity
+from .Error import XMLError, DisallowedCharacterError, ValidityError
+
+
+class AttributeDefinition:
+    """
+        The declaration of a single attribute within an attribute-list declaration. See xml spec ch3.3.
+
+        Attributes:
+            name            The attribute's name
+            type            The attribute's type (see `AttributeDefinition.Type`)
+            values          The allowed values of NOTATION & enumerated attributes
+            default_type    Whether the attribute is REQUIRED, IMPLIED, FIXED or has a DEFAULT value
+            default         The attribute's normalised default (or fixed) value, if it has one
+    """
+    class Type:
+        CDATA = "CDATA"
+        ID = "ID"
+        IDREF = "IDREF"
+        IDREFS = "IDREFS"
+        ENTITY = "ENTITY"
+        ENTITIES = "ENTITIES"
+        NMTOKEN = "NMTOKEN"
+        NMTOKENS = "NMTOKENS"
+        NOTATION = "NOTATION"
+        ENUMERATION = "ENUMERATION"
+
+    class Default:
+        REQUIRED = "#REQUIRED"
+        IMPLIED = "#IMPLIED"
+        FIXED = "#FIXED"
+        DEFAULT = "DEFAULT"
+
+    def __init__(self, name: str, attribute_type: str, values: List[str], default_type: str, default: Optional[str]):
+        self.name = name  # type: str
+        self.type = attribute_type  # type: str
+        self.values = values  # type: List[str]
+        self.default_type = default_type  # type: str
+        self.default = default  # type: Optional[str]
+
+    @property
+    def is_tokenized(self) -> bool:
+        """
+            Whether the attribute's values are normalised further, by removing leading & trailing spaces and
+            collapsing runs of spaces (see xml spec ch3.3.3)
+        """
+        return self.type != AttributeDefinition.Type.CDATA
+
+
+class AttributeListDeclaration:
+    """
+        Represents an attribute-list declaration (<!ATTLIST ...>). See xml spec ch3.3.
+
+        Attributes:
+            element_name    The name of the element type whose attributes are declared
+            definitions     The declared attributes, in declaration order
+    """
+    def __init__(self, remaining_xml: str, options: Optional[ParserOptions] = None):
+        self.__raw_declaration = remaining_xml
+        self.options = options or DEFAULT_OPTIONS
+
+        self.element_name = ""  # type: str
+        self.definitions = []  # type: List[AttributeDefinition]
+
+    def parse_to_end(self, general_entities: Dict[str, Entity]) -> str:
+        """
+            Parses the declaration, expanding default values with the given entities. Returns the xml after the
+            declaration
+        """
+        xml = self.__raw_declaration
+        position = self.__skip_whitespace(xml, 9, required=True)
+        self.element_name, position = self.__parse_name(xml, position)
+
+        while True:
+            attribute_start = self.__skip_whitespace(xml, position)
+            if xml.startswith(">", attribute_start):
+                return xml[attribute_start + 1:]
+            if attribute_start == position:
+                raise XMLError(f"Missing whitespace in attribute-list declaration of element '{self.element_name}'",
+                               source=xml, position=position)
+            position = self.__parse_definition(xml, attribute_start, general_entities)
+
+    def __parse_definition(self, xml: str, position: int, general_entities: Dict[str, Entity]) -> int:
+        """
+            Parses a single attribute definition (name, type & default), returning the position after it
+        """
+        name, position = self.__parse_name(xml, position, reserved_allowed=True)
+        position = self.__skip_whitespace(xml, position, required=True)
+
+        # Parse the type
+        values = []
+        attribute_type = RegEx.AttributeType.match(xml, position)
+        if attribute_type:
+            type_name = attribute_type.group()
+            position = self.__skip_whitespace(xml, attribute_type.end(), required=True)
+            if type_name == AttributeDefinition.Type.NOTATION:
+                values, position = self.__parse_enumeration(xml, position, RegEx.Name, "notation name")
+                position = self.__skip_whitespace(xml, position, required=True)
+        elif xml.startswith("(", position):
+            type_name = AttributeDefinition.Type.ENUMERATION
+            values, position = self.__parse_enumeration(xml, position, RegEx.Nmtoken, "enumerated value")
+            position = self.__skip_whitespace(xml, position, required=True)
+        else:
+            raise XMLError(f"Invalid type for attribute '{name}' of element '{self.element_name}'", source=xml,
+                           position=position)
+
+        # Parse the default
+        default = None
+        if self.__matches_keyword(xml, position, AttributeDefinition.Default.REQUIRED):
+            default_type = AttributeDefinition.Default.REQUIRED
+            position += len(AttributeDefinition.Default.REQUIRED)
+        elif self.__matches_keyword(xml, position, AttributeDefinition.Default.IMPLIED):
+            default_type = AttributeDefinition.Default.IMPLIED
+            position += len(AttributeDefinition.Default.IMPLIED)
+        else:
+            default_type = AttributeDefinition.Default.DEFAULT
+            if self.__matches_keyword(xml, position, AttributeDefinition.Default.FIXED):
+                default_type = AttributeDefinition.Default.FIXED
+                position = self.__skip_whitespace(xml, position + 6, required=True)
+            default, position = self.__parse_default(xml, position, general_entities)
+            if type_name != AttributeDefinition.Type.CDATA:
+                default = normalise_tokens(default)
+
+        self.definitions.append(AttributeDefinition(name, type_name, values, default_type, default))
+        return position
+
+    def __parse_default(self, xml: str, position: int, general_entities: Dict[str, Entity]) -> (str, int):
+        delimiter = xml[position:position + 1]
+        if delimiter not in ["\"", "'"]:
+            raise XMLError(f"Invalid default in attribute-list declaration of element '{self.element_name}'",
+                           source=xml, position=position)
+        end_index = xml.find(delimiter, position + 1)
+        if end_index == -1:
+            raise XMLError(f"Unable to find end of default value in attribute-list declaration of element "
+                           f"'{self.element_name}'", source=xml, position=position)
+
+        default = Helpers.parse_attribute_value(xml[position + 1:end_index], general_entities, xml, position,
+                                                check_structure=self.options.check_structure,
+                                                check_characters=self.options.check_characters)
+        return default, end_index + 1
+
+    def __parse_enumeration(self, xml: str, position: int, pattern, where: str) -> (List[str], int):
+        if not xml.startswith("(", position):
+            raise XMLError(f"Missing '(' in attribute-list declaration of element '{self.element_name}'",
+                           source=xml, position=position)
+        end_index = xml.find(")", position)
+        if end_index == -1:
+            raise XMLError(f"Unable to find end of enumeration in attribute-list declaration of element "
+                           f"'{self.element_name}'", source=xml, position=position)
+
+        values = [value.strip(" \u0009\u000D\u000A") for value in xml[position + 1:end_index].split("|")]
+        for value in values:
+            if not value or (self.options.check_characters and not pattern.fullmatch(value)):
+                raise XMLError(f"Invalid {where} '{value}' in attribute-list declaration of element "
+                               f"'{self.element_name}'", source=xml, position=position)
+        return values, end_index + 1
+
+    def __parse_name(self, xml: str, position: int, reserved_allowed: bool = False) -> (str, int):
+        name = RegEx.StartTag_AttributeName.match(xml, position)
+        if not name:
+            raise XMLError("Unable to find name in attribute-list declaration", source=xml, position=position)
+        if self.options.check_characters and not RegEx.Name.fullmatch(name.group()) and \
+                not (reserved_allowed and RegEx.ReservedAttributeName.fullmatch(name.group())):
+            raise DisallowedCharacterError(name.group(), "attribute-list declaration", conforms_to="Name",
+                                           source=xml, position=position)
+        return sys.intern(name.group()), name.end()
+
+    @staticmethod
+    def __matches_keyword(xml: str, position: int, keyword: str) -> bool:
+        """
+            Whether the given keyword is at the position, ended by whitespace or the end of the declaration
+        """
+        end = position + len(keyword)
+        return xml.startswith(keyword, position) and (xml.startswith(">", end) or
+                                                      RegEx.Whitespace.match(xml, end) is not None)
+
+    @staticmethod
+    def __skip_whitespace(xml: str, position: int, required: bool = False) -> int:
+        whitespace = RegEx.Whitespace.match(xml, position)
+        if whitespace:
+            return whitespace.end()
+        if required:
+            raise XMLError("Missing whitespace in attribute-list declaration", source=xml, position=position)
+        return position
+
+
+class AttributeList:
+    """
+        The attributes declared for one element type, merged from all its attribute-list declarations & compiled into
+        tables, so an element's start-tag is completed with a few dict & set operations.
+
+        Attributes:
+            element_name    The name of the element type
+            definitions     The attribute definitions by name. The first definition of an attribute is binding
+            defaults        The default values of the attributes with a default or fixed value
+            tokenized       The names of the attributes whose values are normalised further (see
+                            `AttributeDefinition.is_tokenized`)
+            ids             The names of the ID attributes, whose values are registered in `Document.ids`
+            idrefs          The names of the IDREF & IDREFS attributes, which must refer to IDs when validating
+    """
+    def __init__(self, element_name: str):
+        self.element_name = element_name  # type: str
+        self.definitions = {}  # type: Dict[str, AttributeDefinition]
+        self.defaults = {}  # type: Dict[str, str]
+        self.tokenized = []  # type: List[str]
+        self.ids = []  # type: List[str]
+        self.idrefs = []  # type: List[str]
+
+    def add(self, definition: AttributeDefinition):
+        """
+            Adds an attribute definition, unless the attribute is already defined
+        """
+        if definition.name in self.definitions:
+            return
+        self.definitions[definition.name] = definition
+
+        if definition.default is not None:
+            self.defaults[definition.name] = definition.default
+        if definition.is_tokenized:
+            self.tokenized.append(definition.name)
+        if definition.type == AttributeDefinition.Type.ID:
+            self.ids.append(definition.name)
+        if definition.type in [AttributeDefinition.Type.IDREF, AttributeDefinition.Type.IDREFS]:
+            self.idrefs.append(definition.name)
+
+    def apply(self, attributes: Dict[str, str]):
+        """
+            Normalises the values of the given attributes of tokenized types, and adds the default values of any
+            missing attributes
+        """
+        for name in self.tokenized:
+            value = attributes.get(name)
+            if value is not None:
+                attributes[name] = normalise_tokens(value)
+
+        if self.defaults:
+            for name in self.defaults.keys() - attributes.keys():
+                attributes[name] = self.defaults[name]
+
+    def validate(self, attributes: Dict[str, str], xml: str):
+        """
+            Checks the given (applied) attributes conform to their definitions. Errors are reported at the start-tag in
+            `xml`
+        """
+        for name, value in attributes.items():
+            definition = self.definitions.get(name)
+            if definition is None:
+                raise ValidityError(f"Attribute '{name}' is not declared for element '{self.element_name}'",
+                                    source=xml)
+            if definition.default_type == AttributeDefinition.Default.FIXED and value != definition.default:
+                raise ValidityError(f"Attribute '{name}' must have its fixed value '{definition.default}'",
+                                    source=xml)
+            if definition.values and value not in definition.values:
+                raise ValidityError(f"Value '{value}' is not allowed for attribute '{name}' (expected one of "
+                                    f"{', '.join(definition.values)})", source=xml)
+            if definition.type in [AttributeDefinition.Type.ID, AttributeDefinition.Type.IDREF] and \
+                    not RegEx.Name.fullmatch(value):
+                raise ValidityError(f"Value '{value}' of {definition.type} attribute '{name}' must be a name",
+                                    source=xml)
+
+        for name, definition in self.definitions.items():
+            if definition.default_type == AttributeDefinition.Default.REQUIRED and name not in attributes:
+                raise ValidityError(f"Required attribute '{name}' is missing from element '{self.element_name}'",
+                                    source=xml)
+
+
+def normalise_tokens(value: str) -> str:
+    """
+        Removes leading & trailing spaces from an attribute value, and collapses runs of spaces into one
+    """
+    if "  " not in value and value[:1] != " " and value[-1:] != " ":
+        return value
+    return " ".join(token for token in value.split(" ") if token)
@@ -1,9 +1,9 @@
-from typing import Dict
+from typing import Dict, Optional
 
-from RegularExpressions import RegEx
+import Helpers
+from Options import ParserOptions, DEFAULT_OPTIONS
 from .Entity import Entity
 from .XMLMarkup import XMLMarkup
-from .Error import XMLError, DisallowedCharacterError
 
 
 class Comment(XMLMarkup):
@@ -19,11 +19,13 @@ class Comment(XMLMarkup):
         containing class immediately and are never passed to the client application.
     """
 
-    def __init__(self, remaining_xml: str):
+    def __init__(self, remaining_xml: str, options: Optional[ParserOptions] = None):
         """
         :param remaining_xml:A block of xml code with a comment beginning at index 0.
+        :param options: The options of the current parse
         """
         self.__raw_declaration = remaining_xml
+        self.options = options or DEFAULT_OPTIONS
 
     def parse_to_end(self, general_entities: Dict[str, Entity]):
         """
@@ -38,22 +40,6 @@ class Comment(XMLMarkup):
         :return: Unparsed xml occurring after the end of the comment
         """
         remaining_xml = self.__raw_declaration
-
-        # Find the closing tag
-        end_index = remaining_xml.find("-->")
-        if end_index == -1:
-            raise XMLError("Unable to find end of comment", source=remaining_xml)
-
-        # Check comment conforms to xmlspec::Char
-        if not RegEx.CharSequence.fullmatch(remaining_xml[:end_index]):
-            raise DisallowedCharacterError(remaining_xml[:end_index + 3], "comment", conforms_to="Char", source=None)
-
-        # Check comment doesn't contain --
-        if "--" in remaining_xml[4: end_index]:
-            raise DisallowedCharacterError(remaining_xml[:end_index + 3], "comment", conforms_to="--", source=None)
-
-        # Check comment doesn't end on --->
-        if remaining_xml[end_index - 1] == "-":
-            raise XMLError("Comments may not end with '--->'", source=remaining_xml[:end_index + 3])
-
-        return remaining_xml[end_index + 3:]
+        end = Helpers.parse_comment(remaining_xml, 0, check_structure=self.options.check_structure,
+                                    check_characters=self.options.check_characters)
+        return remaining_xml[end:]
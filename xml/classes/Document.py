@@ -1,19 +1,29 @@
 import string
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 
 import Helpers
+from Options import ParserOptions, DEFAULT_OPTIONS
 from RegularExpressions import RegEx
+from .AttributeListDeclaration import AttributeListDeclaration, AttributeList
 from .Comment import Comment
 from .Entity import Entity
-from .Error import XMLError
+from .Error import XMLError, DisallowedCharacterError, ValidityError
 from .ProcessingInstruction import ProcessingInstruction
 from .Element import Element
+from .ElementDeclaration import ElementDeclaration
+from .LazyElement import LazyElement
+from .SubtreeTable import SubtreeTable
 
 
 # todo - Rewrite me: I'm a mess.
 class Document:
-    def __init__(self, raw: str):
+    def __init__(self, raw: str, options: Optional[ParserOptions] = None):
         self.__raw = raw
+        self.options = options or DEFAULT_OPTIONS
+
+        # The string all the unparsed xml of the root element is a suffix of, which text refers to rather than copying
+        # (see `Text`). Usually the document itself, unless it is parsed in pieces (see `Parallel`)
+        self.text_buffer = raw  # type: Optional[str]
 
         self.version = None  # type: Optional[str]
         self.encoding = None  # type: Optional[str]
@@ -23,13 +33,41 @@ class Document:
         self.external_public_uri = None  # type: Optional[str]
         self.external_system_uri = None  # type: Optional[str]
 
+        # The element type declarations, and the names of the elements whose declarations only allow child elements
+        # (xmlspec::children), where whitespace between the children is ignorable
+        self.element_declarations = {}  # type: Dict[str, ElementDeclaration]
+        self.element_only_content = set()  # type: Set[str]
+
+        # The attributes declared for each element type, compiled into tables applied to each start-tag
+        self.attribute_lists = {}  # type: Dict[str, AttributeList]
+
+        # The elements with ID attributes, by ID. When validating, IDREF values and the start-tags they were found in
+        # are collected in `idrefs` & checked against the IDs once the root element is parsed
+        self.ids = {}  # type: Dict[str, Element]
+        self.idrefs = []  # type: List[Tuple[str, str]]
+
+        # The public & system identifiers of each declared notation
+        self.notations = {}  # type: Dict[str, Tuple[Optional[str], Optional[str]]]
+
         self.general_entities = {}  # type: Dict[str, Entity]
         self.parameter_entities = {}  # type: Dict[str, Entity]
         self.__load_initial_entities()
 
+        # The processing instructions outside the root element, & the index of the first one after it (if parsed)
         self.processing_instructions = []  # type: List[ProcessingInstruction]
+        self.epilog_start = None  # type: Optional[int]
         self.root = None  # type: Optional[Element]
 
+        # The number of nodes within the root numbered so far (see `Element.order`)
+        self.node_count = 0  # type: int
+        self.__elements_by_name = None  # type: Optional[Dict[str, List[Element]]]
+
+        # The subtrees shared between elements (only if sharing subtrees)
+        self.subtrees = SubtreeTable() if self.options.share_subtrees else None  # type: Optional[SubtreeTable]
+
+        # Timings of an instrumented parse (see `Profiling`), None unless profiling was requested
+        self.stats = None
+
     def __load_initial_entities(self):
         """
             Loads the initial set of entities (lt, gt, amp, apos, quot)
@@ -51,6 +89,58 @@ class Document:
         self.general_entities["quot"] = quot
 
     def parse(self):
+        """
+            Parses the document.
+            Errors are located within the raw xml before being raised, giving them an absolute offset, line & column.
+        """
+        try:
+            self.__parse_document()
+        except XMLError as error:
+            error.locate(self.__raw)
+            raise
+
+    def locate(self, error: XMLError) -> bool:
+        """
+            Locates an error raised after parsing within the raw xml, e.g. on first access of a lazily built element.
+            Returns whether the error could be located (see `XMLError.locate`)
+        """
+        return error.locate(self.__raw)
+
+    def elements_by_name(self) -> Dict[str, List[Element]]:
+        """
+            An index of the elements within the root element by name, each list in document order. The index is built
+            on first use once the root element has been parsed, & is not updated if the tree is changed afterwards.
+            Building the index of a lazily built document builds every element in it
+        """
+        if self.__elements_by_name is None:
+            if self.root is None or self.root.end_order is None:
+                raise ValueError("Elements can only be indexed once the root element has been parsed")
+            index = {}  # type: Dict[str, List[Element]]
+            stack = [self.root]
+            while stack:
+                element = stack.pop()
+                index.setdefault(element.name, []).append(element)
+                stack.extend(reversed(element.children))
+            self.__elements_by_name = index
+        return self.__elements_by_name
+
+    def __parse_document(self):
+        remaining_xml = self.parse_prolog()
+
+        # Parse the root element
+        element_type = LazyElement if self.options.lazy else Element
+        self.root = element_type(remaining_xml, self.options)
+        self.root.document = self
+        remaining_xml = self.root.parse_to_end(self.general_entities)
+
+        self.parse_epilog(remaining_xml)
+
+    def parse_prolog(self) -> str:
+        """
+            Parses the document up to the root element, returning the xml from the root element's start-tag on.
+            Used by `parse` and by `Records` to stream the root element's content.
+            Errors are not located (see `XMLError.locate`).
+        """
         remaining_xml = self.__raw
         # Strip whitespace
         whitespace = RegEx.Whitespace.match(remaining_xml)
@@ -71,19 +161,37 @@ class Document:
         # Parse misc items
         remaining_xml = self.__parse_misc(remaining_xml)
 
-        # Parse the root element
-        if remaining_xml[:1] == "<":
-            self.root = Element(remaining_xml)
-            remaining_xml = self.root.parse_to_end(self.general_entities)
-        else:
-            raise XMLError()
+        # Ensure there is a root element
+        if remaining_xml[:1] != "<":
+            raise XMLError("Unable to find root element", source=remaining_xml)
+        return remaining_xml
 
+    def parse_epilog(self, remaining_xml: str):
+        """
+            Parses the xml after the root element, which may only contain comments, processing instructions &
+            whitespace.
+            Errors are not located (see `XMLError.locate`).
+        """
         # Parse misc items
+        self.epilog_start = len(self.processing_instructions)
         remaining_xml = self.__parse_misc(remaining_xml)
 
         # If there is any remaining xml, throw error
         if len(remaining_xml) != 0:
-            raise XMLError()
+            raise XMLError("Illegal content after root element", source=remaining_xml)
+
+        # Lazily built elements aren't built yet, so their IDREFs are checked once the whole tree is built
+        if self.options.validate and not self.options.lazy:
+            self.check_idrefs()
+
+    def check_idrefs(self):
+        """
+            Checks that every IDREF found while validating matches an ID, which can only be done once all the elements
+            are built. Lazily built documents are only checked on building the whole tree (see `LazyElement.materialise`)
+        """
+        for idref, xml in self.idrefs:
+            if idref not in self.ids:
+                raise ValidityError(f"IDREF '{idref}' does not match any ID", source=xml)
 
     """
         ================
@@ -99,7 +207,7 @@ class Document:
         # Strip whitespace
         whitespace = RegEx.Whitespace.match(remaining_xml)
         if not whitespace:
-            raise XMLError()
+            raise XMLError("Missing whitespace after '<?xml' in xml declaration", source=remaining_xml)
         remaining_xml = remaining_xml[whitespace.end():]
 
         # Parse the version info
@@ -115,7 +223,7 @@ class Document:
             remaining_xml = remaining_xml[8:]
             # If an encoding string is present, whitespace is mandatory
             if not whitespace:
-                raise XMLError()
+                raise XMLError("Missing whitespace before encoding declaration", source=remaining_xml)
 
             # Parse the encoding
             remaining_xml = self.__parse_encoding_declaration(remaining_xml)
@@ -130,7 +238,7 @@ class Document:
             remaining_xml = remaining_xml[10:]
             # If standalone declaration is present whitespace is mandatory
             if not whitespace:
-                raise XMLError()
+                raise XMLError("Missing whitespace before standalone declaration", source=remaining_xml)
 
             # Parse standalone declaration
             remaining_xml = self.__parse_standalone_declaration(remaining_xml)
@@ -142,35 +250,35 @@ class Document:
 
         # --- XML DECLARATION CLOSE -->
         if remaining_xml[:2] != "?>":
-            raise XMLError()
+            raise XMLError("Unable to find end of xml declaration", source=remaining_xml)
 
         return remaining_xml[2:]
 
     def __parse_version_info(self, remaining_xml: str) -> str:
         if remaining_xml[:7] != "version":
-            raise XMLError()
+            raise XMLError("Missing version in xml declaration", source=remaining_xml)
         remaining_xml = remaining_xml[7:]
 
         # Remove equality
         equality = RegEx.Eq.match(remaining_xml)
         if not equality:
-            raise XMLError()
+            raise XMLError("Missing '=' after version in xml declaration", source=remaining_xml)
         remaining_xml = remaining_xml[equality.end():]
 
         # Parse version
         delimiter = remaining_xml[0]
         if delimiter not in "\'\"":
-            raise XMLError()
+            raise XMLError(f"Invalid delimiter `{delimiter}` for version in xml declaration", source=remaining_xml)
         end_index = remaining_xml.find(delimiter, 1)
         self.version = remaining_xml[1: end_index]
         remaining_xml = remaining_xml[end_index + 1:]
 
         # Ensure version is 1.x
         if self.version[:2] != "1.":
-            raise XMLError()
+            raise XMLError(f"Unsupported xml version '{self.version}'", source=remaining_xml)
         for char in self.version[2:]:
             if char not in string.digits:
-                raise XMLError()
+                raise XMLError(f"Unsupported xml version '{self.version}'", source=remaining_xml)
 
         # Return unparsed xml
         return remaining_xml
@@ -179,13 +287,13 @@ class Document:
         # Remove equality
         equality = RegEx.Eq.match(remaining_xml)
         if not equality:
-            raise XMLError()
+            raise XMLError("Missing '=' after encoding in xml declaration", source=remaining_xml)
         remaining_xml = remaining_xml[equality.end():]
 
         # Parse encoding
         delimiter = remaining_xml[0]
         if delimiter not in "\'\"":
-            raise XMLError()
+            raise XMLError(f"Invalid delimiter `{delimiter}` for encoding in xml declaration", source=remaining_xml)
         end_index = remaining_xml.find(delimiter, 1)
         self.encoding = remaining_xml[1: end_index]
         remaining_xml = remaining_xml[end_index + 1:]
@@ -199,13 +307,13 @@ class Document:
         # Remove equality
         equality = RegEx.Eq.match(remaining_xml)
         if not equality:
-            raise XMLError()
+            raise XMLError("Missing '=' after standalone in xml declaration", source=remaining_xml)
         remaining_xml = remaining_xml[equality.end():]
 
         # Parse standalone
         delimiter = remaining_xml[0]
         if delimiter not in "\'\"":
-            raise XMLError()
+            raise XMLError(f"Invalid delimiter `{delimiter}` for standalone in xml declaration", source=remaining_xml)
         end_index = remaining_xml.find(delimiter, 1)
         standalone = remaining_xml[1: end_index]
         remaining_xml = remaining_xml[end_index + 1:]
@@ -216,7 +324,7 @@ class Document:
         elif standalone == "yes":
             self.standalone = True
         else:
-            raise XMLError()
+            raise XMLError(f"Invalid standalone value '{standalone}'. Must be 'yes' or 'no'", source=remaining_xml)
 
         # Return the unparsed xml
         return remaining_xml
@@ -239,33 +347,33 @@ class Document:
         # Strip whitespace
         whitespace = RegEx.Whitespace.match(remaining_xml)
         if not whitespace:
-            raise XMLError()
+            raise XMLError("Missing whitespace after '<!DOCTYPE'", source=remaining_xml)
         remaining_xml = remaining_xml[whitespace.end():]
 
         # Parse the root name
         name_end = RegEx.DTD_NameEnd.search(remaining_xml)
         if not name_end:
-            raise XMLError()
+            raise XMLError("Unable to find end of doctype name", source=remaining_xml)
         self.dtd_name = remaining_xml[:name_end.start()]
         remaining_xml = remaining_xml[name_end.end():]
 
         # Ensure root name is well formed
-        if not RegEx.Name.fullmatch(self.dtd_name):
-            raise XMLError()
+        if self.options.check_characters and not RegEx.Name.fullmatch(self.dtd_name):
+            raise DisallowedCharacterError(self.dtd_name, "doctype name", conforms_to="Name", source=remaining_xml)
 
         # For DTDs without an external subset
         if "[" in name_end.group():
             remaining_xml = self.__parse_subset(remaining_xml)
             # Ensure internal subset ends on ']'
             if remaining_xml[:1] != "]":
-                raise XMLError()
+                raise XMLError("Unable to find end of internal subset", source=remaining_xml)
             remaining_xml = remaining_xml[1:]
             # Strip whitespace
             whitespace = RegEx.Whitespace.match(remaining_xml)
             if whitespace:
                 remaining_xml = remaining_xml[whitespace.end():]
             if remaining_xml[0] != ">":
-                raise XMLError
+                raise XMLError("Unable to find end of doctype declaration", source=remaining_xml)
             return remaining_xml[1:]
 
         # For DTDs without any subset
@@ -276,23 +384,24 @@ class Document:
         # Get the external uri type
         whitespace = RegEx.Whitespace.search(remaining_xml)
         if not whitespace:
-            raise XMLError
+            raise XMLError("Unable to parse type of doctype external id", source=remaining_xml)
         external_type = remaining_xml[:whitespace.start()]
         if external_type not in ["SYSTEM", "PUBLIC"]:
-            raise XMLError
+            raise XMLError(f"Invalid doctype external id type '{external_type}'. Must be 'SYSTEM' or 'PUBLIC'",
+                           source=remaining_xml)
         remaining_xml = remaining_xml[whitespace.end():]
 
         # Get the first URI delimiter
         delimiter = remaining_xml[0]
         if delimiter not in "\"\'":
-            raise XMLError
+            raise XMLError(f"Invalid delimiter `{delimiter}` for doctype external id", source=remaining_xml)
         # Isolate the first URI
         end_index = remaining_xml.find(delimiter, 1)
-        uri = remaining_xml[1: end_index]
+        uri = Helpers.normalise_newlines(remaining_xml[1: end_index])
         remaining_xml = remaining_xml[end_index + 1:]
         # Ensure uri conforms to xmlspec::Char
-        if not RegEx.CharSequence.fullmatch(uri):
-            raise XMLError()
+        if self.options.check_characters and not RegEx.CharSequence.fullmatch(uri):
+            raise DisallowedCharacterError(uri, "doctype external id", conforms_to="Char", source=remaining_xml)
         # If this is a PUBLIC external entity, look for another uri
         if external_type == "PUBLIC":
             self.external_public_uri = uri
@@ -303,14 +412,15 @@ class Document:
             # Get the second URI delimiter
             delimiter = remaining_xml[0]
             if delimiter not in "\"\'":
-                raise XMLError
+                raise XMLError(f"Invalid delimiter `{delimiter}` for doctype system id", source=remaining_xml)
             # Isolate the second URI
             end_index = remaining_xml.find(delimiter, 1)
-            self.external_system_uri = remaining_xml[1: end_index]
+            self.external_system_uri = Helpers.normalise_newlines(remaining_xml[1: end_index])
             remaining_xml = remaining_xml[end_index + 1:]
             # Ensure uri conforms to xmlspec::Char
-            if not RegEx.CharSequence.fullmatch(self.external_system_uri):
-                raise XMLError()
+            if self.options.check_characters and not RegEx.CharSequence.fullmatch(self.external_system_uri):
+                raise DisallowedCharacterError(self.external_system_uri, "doctype system id", conforms_to="Char",
+                                               source=remaining_xml)
         # If this is a SYSTEM external entity, there is no other uri
         elif external_type == "SYSTEM":
             self.external_system_uri = uri
@@ -326,7 +436,7 @@ class Document:
         if remaining_xml[0] == "[":
             remaining_xml = self.__parse_subset(remaining_xml[1:])
             if remaining_xml[:1] != "]":
-                raise XMLError()
+                raise XMLError("Unable to find end of internal subset", source=remaining_xml)
             remaining_xml = remaining_xml[1:]
 
         # Strip whitespace & return
@@ -334,7 +444,7 @@ class Document:
         if whitespace:
             remaining_xml = remaining_xml[whitespace.end():]
         if remaining_xml[0] != ">":
-            raise XMLError
+            raise XMLError("Unable to find end of doctype declaration", source=remaining_xml)
         return remaining_xml[1:]
 
     def __parse_subset(self, xml: str, seen_entities: List[str] = None) -> str:
@@ -365,22 +475,27 @@ class Document:
                 # Get reference
                 reference_end = xml.find(";")
                 if reference_end == -1:
-                    raise XMLError()
+                    raise XMLError("Unable to find end of parameter entity reference", source=xml)
                 reference = xml[:reference_end + 1]
 
                 # Check for recursion
                 if reference in seen_entities:
-                    raise XMLError()
+                    raise XMLError(f"Infinite recursion within entity {reference}", source=xml)
 
                 # Expand and parse reference
                 expansion_text = Helpers.parse_reference(reference,
                                                          parameter_entities=self.parameter_entities,
                                                          expand_general_entities=False)
-                unparsed_xml = self.__parse_subset(expansion_text, seen_entities + [reference])
+                try:
+                    unparsed_xml = self.__parse_subset(expansion_text, seen_entities + [reference])
+                except XMLError as error:
+                    # The replacement text is not part of the document, so report errors at the reference
+                    error.relocate(xml)
+                    raise
 
                 # If there is any remaining unparsed xml, expansion text must be ill formed so raise error
                 if len(unparsed_xml) > 0:
-                    raise XMLError()
+                    raise XMLError(f"Ill-formed expansion text for entity {reference}", source=xml)
 
                 # Continue parsing
                 xml = xml[reference_end + 1:]
@@ -388,7 +503,7 @@ class Document:
 
             # Processing Instructions
             if xml[:2] == "<?":
-                processing_instruction = ProcessingInstruction(xml)
+                processing_instruction = ProcessingInstruction(xml, self.options)
                 xml = processing_instruction.parse_to_end({})
                 self.processing_instructions.append(processing_instruction)
                 # todo - maintain PI position somehow
@@ -396,7 +511,7 @@ class Document:
 
             # Comments
             if xml[:4] == "<!--":
-                comment = Comment(xml)
+                comment = Comment(xml, self.options)
                 xml = comment.parse_to_end({})
                 continue
 
@@ -416,16 +531,16 @@ class Document:
                 continue
 
             # Notation declaration
-            if xml[:8] == "<!NOTATION":
+            if xml[:10] == "<!NOTATION":
                 xml = self.__parse_notation_declaration(xml)
                 continue
 
             # Anything else is a WF error
             else:
-                raise XMLError()
+                raise XMLError("Invalid markup in internal subset", source=xml)
 
     def __parse_entity_declaration(self, remaining_xml: str) -> str:
-        entity = Entity(remaining_xml)
+        entity = Entity(remaining_xml, self.options)
         remaining_xml = entity.parse_to_end(self.parameter_entities)
         if entity.type == Entity.Type.GENERAL and entity.name not in self.general_entities.keys():
             self.general_entities[entity.name] = entity
@@ -434,35 +549,53 @@ class Document:
         return remaining_xml
 
     def __parse_element_declaration(self, remaining_xml: str) -> str:
-        # Ignore Element declarations (we are not yet validating)
-        end_index = remaining_xml.find(">")
-        return remaining_xml[end_index + 1:]
+        declaration = ElementDeclaration(remaining_xml, self.options)
+        unparsed_xml = declaration.parse_to_end()
 
-    def __parse_attributelist_declaration(self, remaining_xml: str) -> str:
-        # Ignore attlist declarations (we are not yet validating)
-        index = 0
-        while True:
-            if index > len(remaining_xml):
-                raise XMLError()
-            char = remaining_xml[index]
-
-            # Skip to end of strings
-            if char in "\'\"":
-                delimiter = char
-                index = remaining_xml.find(delimiter, index + 1) + 1
-                continue
+        if declaration.name in self.element_declarations:
+            if self.options.validate:
+                raise ValidityError(f"Element type '{declaration.name}' is declared more than once",
+                                    source=remaining_xml)
+            return unparsed_xml
 
-            # If this is the end of the attribute list
-            if char == ">":
-                return remaining_xml[index + 1:]
+        self.element_declarations[declaration.name] = declaration
+        if declaration.content_type == ElementDeclaration.Type.CHILDREN:
+            self.element_only_content.add(declaration.name)
+        return unparsed_xml
 
-            # Otherwise move on to next char
-            index += 1
+    def __parse_attributelist_declaration(self, remaining_xml: str) -> str:
+        declaration = AttributeListDeclaration(remaining_xml, self.options)
+        remaining_xml = declaration.parse_to_end(self.general_entities)
+
+        # Merge the declaration into the element type's table
+        attribute_list = self.attribute_lists.get(declaration.element_name)
+        if attribute_list is None:
+            attribute_list = self.attribute_lists[declaration.element_name] = AttributeList(declaration.element_name)
+        for definition in declaration.definitions:
+            attribute_list.add(definition)
+        return remaining_xml
 
     def __parse_notation_declaration(self, remaining_xml: str) -> str:
-        # Ignore notation declarations (we are not yet validating)
-        end_index = remaining_xml.find(">")
-        return remaining_xml[end_index + 1:]
+        declaration = RegEx.NotationDeclaration.match(remaining_xml)
+        if not declaration:
+            raise XMLError("Invalid notation declaration", source=remaining_xml)
+
+        name = declaration.group(1)
+        if self.options.check_characters and not RegEx.Name.fullmatch(name):
+            raise DisallowedCharacterError(name, "notation name", conforms_to="Name", source=remaining_xml,
+                                           position=declaration.start(1))
+
+        # Public identifiers are restricted to xmlspec::PubidChar
+        public_id = declaration.group(3)
+        if public_id is not None:
+            public_id = public_id[1:-1]
+            if self.options.check_characters and not RegEx.PubidLiteral.fullmatch(public_id):
+                raise XMLError(f"Invalid public identifier '{public_id}' in notation declaration",
+                               source=remaining_xml, position=declaration.start(3))
+        system_id = declaration.group(2) or declaration.group(4)
+
+        self.notations.setdefault(name, (public_id, system_id[1:-1] if system_id else None))
+        return remaining_xml[declaration.end():]
 
     """
         =====
@@ -479,14 +612,14 @@ class Document:
 
             # Processing instruction
             if remaining_xml[:2] == "<?":
-                processing_instruction = ProcessingInstruction(remaining_xml)
+                processing_instruction = ProcessingInstruction(remaining_xml, self.options)
                 remaining_xml = processing_instruction.parse_to_end({})
                 self.processing_instructions.append(processing_instruction)
                 continue
 
             # Comments
             if remaining_xml[:4] == "<!--":
-                comment = Comment(remaining_xml)
+                comment = Comment(remaining_xml, self.options)
                 remaining_xml = comment.parse_to_end({})
                 continue
 
@@ -1,11 +1,16 @@
-from typing import List, Dict, Optional, Union
+import sys
+from operator import attrgetter
+from typing import Iterable, List, Dict, Optional, Union
 import Helpers
+import Namespaces
+from Options import ParserOptions, DEFAULT_OPTIONS
 from RegularExpressions import RegEx
 from .ProcessingInstruction import ProcessingInstruction
 from .Text import Text
 from .XMLMarkup import XMLMarkup
+from .ElementDeclaration import ContentModel, ElementDeclaration
 from .Entity import Entity
-from .Error import XMLError, DisallowedCharacterError
+from .Error import XMLError, ValidityError
 
 
 class Element(XMLMarkup):
@@ -23,10 +28,33 @@ class Element(XMLMarkup):
                                     (i.e. `content` without the elements and processing instructions)
             processing_instructions A list of all the processing instructions within this element
                                     (i.e. `content` without the text and elements)
+            parent                  The element containing this element, or None for the root element
+            document                The document containing this element, if it was parsed as part of one
+            in_replacement_text     Whether the element was parsed from an entity's replacement text, whose line
+                                    endings are not normalised & whose text is copied rather than kept as a span of
+                                    the document (see `Text`)
+            order                   The element's position in document order, or None if it was parsed outside a
+                                    document. Elements, text & processing instructions are numbered from 0 (the
+                                    root) as they are parsed
+            end_order               The position of the element's last descendant, or its own if it has none. The
+                                    element's descendants are exactly the nodes numbered `order` + 1 ... `end_order`
+
+        The numbering makes structural queries integer comparisons: see `is_ancestor_of` & `sort_document_order`.
+        Lazily built documents only number their elements, from the scan (see `LazyElement`), & not those from the
+        replacement text of entities. Documents sharing subtrees aren't numbered (see `ParserOptions.share_subtrees`).
+
+        If namespaces are enabled (see `ParserOptions.namespaces`), names are also resolved:
+            qname                   The element's expanded name, interned so it can be compared by identity
+                                    (see `Namespaces.QName`). `namespace_uri` & `local_name` are its parts
+            qualified_attributes    The element's attributes keyed by expanded name, excluding namespace
+                                    declarations
+            namespaces              The namespace prefixes in scope at this element
     """
-    def __init__(self, remaining_xml: str):
+    def __init__(self, remaining_xml: str, options: Optional[ParserOptions] = None):
         self.__raw_declaration = remaining_xml
         self.__current_text = None  # type: Optional[Text]
+        self.__current_text_source = None  # type: Optional[str]
+        self.options = options or DEFAULT_OPTIONS
 
         self.name = ""  # type: str
         self.attributes = {}  # type: Dict[str, str]
@@ -36,6 +64,20 @@ class Element(XMLMarkup):
         self.children = []  # type: List[Element]
         self.text = []  # type: List[Text]
         self.processing_instructions = []  # type: List[ProcessingInstruction]
+        self.parent = None  # type: Optional[Element]
+        self.document = None
+        self.in_replacement_text = False  # type: bool
+        self.order = None  # type: Optional[int]
+        self.end_order = None  # type: Optional[int]
+
+        # Resolved names (only if namespaces are enabled)
+        self.qname = None  # type: Optional[Namespaces.QName]
+        self.qualified_attributes = {}  # type: Dict[Namespaces.QName, str]
+        self.namespaces = None  # type: Optional[Namespaces.NamespaceScope]
+
+        # The element's declaration & the state of its content model (only if validating)
+        self.__declaration = None  # type: Optional[ElementDeclaration]
+        self.__content_state = ContentModel.START  # type: int
 
     def parse_to_end(self, general_entities: Dict[str, Entity]) -> str:
         # Parse start tag
@@ -47,11 +89,7 @@ class Element(XMLMarkup):
 
         # Parse content
         remaining_xml = self.parse_xml_block(remaining_xml, general_entities)
-
-        # Sort content objects into convenience lists
-        self.children = [child for child in self.content if isinstance(child, Element)]
-        self.text = [child for child in self.content if isinstance(child, Text)]
-        self.processing_instructions = [child for child in self.content if isinstance(child, ProcessingInstruction)]
+        self.sort_content()
 
         # Parse end tag
         remaining_xml = self.parse_end_tag(remaining_xml)
@@ -59,12 +97,43 @@ class Element(XMLMarkup):
         # Pass unparsed xml (after end tag) back for parent to handle
         return remaining_xml
 
+    def __getstate__(self) -> dict:
+        """
+            Elements are pickled (e.g. to be sent between processes, see `Parallel`) without the xml they were parsed
+            from, their document or their declaration
+        """
+        state = self.__dict__.copy()
+        state["_Element__raw_declaration"] = ""
+        state["_Element__current_text_source"] = None
+        state["_Element__declaration"] = None
+        state["document"] = None
+        return state
+
+    @classmethod
+    def build(cls, name: str, attributes: Dict[str, str], options: Optional[ParserOptions] = None,
+              is_self_closing: bool = False) -> 'Element':
+        """
+            Creates an element from its parts rather than by parsing its xml, e.g. when decoding a `Flat.FlatTree`.
+            The element's name & attributes are not checked, & its namespaces are not resolved (see
+            `resolve_namespaces`)
+        """
+        element = object.__new__(cls)
+        Element.__init__(element, "", options)
+        element.name = name
+        element.attributes = attributes
+        element.__is_self_closing_element = is_self_closing
+        return element
+
     """
         ==========
         START TAG
         ==========
         These functions are responsible for parsing the start tag of the element
         e.g. <Name attr1="blah" attr2="blah">
+
+        The start tag is tokenized in a single pass: each step matches an anchored pattern at the current position in
+        the tag, so no search ever runs past the tag's closing '>'. If the tag cannot be tokenized, it is examined
+        again step by step to report why (see `__raise_start_tag_error`).
     """
 
     def parse_opening_tag(self, xml, general_entities: Dict[str, Entity]) -> str:
@@ -75,126 +144,170 @@ class Element(XMLMarkup):
         :param general_entities: A dictionary of general entities for the current document
         :return: Unparsed xml after the opening tag
         """
-        # Strip opening fluff
-        remaining_xml = xml[1:]
+        # Number the element before its content. Lazily built elements are numbered by the scan (see `LazyElement`)
+        document = self.document
+        if document is not None and self.order is None and not (self.options.lazy or self.options.share_subtrees):
+            self.order = document.node_count
+            document.node_count += 1
 
         # Collect tag data
-        remaining_xml = self.parse_name(remaining_xml)
-        remaining_xml = self.parse_attributes(remaining_xml, general_entities)
+        position = self.parse_name(xml)
+        position = self.parse_attributes(xml, position, general_entities)
+        if self.document is not None and (self.document.attribute_lists or self.options.validate):
+            self.__apply_attribute_list(xml)
+        if self.options.namespaces:
+            self.resolve_namespaces(xml)
+        if self.options.validate and self.document is not None:
+            self.__find_declaration(xml)
 
         # Parse end of the tag
-        if remaining_xml[:2] == "/>":
-            self.__is_self_closing_element = True
+        tag_end = RegEx.StartTag_End.match(xml, position)
+        if not tag_end:
+            self.__raise_start_tag_error(xml, position)
+        self.__is_self_closing_element = tag_end.group(1) == "/>"
+        if self.__is_self_closing_element:
+            self.end_order = self.order
+            if self.__declaration is not None:
+                self.__check_content_complete(xml, tag_end.start())
+            # The element is complete, so the xml it was parsed from is no longer needed
+            self.__raw_declaration = ""
 
-        # Strip closing fluff & return remaining xml to be parsed as content
-        if remaining_xml[:1] == ">":
-            return remaining_xml[1:]
-        elif remaining_xml[:2] == "/>":
-            return remaining_xml[2:]
-        else:
-            raise XMLError("Unable to find end of start-tag for element", source=self.__raw_declaration)
+        # Return remaining xml to be parsed as content
+        return xml[tag_end.end():]
 
-    def parse_name(self, xml) -> str:
+    def parse_name(self, xml) -> int:
         """
             Parses the element's name from the opening tag
         :param xml:
-        :return: All xml after the element's name
+        :return: The position in `xml` immediately after the element's name
         """
         # The name will end on either whitespace (if attributes) or tag close (>, />)
-        name_end = RegEx.Whitespace_Or_TagClose.search(xml)
-
-        if not name_end:
-            raise XMLError("Unable to find end of start-tag for element", source=self.__raw_declaration)
+        name = RegEx.StartTag_Name.match(xml, 1)
+        if not name:
+            raise XMLError("Unable to find end of start-tag for element", source=xml)
 
-        self.name = xml[:name_end.start()]
+        self.name = sys.intern(name.group())
 
         # Names must conform to xmlspec::Name
-        if not RegEx.Name.fullmatch(self.name):
-            raise DisallowedCharacterError(self.name, "element name", conforms_to="Name", source=self.__raw_declaration)
-
-        # Return remaining xml for processing
-        return xml[name_end.start():]
-
-    def parse_attributes(self, xml, general_entities: Dict[str, Entity]) -> str:
-        while True:
-            # Strip leading whitespace
-            whitespace = RegEx.Whitespace.match(xml)
-            if whitespace:
-                xml = xml[whitespace.end():]
-
-            # Whitespace is compulsory if this is not the end of the tag
-            if xml[:1] not in ["/", ">"]:
-                if not whitespace:
-                    raise XMLError("Missing whitespace before element attribute", source=self.__raw_declaration)
-
-            # If this is the end of the tag, return remaining xml
-            else:
-                return xml
+        if self.options.check_characters:
+            Helpers.check_name(self.name, "element name", xml, 1)
 
-            # Parse the attribute
-            attribute_name, xml = self.parse_attribute_name(xml)
-            attribute_value, xml = self.parse_attribute_value(xml, general_entities)
+        return name.end()
 
-            # Ensure attribute name is unique
-            if attribute_name in self.attributes.keys():
-                raise XMLError(f"Repeated attribute '{attribute_name}' in element", source=self.__raw_declaration)
-
-            self.attributes[attribute_name] = attribute_value
-
-    def parse_attribute_name(self, xml) -> (str, str):
+    def parse_attributes(self, xml, position: int, general_entities: Dict[str, Entity]) -> int:
         """
-            Parses an attribute's name & returns both the name and remaining unparsed xml
+            Parses every attribute in the opening tag from the given position
+        :return: The position in `xml` immediately after the last attribute
         """
-        # The attribute name will end with an equality
-        name_end = RegEx.Eq.search(xml)
-        if not name_end:
-            raise XMLError(f"Element '{self.name}' contains an attribute without a value",
-                           source=self.__raw_declaration)
-
-        # Parse the attribute name
-        attribute_name = xml[:name_end.start()]
+        return Helpers.parse_start_tag_attributes(xml, position, self.attributes, general_entities,
+                                                  check_structure=self.options.check_structure,
+                                                  check_characters=self.options.check_characters)
 
-        # To ensure we report the correct error, explicitly check for '>' in the attribute name
-        if '>' in attribute_name:
-            raise XMLError(f"Element '{self.name}' contains an attribute without a value",
-                           source=self.__raw_declaration)
+    def parse_attribute_value(self, attribute_value: str, xml: str, position: int,
+                              general_entities: Dict[str, Entity]) -> str:
+        """
+            Expands & checks an attribute's value
+        :param attribute_value: The value, as written between its delimiters
+        :param xml: The xml the value was found in
+        :param position: The position of the value's opening delimiter in `xml`, where errors are reported
+        :param general_entities: A dictionary of general entities for the current document
+        :return: The attribute value
+        """
+        return Helpers.parse_attribute_value(attribute_value, general_entities, xml, position,
+                                             check_structure=self.options.check_structure,
+                                             check_characters=self.options.check_characters)
 
-        # Attribute name must conform to xmlspec::Name
-        if not RegEx.Name.fullmatch(attribute_name):
-            raise DisallowedCharacterError(attribute_name, "attribute name",
-                                           conforms_to="Name",
-                                           source=self.__raw_declaration)
+    def __raise_start_tag_error(self, xml: str, position: int):
+        """
+            Works out why the start tag could not be tokenized beyond the given position & raises a descriptive error
+        """
+        whitespace = RegEx.Whitespace.match(xml, position)
+        index = whitespace.end() if whitespace else position
 
-        return attribute_name, xml[name_end.end():]
+        # Whitespace is compulsory if this is not the end of the tag
+        if index < len(xml) and xml[index] not in "/>" and not whitespace:
+            raise XMLError("Missing whitespace before element attribute", source=xml, position=position)
 
-    def parse_attribute_value(self, xml, general_entities: Dict[str, Entity]) -> (str, str):
-        # The attribute value will be delimited by the same type of quotation on each end
-        delimiter = xml[:1]
-        if delimiter not in "\'\"":
-            raise XMLError(f"Invalid delimiter `{delimiter}` for attribute value", source=self.__raw_declaration)
+        # Otherwise this must be an attribute with a name, '=' and a delimited value
+        name = RegEx.StartTag_AttributeName.match(xml, index)
+        if not name:
+            raise XMLError("Unable to find end of start-tag for element", source=xml)
 
-        # Find the end of the string literal & parse value
-        end_index = xml.find(delimiter, 1)
-        attribute_value = xml[1:end_index]
+        eq = RegEx.Eq.match(xml, name.end())
+        if not eq:
+            raise XMLError(f"Element '{self.name}' contains an attribute without a value", source=xml, position=index)
 
-        # Attribute values may not contain '<'
-        if "<" in attribute_value:
-            raise DisallowedCharacterError(attribute_value, "attribute value",
-                                           conforms_to="<",
-                                           source=self.__raw_declaration)
+        delimiter = xml[eq.end():eq.end() + 1]
+        if delimiter not in ["\"", "\'"]:
+            raise XMLError(f"Invalid delimiter `{delimiter}` for attribute value", source=xml, position=eq.end())
 
-        # Expand attribute value references & normalise whitespace
-        attribute_value = Helpers.parse_string_literal(attribute_value,
-                                                       general_entities=general_entities,
-                                                       expand_parameter_entities=False,
-                                                       normalise_whitespace=True)
+        raise XMLError("Unable to find end of attribute value", source=xml, position=eq.end())
 
-        # Attribute values must conform to xmlspec::Char
-        if not RegEx.CharSequence.fullmatch(attribute_value):
-            raise DisallowedCharacterError(attribute_value, "attribute value", conforms_to="Char",
-                                           source=self.__raw_declaration)
+    """
+        ===========
+        NAMESPACES
+        ===========
+        These functions resolve the element & attribute names against the namespaces in scope. See `Namespaces`.
+    """
 
-        return attribute_value, xml[end_index + 1:]
+    def resolve_namespaces(self, xml: str):
+        """
+            Resolves the element's name & attribute names, after the start tag has been parsed
+        :param xml: The xml the start tag was found in, where errors are reported
+        """
+        table = Namespaces.NAME_TABLE
+        try:
+            # Collect this element's namespace declarations
+            declarations = {}
+            for attribute_name, value in self.attributes.items():
+                if attribute_name == "xmlns":
+                    declarations[""] = value
+                elif attribute_name.startswith("xmlns:"):
+                    declarations[Namespaces.split_name(attribute_name)[1]] = value
+
+            # Elements without declarations share their parent's scope
+            scope = self.parent.namespaces if self.parent is not None else Namespaces.ROOT_SCOPE
+            self.namespaces = scope.declare(declarations) if declarations else scope
+
+            # Unprefixed element names are in the default namespace
+            prefix, local_name = Namespaces.split_name(self.name)
+            namespace_uri = self.namespaces.resolve(prefix)
+            if prefix and namespace_uri is None:
+                raise XMLError(f"Undeclared namespace prefix '{prefix}' in element name '{self.name}'", None)
+            self.qname = table.qname(namespace_uri, local_name)
+
+            # Unprefixed attribute names are in no namespace
+            for attribute_name, value in self.attributes.items():
+                if attribute_name == "xmlns" or attribute_name.startswith("xmlns:"):
+                    continue
+                prefix, local_name = Namespaces.split_name(attribute_name)
+                namespace_uri = None
+                if prefix:
+                    namespace_uri = self.namespaces.resolve(prefix)
+                    if namespace_uri is None:
+                        raise XMLError(f"Undeclared namespace prefix '{prefix}' in attribute name "
+                                       f"'{attribute_name}'", None)
+
+                qname = table.qname(namespace_uri, local_name)
+                if qname in self.qualified_attributes:
+                    raise XMLError(f"Repeated attribute '{qname}' in element", None)
+                self.qualified_attributes[qname] = value
+        except XMLError as error:
+            # Report namespace errors at the start tag
+            error.relocate(xml)
+            raise
+
+    @property
+    def is_self_closing(self) -> bool:
+        return self.__is_self_closing_element
+
+    @property
+    def namespace_uri(self) -> Optional[str]:
+        return self.qname.namespace_uri if self.qname is not None else None
+
+    @property
+    def local_name(self) -> Optional[str]:
+        return self.qname.local_name if self.qname is not None else None
 
     """
         ========
@@ -208,31 +321,21 @@ class Element(XMLMarkup):
         """
             Parses the xml element's end tag.
 
-            Parses the name from the given end tag and ensures it matches the name in the start tag.
+            Ensures the end tag's name matches the name in the start tag. The name is compared in place, so a matching
+            end tag is never sliced or searched.
         """
         # Ensure the remaining xml is an end tag
-        if xml[:2] != "</":
+        if not xml.startswith("</"):
             raise XMLError(f"Unable to find end-tag for element '{self.name}'", source=self.__raw_declaration)
+        if self.__declaration is not None:
+            self.__check_content_complete(xml)
+        if self.end_order is None and self.order is not None:
+            self.end_order = self.document.node_count - 1
+        end = Helpers.parse_end_tag(xml, 0, self.name, self.options.check_structure, start_tag=self.__raw_declaration)
 
-        # Isolate the end-tag name
-        end_index = xml.find(">")
-        if end_index == -1:
-            raise XMLError(f"Unable to find end of end-tag for element '{self.name}'", source=xml)
-        end_name = xml[2:end_index]
-        xml = xml[end_index + 1:]
-
-        # Remove trailing whitespace from name
-        whitespace = RegEx.Whitespace_End.search(end_name)
-        if whitespace:
-            end_name = end_name[:whitespace.start()]
-
-        # Ensure end name matches start name
-        if end_name != self.name:
-            raise XMLError(f"Mismatched start ('{self.name}') and end ('{end_name}') tags for element",
-                           source=self.__raw_declaration)
-
-        # Return remaining unparsed xml
-        return xml
+        # The element is complete, so the xml it was parsed from is no longer needed
+        self.__raw_declaration = ""
+        return xml[end:]
 
     """
         ========
@@ -242,12 +345,16 @@ class Element(XMLMarkup):
         todo - write more about me :)
     """
 
-    def parse_xml_block(self, xml, general_entities: Dict[str, Entity], seen_entities: [str] = []) -> str:
+    def parse_xml_block(self, xml, general_entities: Dict[str, Entity], seen_entities: [str] = [],
+                        stop_at_child: bool = False) -> str:
         """
             todo - write me :(
         :param xml:
         :param general_entities:
         :param seen_entities:
+        :param stop_at_child: If True, returns the xml unparsed from the start-tag of the next child element (see
+                              `Records`), rather than parsing it, & likewise from the next reference to an entity
+                              whose replacement text contains markup
         :return:
         """
         while True:
@@ -262,14 +369,29 @@ class Element(XMLMarkup):
 
             # Pass child elements on to XMLMarkup class for processing
             if xml[:1] == "<" and xml[:9] != "<![CDATA[":
-                child = XMLMarkup(xml)
+                if stop_at_child and xml[1:2] not in ["!", "?"]:
+                    self.__close_current_text_block()
+                    return xml
+
+                child = XMLMarkup(xml, self.options)
+                if isinstance(child, Element):
+                    # Text before a child element is numbered before the child's content
+                    self.__close_current_text_block()
+                    child.parent = self
+                    child.document = self.document
+                    child.in_replacement_text = self.in_replacement_text or len(seen_entities) > 0
+                # The xml from the child's start is only kept to locate validity errors
+                child_xml = xml if self.__declaration is not None else None
                 xml = child.parse_to_end(general_entities)
 
                 # Discard comments
                 from .Comment import Comment
                 if not isinstance(child, Comment):
-                    self.__close_current_text_block()
-                    self.content.append(child)
+                    if self.__declaration is not None:
+                        self.validate_child(child, child_xml)
+                    if self.options.share_subtrees and isinstance(child, Element) and self.document is not None:
+                        child = self.document.subtrees.share_element(child)
+                    self.add_content(child)
 
                 continue
 
@@ -286,10 +408,18 @@ class Element(XMLMarkup):
                     raise XMLError(f"Infinite recursion within entity {reference}", source=xml)
 
                 # Expand reference and parse as xml
-                expansion_text = Helpers.parse_reference(reference,
-                                                         general_entities=general_entities,
-                                                         expand_parameter_entities=False)
-                unparsed_xml = self.parse_xml_block(expansion_text, general_entities, seen_entities + [reference])
+                try:
+                    expansion_text = Helpers.parse_reference(reference,
+                                                             general_entities=general_entities,
+                                                             expand_parameter_entities=False)
+                    # Replacement text which may contain child elements is left for the caller to stream
+                    if stop_at_child and "<" in expansion_text:
+                        return xml
+                    unparsed_xml = self.parse_xml_block(expansion_text, general_entities, seen_entities + [reference])
+                except XMLError as error:
+                    # The replacement text is not part of the document, so report errors at the reference
+                    error.relocate(xml)
+                    raise
 
                 # If there is any remaining unparsed xml, expansion text contains an unpaired end-tag so is ill-formed
                 if len(unparsed_xml) > 0:
@@ -299,8 +429,26 @@ class Element(XMLMarkup):
                 xml = xml[reference_end + 1:]
                 continue
 
-            # Everything else is text
-            xml = self.__parse_text(xml)
+            # Everything else is text. Line endings are only normalised in the document itself, not in replacement text
+            xml = self.__parse_text(xml, normalise_newlines=not (seen_entities or self.in_replacement_text))
+
+    def add_content(self, markup: Union['Element', ProcessingInstruction]):
+        """
+            Closes the current text block & appends the given piece of markup to this element's content
+        """
+        self.__close_current_text_block()
+        if isinstance(markup, ProcessingInstruction):
+            self.__number(markup)
+        self.content.append(markup)
+
+    def sort_content(self):
+        """
+            Sorts the parsed content objects into the convenience lists (`children`, `text` and
+            `processing_instructions`)
+        """
+        self.children = [child for child in self.content if isinstance(child, Element)]
+        self.text = [child for child in self.content if isinstance(child, Text)]
+        self.processing_instructions = [child for child in self.content if isinstance(child, ProcessingInstruction)]
 
     """
         ==============
@@ -317,27 +465,178 @@ class Element(XMLMarkup):
         For more details see the usage within the `parse_xml_block` function
     """
 
-    def __parse_text(self, remaining_xml: str) -> str:
+    def __parse_text(self, remaining_xml: str, normalise_newlines: bool = True) -> str:
         """
             Adds the given text to the currently open Text block if there is one, or opens a new one if not.
             The Text class parses the text until it reaches some markup, and all xml after this markup is returned to
             the `parse_xml_block` function for handling
         """
         if not self.__current_text:
-            self.__current_text = Text()
-
-        remaining_xml = self.__current_text.add_text(remaining_xml)
+            self.__current_text = Text(self.options)
+            # The text's source is only kept to locate validity errors
+            if self.__declaration is not None:
+                self.__current_text_source = remaining_xml
+
+        # Text in the document itself refers to the document's source rather than being copied (see `Text`). Lazy
+        # elements parse copies of their xml, so their text is always copied
+        buffer = None
+        if normalise_newlines and self.document is not None and not self.options.lazy:
+            buffer = self.document.text_buffer
+        remaining_xml = self.__current_text.add_text(remaining_xml, normalise_newlines, buffer)
         return remaining_xml
 
     def __close_current_text_block(self):
         """
             Closes the current text block, checks it for well-formedness issues & adds it to the list of this
-            element's content.
+            element's content. Whitespace-only text is dropped instead if the options ask for it.
 
             Called by `parse_xml_block` whenever it encounters a significant piece of markup which should punctuate
             two text blocks.
         """
         if self.__current_text:
-            self.__current_text.check_wellformedness()
-            self.content.append(self.__current_text)
+            if self.__declaration is not None:
+                self.__validate_text(self.__current_text)
+            if self.options.whitespace == ParserOptions.Whitespace.KEEP or not self.__is_ignorable(self.__current_text):
+                self.__current_text.check_wellformedness()
+                if self.options.share_subtrees and self.document is not None:
+                    self.__current_text.text = self.document.subtrees.share_string(self.__current_text.text)
+                self.__number(self.__current_text)
+                self.content.append(self.__current_text)
             self.__current_text = None
+            self.__current_text_source = None
+
+    def __number(self, markup: Union[Text, ProcessingInstruction]):
+        """
+            Links a text block or processing instruction to this element, & numbers it in document order
+        """
+        markup.parent = self
+        document = self.document
+        if document is not None and not (self.options.lazy or self.options.share_subtrees):
+            markup.order = document.node_count
+            document.node_count += 1
+
+    def __is_ignorable(self, text: Text) -> bool:
+        """
+            Whether the given text should be dropped under the `whitespace` option (see `ParserOptions`)
+        """
+        if self.options.whitespace == ParserOptions.Whitespace.DROP:
+            return text.is_whitespace()
+        return self.document is not None and self.name in self.document.element_only_content and \
+            text.is_whitespace(literal=True)
+
+    """
+        ==============
+        DOCUMENT ORDER
+        ==============
+    """
+
+    def is_ancestor_of(self, node: Union['Element', Text, ProcessingInstruction]) -> bool:
+        """
+            Whether the given node (from the same document) is within this element. Numbered nodes (see `order`) are
+            compared by number, & others by following their parents
+        """
+        if self.end_order is not None and node.order is not None:
+            return self.order < node.order <= self.end_order
+
+        parent = node.parent
+        while parent is not None:
+            if parent is self:
+                return True
+            parent = parent.parent
+        return False
+
+    """
+        ===========
+        VALIDATION
+        ===========
+        These functions check the element against its declarations in the DTD, if validating (see
+        `ParserOptions.validate`). Declared attributes are applied whether validating or not. Each child element
+        advances the state of the declaration's content model (see `ContentModel`) as it is parsed, so the content is
+        checked in a single pass without collecting it first.
+    """
+
+    def validate_child(self, markup: Union['Element', ProcessingInstruction], xml: str):
+        """
+            Checks the given child element or processing instruction is allowed at this point in the element's content
+        :param markup:
+        :param xml: The xml from the child's start, for locating errors
+        """
+        declaration = self.__declaration
+        if declaration is None:
+            return
+
+        if isinstance(markup, Element):
+            # Elements with ANY content have no content model
+            if declaration.content_model is None:
+                return
+            state = declaration.content_model.transitions[self.__content_state].get(markup.name)
+            if state is None:
+                expected = declaration.content_model.expected(self.__content_state)
+                raise ValidityError(f"Element '{markup.name}' is not allowed here within element '{self.name}' "
+                                    f"(expected {expected})", source=xml)
+            self.__content_state = state
+
+        elif declaration.content_type == ElementDeclaration.Type.EMPTY:
+            raise ValidityError(f"Element '{self.name}' is declared EMPTY but has content", source=xml)
+
+    def __apply_attribute_list(self, xml: str):
+        """
+            Completes the element's attributes from the attributes declared for it in the DTD (see `AttributeList`),
+            registering its ID & checking the attributes if validating
+        """
+        attribute_list = self.document.attribute_lists.get(self.name)
+        if attribute_list is None:
+            if self.options.validate and self.attributes:
+                raise ValidityError(f"Attribute '{next(iter(self.attributes))}' is not declared for element "
+                                    f"'{self.name}'", source=xml)
+            return
+        attribute_list.apply(self.attributes)
+
+        for name in attribute_list.ids:
+            value = self.attributes.get(name)
+            if value is not None:
+                if self.options.validate and value in self.document.ids:
+                    raise ValidityError(f"ID '{value}' is not unique", source=xml)
+                self.document.ids.setdefault(value, self)
+
+        if self.options.validate:
+            attribute_list.validate(self.attributes, xml)
+            for name in attribute_list.idrefs:
+                value = self.attributes.get(name)
+                if value is not None:
+                    self.document.idrefs.extend((idref, xml) for idref in value.split(" "))
+
+    def __find_declaration(self, xml: str):
+        if self.parent is None and self.name != self.document.dtd_name:
+            raise ValidityError(f"Root element '{self.name}' does not match the document type "
+                                f"'{self.document.dtd_name}'", source=xml, position=1)
+
+        self.__declaration = self.document.element_declarations.get(self.name)
+        if self.__declaration is None:
+            raise ValidityError(f"Element type '{self.name}' is not declared", source=xml, position=1)
+
+    def __validate_text(self, text: Text):
+        content_type = self.__declaration.content_type
+        if content_type == ElementDeclaration.Type.EMPTY or \
+                (content_type == ElementDeclaration.Type.CHILDREN and not text.is_whitespace(literal=True)):
+            raise ValidityError(f"Text is not allowed within element '{self.name}'",
+                                source=self.__current_text_source)
+
+    def __check_content_complete(self, xml: str, position: int = 0):
+        content_model = self.__declaration.content_model
+        if content_model is not None and not content_model.accepting[self.__content_state]:
+            raise ValidityError(f"Content of element '{self.name}' is incomplete "
+                                f"(expected {content_model.expected(self.__content_state)})",
+                                source=xml, position=position)
+
+
+def sort_document_order(nodes: Iterable[Union[Element, Text, ProcessingInstruction]]) \
+        -> List[Union[Element, Text, ProcessingInstruction]]:
+    """
+        Sorts numbered nodes from the same document (see `Element.order`) into document order.
+        Raises a ValueError if any of the nodes isn't numbered
+    """
+    nodes = list(nodes)
+    if any(node.order is None for node in nodes):
+        raise ValueError("Only numbered nodes can be sorted into document order")
+    return sorted(nodes, key=attrgetter("order"))
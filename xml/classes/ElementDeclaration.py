@@ -0,0 +1,276 @@
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+
+from Options import ParserOptions, DEFAULT_OPTIONS
+from RegularExpressions import RegEx
+from .Error import XMLError, DisallowedCharacterError
+
+
+class ContentModel:
+    """
+        A deterministic automaton accepting the sequences of child element names allowed by an element declaration.
+
+        States are numbered from 0 (the start state). `transitions[state]` maps each name allowed next to the state
+        after it, so checking a child element is a single dict lookup, and `accepting[state]` is whether the element may
+        end in that state.
+    """
+    START = 0
+
+    def __init__(self, transitions: List[Dict[str, int]], accepting: List[bool]):
+        self.transitions = transitions  # type: List[Dict[str, int]]
+        self.accepting = accepting  # type: List[bool]
+
+    def expected(self, state: int) -> str:
+        """
+            A description of what may come next in the given state, for error messages
+        """
+        names = sorted(self.transitions[state])
+        if self.accepting[state]:
+            names.append("the end of the element")
+        return ", ".join(names) if names else "nothing"
+
+
+class ElementDeclaration:
+    """
+        Represents an element type declaration (<!ELEMENT ...>). See xml spec ch3.2.
+
+        Attributes:
+            name            The name of the declared element type
+            content_type    The kind of content the element type allows, one of:
+                                EMPTY       No content at all
+                                ANY         Any (declared) elements & text
+                                MIXED       Text, & the child elements in `mixed_names` in any order
+                                CHILDREN    Only the child elements allowed by the declared content model
+            content_model   The automaton checking child element names, or None for ANY content
+            mixed_names     The child element names allowed in MIXED content
+
+        The declared content model (`(a, (b | c)*, d?)`) is parsed into a tree of particles & compiled into a
+        `ContentModel` once, when the DTD is parsed. Each name in the model is a position: the positions which may
+        follow each position are computed from the tree (Glushkov's construction), & sets of positions reachable by the
+        same names are then merged into the states of a deterministic automaton (the subset construction).
+    """
+    class Type:
+        EMPTY = "EMPTY"
+        ANY = "ANY"
+        MIXED = "MIXED"
+        CHILDREN = "CHILDREN"
+
+    # Content particle kinds: a name, a sequence or choice of particles, or a particle with an occurrence modifier
+    NAME = "name"
+    SEQUENCE = ","
+    CHOICE = "|"
+    OPTIONAL = "?"
+    ZERO_OR_MORE = "*"
+    ONE_OR_MORE = "+"
+
+    def __init__(self, remaining_xml: str, options: Optional[ParserOptions] = None):
+        self.__raw_declaration = remaining_xml
+        self.options = options or DEFAULT_OPTIONS
+
+        self.name = ""  # type: str
+        self.content_type = ElementDeclaration.Type.ANY  # type: str
+        self.content_model = None  # type: Optional[ContentModel]
+        self.mixed_names = set()  # type: Set[str]
+
+    def parse_to_end(self) -> str:
+        """
+            Parses the declaration, compiling its content model. Returns the xml after the declaration
+        """
+        xml = self.__raw_declaration
+
+        # Parse the element type's name
+        position = self.__skip_whitespace(xml, 9, required=True)
+        name = RegEx.ContentModel_Name.match(xml, position)
+        if not name:
+            raise XMLError("Unable to find name of element declaration", source=xml, position=position)
+        self.name = self.__check_name(xml, name.group(), position)
+        position = self.__skip_whitespace(xml, name.end(), required=True)
+
+        # Parse the content specification
+        if xml.startswith("EMPTY", position):
+            self.content_type = ElementDeclaration.Type.EMPTY
+            self.content_model = ContentModel([{}], [True])
+            position += 5
+        elif xml.startswith("ANY", position):
+            self.content_type = ElementDeclaration.Type.ANY
+            position += 3
+        elif xml.startswith("(", position) and xml.startswith("#PCDATA", self.__skip_whitespace(xml, position + 1)):
+            self.content_type = ElementDeclaration.Type.MIXED
+            position = self.__parse_mixed(xml, position)
+            self.content_model = ContentModel([{name: 0 for name in self.mixed_names}], [True])
+        elif xml.startswith("(", position):
+            self.content_type = ElementDeclaration.Type.CHILDREN
+            particle, position = self.__parse_particle(xml, position)
+            self.content_model = compile_content_model(particle)
+        else:
+            raise XMLError(f"Invalid content specification in declaration of element '{self.name}'",
+                           source=xml, position=position)
+
+        # Parse the end of the declaration
+        position = self.__skip_whitespace(xml, position)
+        if not xml.startswith(">", position):
+            raise XMLError(f"Unable to find end of declaration of element '{self.name}'", source=xml,
+                           position=position)
+        return xml[position + 1:]
+
+    """
+        ==============
+        CONTENT MODELS
+        ==============
+    """
+
+    def __parse_mixed(self, xml: str, position: int) -> int:
+        """
+            Parses mixed content (`(#PCDATA | a | b)*`) from its '(', returning the position after it
+        """
+        position = self.__skip_whitespace(xml, position + 1) + 7
+        while True:
+            position = self.__skip_whitespace(xml, position)
+            if xml.startswith(")", position):
+                position += 1
+                break
+            if not xml.startswith("|", position):
+                raise XMLError(f"Invalid mixed content in declaration of element '{self.name}'", source=xml,
+                               position=position)
+
+            position = self.__skip_whitespace(xml, position + 1)
+            name = RegEx.ContentModel_Name.match(xml, position)
+            if not name:
+                raise XMLError(f"Invalid mixed content in declaration of element '{self.name}'", source=xml,
+                               position=position)
+            self.mixed_names.add(self.__check_name(xml, name.group(), position))
+            position = name.end()
+
+        # Mixed content with child elements must allow any number of them
+        if xml.startswith("*", position):
+            return position + 1
+        if self.mixed_names:
+            raise XMLError(f"Mixed content in declaration of element '{self.name}' must end with ')*'", source=xml,
+                           position=position)
+        return position
+
+    def __parse_particle(self, xml: str, position: int) -> Tuple[tuple, int]:
+        """
+            Parses a content particle (a name, or a sequence or choice of particles, with an optional occurrence
+            modifier) returning it & the position after it
+        """
+        if xml.startswith("(", position):
+            particles = []
+            separator = None
+            while True:
+                particle, position = self.__parse_particle(xml, self.__skip_whitespace(xml, position + 1))
+                particles.append(particle)
+
+                position = self.__skip_whitespace(xml, position)
+                char = xml[position:position + 1]
+                if char == ")":
+                    position += 1
+                    break
+                if char not in [ElementDeclaration.SEQUENCE, ElementDeclaration.CHOICE] or \
+                        (separator is not None and char != separator):
+                    raise XMLError(f"Invalid content model in declaration of element '{self.name}'", source=xml,
+                                   position=position)
+                separator = char
+            particle = (separator or ElementDeclaration.SEQUENCE, particles)
+        else:
+            name = RegEx.ContentModel_Name.match(xml, position)
+            if not name:
+                raise XMLError(f"Invalid content model in declaration of element '{self.name}'", source=xml,
+                               position=position)
+            particle = (ElementDeclaration.NAME, self.__check_name(xml, name.group(), position))
+            position = name.end()
+
+        # Occurrence modifiers follow immediately, without whitespace
+        modifier = xml[position:position + 1]
+        if modifier in [ElementDeclaration.OPTIONAL, ElementDeclaration.ZERO_OR_MORE, ElementDeclaration.ONE_OR_MORE]:
+            return (modifier, particle), position + 1
+        return particle, position
+
+    def __check_name(self, xml: str, name: str, position: int) -> str:
+        if self.options.check_characters and not RegEx.Name.fullmatch(name):
+            raise DisallowedCharacterError(name, "element declaration", conforms_to="Name", source=xml,
+                                           position=position)
+        return sys.intern(name)
+
+    @staticmethod
+    def __skip_whitespace(xml: str, position: int, required: bool = False) -> int:
+        whitespace = RegEx.Whitespace.match(xml, position)
+        if whitespace:
+            return whitespace.end()
+        if required:
+            raise XMLError("Missing whitespace in element declaration", source=xml, position=position)
+        return position
+
+
+def compile_content_model(particle: tuple) -> ContentModel:
+    """
+        Compiles a content particle (see `ElementDeclaration`) into a deterministic automaton
+    """
+    # Position 0 is the start, before any child element. Every other position is a name within the model
+    names = [None]  # type: List[Optional[str]]
+    follow = [set()]  # type: List[Set[int]]
+
+    def analyse(particle: tuple) -> Tuple[bool, Set[int], Set[int]]:
+        """
+            Numbers the names within the particle & records which positions may follow each other. Returns whether the
+            particle may be empty, & the positions it may start & end with
+        """
+        kind, content = particle
+        if kind == ElementDeclaration.NAME:
+            names.append(content)
+            follow.append(set())
+            return False, {len(names) - 1}, {len(names) - 1}
+
+        if kind == ElementDeclaration.SEQUENCE:
+            nullable, first, last = True, set(), set()
+            for child in content:
+                child_nullable, child_first, child_last = analyse(child)
+                for position in last:
+                    follow[position] |= child_first
+                if nullable:
+                    first |= child_first
+                last = child_last | last if child_nullable else child_last
+                nullable = nullable and child_nullable
+            return nullable, first, last
+
+        if kind == ElementDeclaration.CHOICE:
+            nullable, first, last = False, set(), set()
+            for child in content:
+                child_nullable, child_first, child_last = analyse(child)
+                nullable = nullable or child_nullable
+                first |= child_first
+                last |= child_last
+            return nullable, first, last
+
+        nullable, first, last = analyse(content)
+        if kind != ElementDeclaration.OPTIONAL:
+            for position in last:
+                follow[position] |= first
+        return nullable or kind != ElementDeclaration.ONE_OR_MORE, first, last
+
+    nullable, first, last = analyse(particle)
+    follow[0] = first
+    final = last | {0} if nullable else last
+
+    # Each state of the automaton is the set of positions the children so far may have ended at
+    states = {frozenset([0]): 0}  # type: Dict[frozenset, int]
+    queue = [frozenset([0])]  # type: List[frozenset]
+    transitions = []  # type: List[Dict[str, int]]
+    accepting = []  # type: List[bool]
+    for state in queue:
+        moves = {}  # type: Dict[str, Set[int]]
+        for position in state:
+            for next_position in follow[position]:
+                moves.setdefault(names[next_position], set()).add(next_position)
+
+        table = {}
+        for name, next_positions in moves.items():
+            next_state = frozenset(next_positions)
+            if next_state not in states:
+                states[next_state] = len(queue)
+                queue.append(next_state)
+            table[name] = states[next_state]
+        transitions.append(table)
+        accepting.append(not final.isdisjoint(state))
+
+    return ContentModel(transitions, accepting)
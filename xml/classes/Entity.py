@@ -1,5 +1,6 @@
 from typing import Dict, Optional
 
+from Options import ParserOptions, DEFAULT_OPTIONS
 from RegularExpressions import RegEx
 from .Error import XMLError, DisallowedCharacterError
 
@@ -10,8 +11,9 @@ class Entity:
         GENERAL = "&"
         PARAMETER = "%"
 
-    def __init__(self, remaining_xml: str):
+    def __init__(self, remaining_xml: str, options: Optional[ParserOptions] = None):
         self.__raw_declaration = remaining_xml
+        self.options = options or DEFAULT_OPTIONS
 
         self.name = ''  # type: str
         self.expansion_text = None  # type: Optional[str]
@@ -82,7 +84,7 @@ class Entity:
         remaining_xml = remaining_xml[whitespace.end():]
 
         # Entity name must conform to xmlspec::Name
-        if not RegEx.Name.fullmatch(self.name):
+        if self.options.check_characters and not RegEx.Name.fullmatch(self.name):
             raise DisallowedCharacterError(self.name, "entity name", conforms_to="Name", source=self.__raw_declaration)
 
         return remaining_xml
@@ -95,7 +97,7 @@ class Entity:
 
     def parse_internal_value(self, remaining_xml: str, parameter_entities: Dict[str, 'Entity']) -> str:
         # Import here to avoid import loop
-        from xml.Helpers import parse_string_literal
+        import Helpers
 
         # Find the end of the string literal
         delimiter = remaining_xml[0]
@@ -104,15 +106,21 @@ class Entity:
             raise XMLError("Unable to find end of entity value", source=self.__raw_declaration)
 
         # Parse the value
-        value = remaining_xml[1:value_end_index]
+        value = Helpers.normalise_newlines(remaining_xml[1:value_end_index])
+        value_source = remaining_xml
         remaining_xml = remaining_xml[value_end_index + 1:]
 
         # Expand all parameter & character entities within the value
-        self.expansion_text = parse_string_literal(value, parameter_entities=parameter_entities,
-                                                   expand_general_entities=False)
+        try:
+            self.expansion_text = Helpers.parse_string_literal(value, parameter_entities=parameter_entities,
+                                                               expand_general_entities=False)
+        except XMLError as error:
+            # Report reference errors at the start of the value
+            error.relocate(value_source)
+            raise
 
         # Entity value must conform to xmlspec::Char
-        if not RegEx.CharSequence.fullmatch(self.expansion_text):
+        if self.options.check_characters and not RegEx.CharSequence.fullmatch(self.expansion_text):
             raise DisallowedCharacterError(self.expansion_text,
                                            "entity value",
                                            conforms_to="Char",
@@ -136,10 +144,11 @@ class Entity:
 
     def parse_external_reference(self, remaining_xml: str) -> str:
         # Import here to avoid import loop
-        from xml.Helpers import parse_external_reference
+        import Helpers
 
         # Parse the external reference
-        remaining_xml, self.system_URI, self.public_URI, self.notation = parse_external_reference(remaining_xml)
+        remaining_xml, self.system_URI, self.public_URI, self.notation = Helpers.parse_external_reference(
+            remaining_xml, check_characters=self.options.check_characters)
 
         # If there is a notation, this must be an unparsed entity
         if self.notation:
@@ -1,21 +1,111 @@
-from typing import Optional
+import re
+from array import array
+from bisect import bisect_right
+from typing import Optional, Tuple
 
 from RegularExpressions import RegEx
 
 
+class LineIndex:
+    """
+        Maps absolute offsets within a source string to (line, column) positions.
+
+        The index of line start offsets is only built the first time a position is requested, so documents which parse
+        successfully never pay for it.
+    """
+    def __init__(self, source: str):
+        self.__source = source
+        self.__line_starts = None  # type: Optional[array]
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """
+            Returns the 1-based (line, column) of the given offset
+        """
+        if self.__line_starts is None:
+            line_starts = array("q")
+            line_starts.extend(match.end() for match in re.finditer("\u000d\u000a?|\u000a", self.__source))
+            self.__line_starts = line_starts
+
+        # Lines before this offset are those which start at or before it
+        line = bisect_right(self.__line_starts, offset)
+        line_start = self.__line_starts[line - 1] if line > 0 else 0
+        return line + 1, offset - line_start + 1
+
+
 class XMLError(Exception):
     """
         The base error to throw for fatal XML issues - mostly well-formedness complaints
+
+        Attributes:
+            message     A description of the error
+            source      The xml in which the error was found (usually all of the unparsed xml from that point onwards,
+                        which is the string the parser is already holding so costs nothing to keep)
+            position    The index of the error within `source`
+            offset      The absolute offset of the error within the document, once located (see `locate`)
+            line        The 1-based line of the error within the document, computed on first access
+            column      The 1-based column of the error within the document, computed on first access
     """
-    def __init__(self, message: str, source: Optional[str]):
+    def __init__(self, message: str, source: Optional[str] = None, position: int = 0):
+        Exception.__init__(self, message)
         self.message = message
         self.source = source
-        if source and len(source) > 20:
-            Exception.__init__(self, f"{message}\nSource: {source[:20] + '...'}")
-        elif source:
-            Exception.__init__(self, f"{message}\nSource: {source}")
-        else:
-            Exception.__init__(self, message)
+        self.position = position
+        self.offset = None  # type: Optional[int]
+        self.__line_index = None  # type: Optional[LineIndex]
+
+    def relocate(self, source: str, position: int = 0):
+        """
+            Moves the error to the given position, e.g. from within an entity's replacement text (which does not
+            appear in the document) to the entity reference itself
+        """
+        self.source = source
+        self.position = position
+
+    def locate(self, document: str, line_index: Optional[LineIndex] = None) -> bool:
+        """
+            Calculates the absolute offset of the error within the given document.
+
+            Every unparsed xml string handled by the parser is a suffix of the document, so the offset of the error is
+            simply the document length minus the length of the source it was found in.
+            Returns whether the error could be located.
+        """
+        if self.offset is not None:
+            return True
+        if self.source is None or not document.endswith(self.source):
+            return False
+
+        self.offset = len(document) - len(self.source) + self.position
+        self.__line_index = line_index or LineIndex(document)
+        return True
+
+    @property
+    def line(self) -> Optional[int]:
+        if self.offset is None or self.__line_index is None:
+            return None
+        return self.__line_index.position(self.offset)[0]
+
+    @property
+    def column(self) -> Optional[int]:
+        if self.offset is None or self.__line_index is None:
+            return None
+        return self.__line_index.position(self.offset)[1]
+
+    def __str__(self):
+        message = self.message
+        if self.offset is not None and self.__line_index is not None:
+            line, column = self.__line_index.position(self.offset)
+            message += f"\nLine {line}, column {column} (offset {self.offset})"
+        if self.source:
+            source = self.source[self.position: self.position + 21]
+            message += f"\nSource: {source[:20] + '...' if len(source) > 20 else source}"
+        return message
+
+
+class ValidityError(XMLError):
+    """
+        A specialised subclass of XMLError to throw when a well-formed document breaks a validity constraint of its DTD
+        (see `ParserOptions.validate`)
+    """
 
 
 class DisallowedCharacterError(XMLError):
@@ -26,14 +116,14 @@ class DisallowedCharacterError(XMLError):
         This allows me to pattern match in the xml parser for efficiency, while still being able to provide an exact
         error when the pattern does not match.
     """
-    def __init__(self, sequence: str, where: str, conforms_to: str, source: Optional[str]):
+    def __init__(self, sequence: str, where: str, conforms_to: str, source: Optional[str], position: int = 0):
         self.sequence = sequence
         self.conforms_to = conforms_to
 
         char = self.__get_disallowed_char(sequence, conforms_to)
 
         message = f"Disallowed character '{char}' in {where} ('{sequence}')"
-        XMLError.__init__(self, message, source)
+        XMLError.__init__(self, message, source, position)
 
     def __get_disallowed_char(self, sequence, conforms_to) -> str:
         if conforms_to.lower() == "name":
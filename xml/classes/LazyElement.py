@@ -0,0 +1,230 @@
+from typing import List, Dict, Optional, Union
+
+import Namespaces
+import Scanner
+from Options import ParserOptions
+from .Element import Element
+from .Entity import Entity
+from .Error import XMLError
+from .ProcessingInstruction import ProcessingInstruction
+from .Text import Text
+
+
+class LazyElement(Element):
+    """
+        An element whose start-tag and content are only parsed when first accessed. See `ParserOptions.lazy`.
+
+        Parsing a LazyElement only scans ahead to find the extent of the element and of every element within it (see
+        `Scanner`). The element's name is known from the scan, but its attributes and content are only parsed on first
+        access of `attributes`, `content`, `children`, `text` or `processing_instructions`. Child elements are in turn
+        created as LazyElements from the recorded extents, so only the branches of the tree that are visited are built.
+
+        The scan checks that every element is terminated and correctly nested. All other well-formedness checks on an
+        element's start-tag and content are deferred until it is built, and any errors are raised on first access.
+        Use `materialise(recursive=True)` to build & check a whole subtree explicitly.
+
+        Elements are numbered in document order by their index in the scan (see `Element.order`), so structural queries
+        don't build anything. Text & processing instructions are not numbered, & neither are elements from the
+        replacement text of entities, which is scanned separately so its indices aren't positions in the document.
+    """
+    def __init__(self, remaining_xml: str, options: Optional[ParserOptions] = None):
+        self.__pending = False  # type: bool
+        Element.__init__(self, remaining_xml, options)
+        self.__remaining_xml = remaining_xml
+
+        # Where to find the element once it needs to be built
+        self.__source = None  # type: Optional[str]
+        self.__spans = None  # type: Optional[Scanner.ElementSpans]
+        self.__index = 0  # type: int
+        self.__numbered = False  # type: bool
+        self.__general_entities = {}  # type: Dict[str, Entity]
+
+    def parse_to_end(self, general_entities: Dict[str, Entity]) -> str:
+        """
+            Scans to the end of the element without building it, and returns the xml after the element
+        """
+        remaining_xml = self.__remaining_xml
+        spans = Scanner.scan_element(remaining_xml)
+        # Only a scan from the root element numbers elements; an element with a parent is in an entity's replacement text
+        self.__bind(remaining_xml, spans, 0, general_entities, numbered=self.parent is None)
+        return remaining_xml[spans.ends[0]:]
+
+    def __bind(self, source: str, spans: Scanner.ElementSpans, index: int, general_entities: Dict[str, Entity],
+               numbered: bool):
+        self.__source = source
+        self.__spans = spans
+        self.__index = index
+        self.__numbered = numbered
+        self.__general_entities = general_entities
+        self.__remaining_xml = None
+        self.name = spans.names[index]
+        if numbered:
+            self.order = index
+            self.end_order = index + spans.sizes[index]
+        self.__pending = True
+
+    def __child(self, index: int) -> 'LazyElement':
+        """
+            Creates an (unbuilt) child element from the span at the given index
+        """
+        child = object.__new__(LazyElement)
+        LazyElement.__init__(child, "", self.options)
+        child.__bind(self.__source, self.__spans, index, self.__general_entities, self.__numbered)
+        child.parent = self
+        child.document = self.document
+        child.in_replacement_text = self.in_replacement_text
+        return child
+
+    """
+        ==============
+        MATERIALISING
+        ==============
+    """
+
+    @property
+    def is_materialised(self) -> bool:
+        return not self.__pending
+
+    def materialise(self, recursive: bool = False):
+        """
+            Builds the element now rather than on first access. If `recursive`, also builds every element within it,
+            raising any well-formedness errors that were deferred by the scan. When validating, building the whole of the
+            root element also checks the document's IDREFs (see `Document.check_idrefs`)
+        """
+        if self.__pending:
+            self.__materialise()
+        if recursive:
+            for child in self.content:
+                if isinstance(child, LazyElement):
+                    child.materialise(recursive=True)
+            if self.options.validate and self.document is not None and self.document.root is self:
+                self.document.check_idrefs()
+
+    def __materialise(self):
+        self.__pending = False
+        spans = self.__spans
+        start = spans.starts[self.__index]
+        xml = self.__source[start: spans.ends[self.__index]]
+        general_entities = self.__general_entities
+
+        # Rebuilding resets everything but the element's place in the tree
+        parent, document, order, end_order = self.parent, self.document, self.order, self.end_order
+        in_replacement_text = self.in_replacement_text
+        Element.__init__(self, xml, self.options)
+        self.parent, self.document, self.order, self.end_order = parent, document, order, end_order
+        self.in_replacement_text = in_replacement_text
+        try:
+            remaining_xml = self.parse_opening_tag(xml, general_entities)
+
+            # Self-closing elements end with their start-tag
+            if len(remaining_xml) == 0:
+                return
+
+            # Parse the content between child elements, and insert unbuilt children in their place
+            cursor = len(xml) - len(remaining_xml)
+            for child in spans.children(self.__index):
+                child_start = spans.starts[child] - start
+                if child_start > cursor:
+                    self.parse_xml_block(xml[cursor:child_start], general_entities)
+                child_element = self.__child(child)
+                self.validate_child(child_element, xml[child_start:])
+                self.add_content(child_element)
+                cursor = spans.ends[child] - start
+
+            remaining_xml = self.parse_xml_block(xml[cursor:], general_entities)
+            self.sort_content()
+            self.parse_end_tag(remaining_xml)
+        except XMLError as error:
+            # Report errors against the full source rather than this element's copy of it, & locate them in the document
+            if error.source is not None and xml.endswith(error.source):
+                error.relocate(self.__source, start + len(xml) - len(error.source) + error.position)
+            if self.document is not None:
+                self.document.locate(error)
+            raise
+
+    """
+        ===========
+        PROPERTIES
+        ===========
+        Accessing any of these (or `namespace_uri` & `local_name`) builds the element if it has not been built already
+    """
+
+    @property
+    def attributes(self) -> Dict[str, str]:
+        if self.__pending:
+            self.__materialise()
+        return self.__attributes
+
+    @attributes.setter
+    def attributes(self, value: Dict[str, str]):
+        self.__attributes = value
+
+    @property
+    def content(self) -> List[Union[Element, Text, ProcessingInstruction]]:
+        if self.__pending:
+            self.__materialise()
+        return self.__content
+
+    @content.setter
+    def content(self, value: List[Union[Element, Text, ProcessingInstruction]]):
+        self.__content = value
+
+    @property
+    def children(self) -> List[Element]:
+        if self.__pending:
+            self.__materialise()
+        return self.__children
+
+    @children.setter
+    def children(self, value: List[Element]):
+        self.__children = value
+
+    @property
+    def text(self) -> List[Text]:
+        if self.__pending:
+            self.__materialise()
+        return self.__text
+
+    @text.setter
+    def text(self, value: List[Text]):
+        self.__text = value
+
+    @property
+    def processing_instructions(self) -> List[ProcessingInstruction]:
+        if self.__pending:
+            self.__materialise()
+        return self.__processing_instructions
+
+    @processing_instructions.setter
+    def processing_instructions(self, value: List[ProcessingInstruction]):
+        self.__processing_instructions = value
+
+    @property
+    def qname(self) -> Optional[Namespaces.QName]:
+        if self.__pending:
+            self.__materialise()
+        return self.__qname
+
+    @qname.setter
+    def qname(self, value: Optional[Namespaces.QName]):
+        self.__qname = value
+
+    @property
+    def qualified_attributes(self) -> Dict[Namespaces.QName, str]:
+        if self.__pending:
+            self.__materialise()
+        return self.__qualified_attributes
+
+    @qualified_attributes.setter
+    def qualified_attributes(self, value: Dict[Namespaces.QName, str]):
+        self.__qualified_attributes = value
+
+    @property
+    def namespaces(self) -> Optional[Namespaces.NamespaceScope]:
+        if self.__pending:
+            self.__materialise()
+        return self.__namespaces
+
+    @namespaces.setter
+    def namespaces(self, value: Optional[Namespaces.NamespaceScope]):
+        self.__namespaces = value
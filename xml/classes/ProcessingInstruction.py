@@ -1,8 +1,8 @@
 from typing import Dict, Optional
+import Helpers
 from .Entity import Entity
 from .XMLMarkup import XMLMarkup
-from RegularExpressions import RegEx
-from .Error import XMLError, DisallowedCharacterError
+from Options import ParserOptions, DEFAULT_OPTIONS
 
 
 class ProcessingInstruction(XMLMarkup):
@@ -24,15 +24,29 @@ class ProcessingInstruction(XMLMarkup):
             target  The processing instruction's target, usually an indicator of who should respond to this PI
             data    The data associated with this processing instruction
     """
-    def __init__(self, remaining_xml: str):
+    def __init__(self, remaining_xml: str, options: Optional[ParserOptions] = None):
         """
         :param remaining_xml:   A block of xml code with a processing instruction beginning at index 0.
+        :param options:         The options of the current parse
         """
         self.__raw_declaration = remaining_xml
+        self.options = options or DEFAULT_OPTIONS
 
         self.target = ""  # type: str
         self.data = None  # type: Optional[str]
 
+        # The element containing this processing instruction, & its position in document order (see `Element.order`)
+        self.parent = None
+        self.order = None  # type: Optional[int]
+
+    def __getstate__(self) -> dict:
+        """
+            Processing instructions are pickled without the xml they were parsed from (see `Element.__getstate__`)
+        """
+        state = self.__dict__.copy()
+        state["_ProcessingInstruction__raw_declaration"] = ""
+        return state
+
     def parse_to_end(self, general_entities: Dict[str, Entity]) -> str:
         """
             Extracts the processing instruction from the beginning of the given xml (`self.__raw_declaration`)
@@ -46,47 +60,9 @@ class ProcessingInstruction(XMLMarkup):
         :param general_entities: Not used. Parameter exists for compatibility with other XMLMarkup subclasses
         :return: Unparsed xml occurring after the end of the processing instruction
         """
-        remaining_xml = self.__raw_declaration[2:]
-
-        # Find the end of the target
-        target_end = RegEx.ProcessingInstruction_TargetEnd.search(remaining_xml)
-        if not target_end:
-            raise XMLError("Unable to find end of processing instruction", source=self.__raw_declaration)
-
-        self.target = remaining_xml[:target_end.start()]
-        remaining_xml = remaining_xml[target_end.end():]
-
-        # Ensure target conforms to xmlspec::Name
-        if not RegEx.Name.fullmatch(self.target):
-            raise DisallowedCharacterError(self.target,
-                                           "processing instruction target",
-                                           conforms_to="Name",
-                                           source=self.__raw_declaration)
-
-        # Special case: no attached data
-        if target_end.group() == "?>":
-            return remaining_xml
-
-        # Otherwise search for end
-        end_index = remaining_xml.find("?>")
-        if end_index == -1:
-            raise XMLError("Unable to find end of processing instruction", source=self.__raw_declaration)
-
-        # Remove leading whitespace
-        whitespace = RegEx.Whitespace.match(remaining_xml)
-        if whitespace:
-            remaining_xml = remaining_xml[whitespace.end():]
-
-        # Update the data
-        self.data = remaining_xml[:end_index]
-        remaining_xml = remaining_xml[end_index + 2:]
-
-        # Check data conforms to xmlspec::CharSequence
-        if not RegEx.CharSequence.fullmatch(self.data):
-            raise DisallowedCharacterError(self.data,
-                                           "processing instruction data",
-                                           conforms_to="Name",
-                                           source=self.__raw_declaration)
+        remaining_xml = self.__raw_declaration
+        self.target, self.data, end = Helpers.parse_processing_instruction(
+            remaining_xml, 0, check_characters=self.options.check_characters)
 
         # Return the remaining xml for future processing
-        return remaining_xml
+        return remaining_xml[end:]
@@ -0,0 +1,56 @@
+from typing import Dict
+
+from .Element import Element
+from .ProcessingInstruction import ProcessingInstruction
+
+
+class SubtreeTable:
+    """
+        Shares identical subtrees & equal strings within a document. See `ParserOptions.share_subtrees`.
+
+        Elements are shared bottom-up as they are completed: an element's key is made of its name, attributes & the
+        keys of its content, where each child element is already shared & so is identified by its id. Building a key
+        therefore only looks at the element's own content, & two elements have equal keys exactly when their subtrees
+        are identical. The first element with each key is kept, & later identical elements are replaced by it, so
+        identical subtrees are the same object & comparing them is an identity check. A shared element has more than
+        one parent, so its `parent` is cleared once it is reused.
+
+        Text & attribute values are shared in the same way, by value.
+    """
+    def __init__(self):
+        self.__elements = {}  # type: Dict[tuple, Element]
+        self.__strings = {}  # type: Dict[str, str]
+
+    def __len__(self):
+        return len(self.__elements)
+
+    def share_string(self, value: str) -> str:
+        """
+            Returns the shared string equal to the given one
+        """
+        return self.__strings.setdefault(value, value)
+
+    def share_element(self, element: Element) -> Element:
+        """
+            Returns the shared element identical to the given (completed) element, which becomes the shared element if
+            there is none yet
+        """
+        strings = self.__strings
+        attributes = element.attributes
+        for name, value in attributes.items():
+            attributes[name] = strings.setdefault(value, value)
+
+        content = []
+        for item in element.content:
+            if isinstance(item, Element):
+                content.append(id(item))
+            elif isinstance(item, ProcessingInstruction):
+                content.append((item.target, item.data))
+            else:
+                content.append(item.text)
+
+        key = (element.name, element.qname, element.is_self_closing, tuple(attributes.items()), tuple(content))
+        shared = self.__elements.setdefault(key, element)
+        if shared is not element:
+            shared.parent = None
+        return shared
@@ -1,7 +1,10 @@
 import re
+from typing import Optional
+
+from Options import ParserOptions, DEFAULT_OPTIONS
 from RegularExpressions import RegEx
 import Helpers
-from .Error import XMLError, DisallowedCharacterError
+from .Error import XMLError
 
 
 class Text:
@@ -9,36 +12,92 @@ class Text:
         Represents a chunk of text between xml markup elements. See xml spec ch2.4.
 
         todo - describe how this class works
+
+        Most text is a single run of characters copied verbatim from the document. When parsed from a document (see
+        `add_text`), such text is kept as a span of the document's source & only sliced out as a string on first
+        access of `text`. Text with references, CDATA sections or line endings to normalise is copied as it is parsed.
+        A span keeps the document's source alive until its text is read.
     """
 
-    def __init__(self):
-        self.text = ""  # type: str
+    def __init__(self, options: Optional[ParserOptions] = None):
+        self.__text = ""  # type: str
+        self.options = options or DEFAULT_OPTIONS
+
+        # The span of the source the text is, if the text hasn't been read yet
+        self.__buffer = None  # type: Optional[str]
+        self.__start = 0  # type: int
+        self.__end = 0  # type: int
+
+        # The element containing this text, & the text's position in document order (see `Element.order`)
+        self.parent = None
+        self.order = None  # type: Optional[int]
+
+        # The xml this text started in, kept until the text is checked so errors can be located
+        self.__source = None  # type: Optional[str]
+
+        # Whether any of the text came from a CDATA section or character reference rather than literal characters
+        self.__escaped = False  # type: bool
+
+    @property
+    def text(self) -> str:
+        if self.__buffer is not None:
+            self.__text = self.__buffer[self.__start:self.__end]
+            self.__buffer = None
+        return self.__text
+
+    @text.setter
+    def text(self, value: str):
+        self.__text = value
+        self.__buffer = None
+
+    @property
+    def is_span(self) -> bool:
+        """
+            Whether the text is still a span of its source, i.e. has not been read or copied
+        """
+        return self.__buffer is not None
+
+    def __getstate__(self) -> dict:
+        """
+            Text is pickled as a string rather than a span, without the source it refers to
+        """
+        state = self.__dict__.copy()
+        state["_Text__text"] = self.text
+        state["_Text__buffer"] = None
+        state["_Text__source"] = None
+        return state
 
-    def add_text(self, xml) -> str:
+    def add_text(self, xml, normalise_newlines: bool = True, buffer: Optional[str] = None) -> str:
         """
             Parses the given xml until it reaches a markup, and adds the preceeding text to this class.
+            If a `buffer` is given, which the xml is a suffix of (e.g. the document), text copied verbatim from the
+            xml is kept as a span of the buffer rather than copied.
 
             Parses up until an element tag, comment, processing instruction or general entity,
             then returns the markup and following xml unparsed to be handled by the parent element.
 
             Appends all the text before the markup to this class's text property, and:
+                - normalises line endings, unless `normalise_newlines` is False (for entity replacement text)
                 - removes & skips past CDATA tags
                 - expands character references
                 - ensures no ']]>' in character data
                 - todo - Ensure each piecewise chunk of text conforms to xmlspec::Char?
         """
+        if self.__source is None:
+            self.__source = xml
+
         # Keep parsing text until we reach a non-text element
         while True:
             # Jump to the next interesting character
             match = re.search("[<&\\]]", xml)
             # If there are no more interesting characters, append all
             if not match:
-                self.text += xml
+                self.__add_run(xml, len(xml), normalise_newlines, buffer)
                 return ""
             index = match.start()
 
             # Handle jumped text
-            self.text += xml[:index]
+            self.__add_run(xml, index, normalise_newlines, buffer)
             xml = xml[index:]
 
             # CDATA
@@ -47,7 +106,8 @@ class Text:
                 end_index = xml.find("]]>")
                 if end_index == -1:
                     raise XMLError("Unable to find end of CDATA section", source=xml)
-                self.text += xml[9:end_index]
+                self.text += Helpers.normalise_newlines(xml[9:end_index]) if normalise_newlines else xml[9:end_index]
+                self.__escaped = True
                 xml = xml[end_index + 3:]
                 continue
 
@@ -60,32 +120,73 @@ class Text:
                 reference = xml[:end_index + 1]
 
                 # Fetch expansion text
-                expansion_text = Helpers.parse_reference(reference,
-                                                         expand_general_entities=False,
-                                                         expand_parameter_entities=False)
+                try:
+                    expansion_text = Helpers.parse_reference(reference,
+                                                             expand_general_entities=False,
+                                                             expand_parameter_entities=False)
+                except XMLError as error:
+                    error.relocate(xml)
+                    raise
 
                 # Append expansion it to text
                 self.text += expansion_text
+                self.__escaped = True
                 xml = xml[end_index + 1:]
                 continue
 
             # Disallow CDATA end tags in normal text
-            if xml[:3] == "]]>":
+            if xml[:3] == "]]>" and self.options.check_structure:
                 raise XMLError("Disallowed sequence ']]>' in text", source=xml)
 
             # Allow ']' if it is not part of above pattern
             elif xml[:1] == "]":
-                self.text += xml[:1]
+                self.__add_run(xml, 1, normalise_newlines, buffer)
                 xml = xml[1:]
                 continue
 
             # Otherwise pass control back up to parent element to handle xml markup
             return xml
 
+    def __add_run(self, xml: str, end: int, normalise_newlines: bool, buffer: Optional[str]):
+        """
+            Adds the verbatim text at the start of the given xml, up to `end`. The text is kept as a span of the buffer
+            if there is one, the text so far is a span ending where this text starts, & no line endings need
+            normalising
+        """
+        if end == 0:
+            return
+        if buffer is not None and (not normalise_newlines or xml.find("\r", 0, end) == -1):
+            start = len(buffer) - len(xml)
+            if self.__buffer is None and not self.__text:
+                self.__buffer, self.__start, self.__end = buffer, start, start + end
+                return
+            if self.__buffer is buffer and self.__end == start:
+                self.__end += end
+                return
+        self.text += Helpers.normalise_newlines(xml[:end]) if normalise_newlines else xml[:end]
+
+    def is_whitespace(self, literal: bool = False) -> bool:
+        """
+            Whether the text is only whitespace, checked without reading a span of the source.
+            If `literal`, whitespace from CDATA sections or character references doesn't count, as in element-only
+            content, which may only contain literal xmlspec::S between its children
+        """
+        if literal and self.__escaped:
+            return False
+        if self.__buffer is not None:
+            return RegEx.Whitespace.fullmatch(self.__buffer, self.__start, self.__end) is not None
+        return RegEx.Whitespace.fullmatch(self.__text) is not None
+
     def check_wellformedness(self):
         """
             Ensures that the accumulated text conforms to xmlspec::Char
         """
-        # Check text conforms to xmlspec::Char
-        if not RegEx.CharSequence.fullmatch(self.text):
-            raise DisallowedCharacterError(self.text, "text", conforms_to="Char", source=None)
+        # Check text conforms to xmlspec::Char, in place if the text is a span of the source
+        if self.options.check_characters:
+            if self.__buffer is not None:
+                Helpers.check_char_sequence(self.__buffer, "text", self.__source, start=self.__start, end=self.__end)
+            else:
+                Helpers.check_char_sequence(self.__text, "text", self.__source)
+
+        # The source is no longer needed once the text is known to be well-formed
+        self.__source = None
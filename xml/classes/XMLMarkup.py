@@ -1,4 +1,6 @@
-from typing import Dict
+from typing import Dict, Optional
+
+from Options import ParserOptions
 from .Entity import Entity
 
 
@@ -15,7 +17,7 @@ class XMLMarkup:
         PI object), rather every xml element should be instantiated using XMLClass(remaining_xml).
         This class will automatically create the correct subclass object during instantiation.
     """
-    def __new__(cls, remaining_xml: str):
+    def __new__(cls, remaining_xml: str, options: Optional[ParserOptions] = None):
         """
             Override __new__ method to return an object of the correct subclass for the given xml data instead of a
             generic XMLMarkup object.
@@ -25,26 +27,39 @@ class XMLMarkup:
         """
         # Import subclasses
         from .Element import Element
+        from .LazyElement import LazyElement
         from .ProcessingInstruction import ProcessingInstruction
         from .Comment import Comment
 
         # PROCESSING INSTRUCTIONS
         if remaining_xml[:2] == "<?":
             markup_object = super().__new__(ProcessingInstruction)
-            markup_object.__init__(remaining_xml)
+            markup_object.__init__(remaining_xml, options)
             return markup_object
 
         # COMMENTS
         if remaining_xml[:4] == "<!--":
             markup_object = super().__new__(Comment)
-            markup_object.__init__(remaining_xml)
+            markup_object.__init__(remaining_xml, options)
             return markup_object
 
         # ELEMENTS
-        markup_object = super().__new__(Element)
-        markup_object.__init__(remaining_xml)
+        # Unless a specific type of element was requested, build elements lazily if the options ask for it
+        if not issubclass(cls, Element):
+            cls = LazyElement if options is not None and options.lazy else Element
+        markup_object = super().__new__(cls)
+        markup_object.__init__(remaining_xml, options)
         return markup_object
 
+    def __reduce__(self):
+        """
+            Markup is unpickled without calling `__new__`, which needs the xml to parse
+        """
+        return object.__new__, (type(self),), self.__getstate__()
+
+    def __getstate__(self) -> dict:
+        return self.__dict__
+
     def parse_to_end(self, general_entities: Dict[str, Entity]) -> str:
         """
             Parses to the end of this element, and returns a string containing the remaining xml in the sequence.
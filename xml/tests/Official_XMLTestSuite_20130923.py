@@ -1,45 +1,281 @@
-from tests.generate_canonical_xml import canonical_form
-from classes.Error import XMLError
+"""
+    Runs the official W3C xml conformance suite (xmltest, 2013-09-23) against the parser.
+
+    Every case in the suite is discovered from the `official_suite` directory & parsed in a pool of worker processes.
+    Each case records whether it passed along with its parse time and peak memory, so the suite doubles as a corpus of
+    small, awkward documents for catching pathological slow paths:
+
+        python xml/tests/Official_XMLTestSuite_20130923.py --slowest 10
+        python xml/tests/Official_XMLTestSuite_20130923.py --section sa --section not-sa --save results.json
+
+    It also runs as a unittest module, with one subtest per standalone case.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
 import unittest
-from xml.xml import parse_file
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+# The parser modules import each other relative to the package directory
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [path for path in [REPOSITORY, os.path.join(REPOSITORY, "xml")] if path not in sys.path]
+
+from tests.generate_canonical_xml import canonical_form  # noqa: E402
+from classes.Error import XMLError  # noqa: E402
+from xml.xml import parse_file  # noqa: E402
+
+SUITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "official_suite", "xmltest")
+
+# Cases slower than this multiple of the median parse time are flagged as slow
+SLOW_FACTOR = 10
+
+
+"""
+    ==========
+    DISCOVERY
+    ==========
+"""
+
+
+class Case:
+    """
+        A single case from the suite.
+
+        Attributes:
+            kind        What the parser must do with the document, one of:
+                            NOT_WF      Raise an XMLError
+                            VALID       Parse it, producing the canonical form in `output`
+                            INVALID     Parse it (the parser is non-validating, so validity errors are ignored)
+            section     Which documents it depends on: 'sa' (standalone), 'ext-sa' or 'not-sa'
+            path        The path to the document
+            output      The path to the document's expected canonical form, for valid cases
+    """
+    class Kind:
+        NOT_WF = "not-wf"
+        VALID = "valid"
+        INVALID = "invalid"
+
+    def __init__(self, kind: str, section: str, path: str, output: Optional[str] = None):
+        self.kind = kind  # type: str
+        self.section = section  # type: str
+        self.path = path  # type: str
+        self.output = output  # type: Optional[str]
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}/{self.section}/{os.path.basename(self.path)}"
+
+
+SECTIONS = ["sa", "ext-sa", "not-sa"]
+
+
+def discover_cases(sections: List[str] = None) -> List[Case]:
+    """
+        Finds every case in the given sections of the suite (by default, only the standalone cases)
+    """
+    cases = []
+    for section in sections or ["sa"]:
+        for kind in [Case.Kind.NOT_WF, Case.Kind.VALID, Case.Kind.INVALID]:
+            # Standalone invalid cases sit directly in the 'invalid' directory
+            directory = os.path.join(SUITE, kind) if kind == Case.Kind.INVALID and section == "sa" else \
+                os.path.join(SUITE, kind, section)
+            if not os.path.isdir(directory):
+                continue
+
+            for file_name in sorted(os.listdir(directory)):
+                if not file_name.endswith(".xml"):
+                    continue
+                output = None
+                if kind == Case.Kind.VALID:
+                    output = os.path.join(directory, "out", file_name)
+                    if not os.path.isfile(output):
+                        output = None
+                cases.append(Case(kind, section, os.path.join(directory, file_name), output))
+    return cases
+
+
+"""
+    ========
+    RUNNING
+    ========
+"""
+
+
+class CaseResult:
+    """
+        The outcome of running a single case.
+
+        Attributes:
+            name        The case's name (see `Case.name`)
+            passed      Whether the parser did what the case requires
+            message     Why the case failed, or None if it passed
+            seconds     The time taken to parse the document
+            peak_bytes  The peak memory allocated while parsing the document
+    """
+    def __init__(self, name: str, passed: bool, message: Optional[str], seconds: float, peak_bytes: int):
+        self.name = name  # type: str
+        self.passed = passed  # type: bool
+        self.message = message  # type: Optional[str]
+        self.seconds = seconds  # type: float
+        self.peak_bytes = peak_bytes  # type: int
+
+    def as_dict(self) -> Dict:
+        return {
+            "passed": self.passed,
+            "message": self.message,
+            "seconds": self.seconds,
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+def run_case(case: Case) -> CaseResult:
+    """
+        Parses the case's document & checks the outcome. Runs in a worker process, so all failures are returned rather
+        than raised
+    """
+    document = None
+    error = None
+    start = time.perf_counter()
+    try:
+        document = parse_file(case.path)
+    except Exception as exception:
+        error = exception
+    seconds = time.perf_counter() - start
+
+    # Measure memory in a separate run as tracing slows the parser down
+    tracemalloc.start()
+    try:
+        parse_file(case.path)
+    except Exception:
+        pass
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def result(message: Optional[str] = None) -> CaseResult:
+        return CaseResult(case.name, message is None, message, seconds, peak_bytes)
+
+    # Anything other than an XMLError is a crash, whatever the case expects
+    if error is not None and not isinstance(error, XMLError):
+        return result(f"Crashed with {type(error).__name__}: {error}")
+
+    if case.kind == Case.Kind.NOT_WF:
+        return result("Parsed a document that is not well-formed" if error is None else None)
+
+    if error is not None:
+        return result(f"Rejected a well-formed document: {error}")
+
+    if case.kind == Case.Kind.VALID and case.output is not None:
+        try:
+            parsed_xml = canonical_form(document)
+        except Exception as exception:
+            return result(f"Unable to produce canonical form: {type(exception).__name__}: {exception}")
+        with open(case.output) as file:
+            if file.read() != parsed_xml:
+                return result("Canonical form does not match the expected output")
+    return result()
+
+
+def run_suite(cases: List[Case], workers: Optional[int] = None) -> List[CaseResult]:
+    """
+        Runs the cases across a pool of worker processes, returning their results in the same order
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_case, cases, chunksize=max(1, len(cases) // (4 * (os.cpu_count() or 1)))))
+
+
+"""
+    ==========
+    REPORTING
+    ==========
+"""
+
+
+def slow_cases(results: List[CaseResult], factor: float = SLOW_FACTOR) -> List[CaseResult]:
+    """
+        The cases taking more than `factor` times the median parse time, slowest first
+    """
+    if not results:
+        return []
+    median = statistics.median(result.seconds for result in results)
+    return sorted([result for result in results if result.seconds > factor * median],
+                  key=lambda result: result.seconds, reverse=True)
+
+
+def report(results: List[CaseResult], slowest: int):
+    failures = [result for result in results if not result.passed]
+    for result in failures:
+        print(f"FAIL {result.name}: {result.message}")
+
+    print(f"\n{len(results) - len(failures)}/{len(results)} cases passed")
+    if results:
+        print(f"total parse time {sum(result.seconds for result in results) * 1000:.2f}ms, "
+              f"median {statistics.median(result.seconds for result in results) * 1000:.3f}ms")
+
+    print(f"\nSlowest {slowest} cases:")
+    flagged = {result.name for result in slow_cases(results)}
+    for result in sorted(results, key=lambda result: result.seconds, reverse=True)[:slowest]:
+        marker = "SLOW" if result.name in flagged else ""
+        print(f"{result.name:>28}  {result.seconds * 1000:9.3f}ms  peak {result.peak_bytes / 1000:9.1f} KB  {marker}")
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--section", action="append", choices=SECTIONS, help="Section to run (default: sa)")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: one per cpu)")
+    parser.add_argument("--slowest", type=int, default=10, help="Number of slowest cases to list")
+    parser.add_argument("--save", metavar="PATH", help="Save the per-case results as json")
+    options = parser.parse_args(arguments)
+
+    results = run_suite(discover_cases(options.section), options.workers)
+    report(results, options.slowest)
+
+    if options.save:
+        with open(options.save, "w") as file:
+            json.dump({result.name: result.as_dict() for result in results}, file, indent=2)
+
+    return 0 if all(result.passed for result in results) else 1
+
+
+"""
+    =========
+    UNITTEST
+    =========
+"""
 
 
 class test_XMLTest(unittest.TestCase):
+    results = {}  # type: Dict[str, CaseResult]
+
+    @classmethod
+    def setUpClass(cls):
+        cases = discover_cases()
+        cls.results = {case.name: result for case, result in zip(cases, run_suite(cases))}
+
+    def __check(self, kind: str):
+        for name, result in self.results.items():
+            if name.startswith(f"{kind}/"):
+                with self.subTest(name):
+                    self.assertTrue(result.passed, result.message)
+
     def test_illformed_xml(self):
-        with self.subTest("Standalone"):
-            for i in range(1, 187):
-                num = "{0:0=3d}".format(i)
-                with self.subTest(num):
-                    with self.assertRaises(XMLError):
-                        parse_file(f"official_suite/xmltest/not-wf/sa/{num}.xml")
+        self.__check(Case.Kind.NOT_WF)
 
     def test_valid_xml(self):
-        with self.subTest("Standalone"):
-            for i in range(1, 120):
-                num = "{0:0=3d}".format(i)
-                with self.subTest(num):
-                    # Parse file & convert to canonical form
-                    document = parse_file(f"official_suite/xmltest/valid/sa/{num}.xml")
-                    parsed_xml = canonical_form(document)
-
-                    # Load the test required canonical form
-                    with open(f"official_suite/xmltest/valid/sa/out/{num}.xml") as file:
-                        expected_xml = file.read()
-                        self.assertEqual(expected_xml, parsed_xml)
+        self.__check(Case.Kind.VALID)
 
     def test_invalid_xml(self):
-        with self.subTest("Standalone"):
-            for num in ["002", "005", "006"]:
-                with self.subTest(num):
-                    parse_file(f"official_suite/xmltest/invalid/{num}.xml")
+        self.__check(Case.Kind.INVALID)
 
     def test_test(self):
-        num = "018"
-        # Parse file & convert to canonical form
-        document = parse_file(f"official_suite/xmltest/valid/sa/{num}.xml")
-        parsed_xml = canonical_form(document)
-
-        # Load the test required canonical form
-        with open(f"official_suite/xmltest/valid/sa/out/{num}.xml") as file:
-            expected_xml = file.read()
-            self.assertEqual(expected_xml, parsed_xml)
+        result = run_case(Case(Case.Kind.VALID, "sa", os.path.join(SUITE, "valid", "sa", "018.xml"),
+                               os.path.join(SUITE, "valid", "sa", "out", "018.xml")))
+        self.assertTrue(result.passed, result.message)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
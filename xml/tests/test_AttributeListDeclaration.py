@@ -0,0 +1,116 @@
+import unittest
+
+import Events
+from Options import ParserOptions
+from classes.AttributeListDeclaration import AttributeListDeclaration, AttributeDefinition, normalise_tokens
+from classes.Document import Document
+from classes.Error import XMLError, ValidityError
+
+VALIDATE = ParserOptions(validate=True)
+DTD = "<!DOCTYPE doc [<!ENTITY e 'entity'><!ELEMENT doc (item*)><!ELEMENT item EMPTY>" \
+      "<!ATTLIST doc version CDATA #FIXED '1.0'>" \
+      "<!ATTLIST item id ID #REQUIRED\n ref IDREFS #IMPLIED kind (a | b) 'a'>" \
+      "<!ATTLIST item tokens NMTOKENS ' x  y ' kind CDATA 'ignored' note CDATA '&e; text'>]>"
+
+
+def declaration(xml: str) -> AttributeListDeclaration:
+    attribute_list_declaration = AttributeListDeclaration(xml)
+    attribute_list_declaration.parse_to_end({})
+    return attribute_list_declaration
+
+
+def parse(body: str, options: ParserOptions = ParserOptions()) -> Document:
+    document = Document(DTD + body, options)
+    document.parse()
+    return document
+
+
+class AttributeListDeclarationTests(unittest.TestCase):
+    def test_definitions(self):
+        definitions = declaration("<!ATTLIST a b CDATA #IMPLIED c ID #REQUIRED d NOTATION (n|m) #FIXED 'n' "
+                                  "e (x | y) \"x\" xml:lang NMTOKEN 'en'>").definitions
+        self.assertEqual([("b", "CDATA", [], "#IMPLIED", None),
+                          ("c", "ID", [], "#REQUIRED", None),
+                          ("d", "NOTATION", ["n", "m"], "#FIXED", "n"),
+                          ("e", "ENUMERATION", ["x", "y"], "DEFAULT", "x"),
+                          ("xml:lang", "NMTOKEN", [], "DEFAULT", "en")],
+                         [(definition.name, definition.type, definition.values, definition.default_type,
+                           definition.default) for definition in definitions])
+
+    def test_malformed_declarations(self):
+        for xml in ["<!ATTLIST a b CDATA>", "<!ATTLIST a b STRING #IMPLIED>", "<!ATTLIST a b (x|) 'x'>",
+                    "<!ATTLIST a b CDATA #IMPLIEDc ID #IMPLIED>", "<!ATTLIST a b CDATA #REQUIRED'x'>",
+                    "<!ATTLIST a b CDATA #FIXED'x'>", "<!ATTLIST a b CDATA '<'>",
+                    "<!ATTLIST a b IDS #IMPLIED>",
+                    "<!ATTLIST a b CDATA 'x", "<!ATTLIST a b NOTATION n #IMPLIED>"]:
+            with self.subTest(xml):
+                with self.assertRaises(XMLError):
+                    declaration(xml)
+
+    def test_external_entity_in_default(self):
+        document = Document("<!DOCTYPE doc [<!ENTITY e SYSTEM 'nul'><!ATTLIST doc a CDATA '&e;'>]><doc/>")
+        with self.assertRaises(XMLError):
+            document.parse()
+
+    def test_normalise_tokens(self):
+        self.assertEqual("a b", normalise_tokens("  a   b "))
+        self.assertEqual("a b", normalise_tokens("a b"))
+
+
+class AttributeListTests(unittest.TestCase):
+    def test_defaults_applied(self):
+        document = parse("<doc><item id='i1' kind='b'/></doc>")
+        self.assertEqual({"version": "1.0"}, document.root.attributes)
+        self.assertEqual({"id": "i1", "kind": "b", "tokens": "x y", "note": "entity text"},
+                         document.root.children[0].attributes)
+
+    def test_first_definition_binds(self):
+        definition = parse("<doc/>").attribute_lists["item"].definitions["kind"]
+        self.assertEqual(AttributeDefinition.Type.ENUMERATION, definition.type)
+
+    def test_tokenized_values_normalised(self):
+        document = parse("<doc><item id=' i1 ' tokens='&#32;a&#32;&#32;b'/></doc>")
+        self.assertEqual("i1", document.root.children[0].attributes["id"])
+        self.assertEqual("a b", document.root.children[0].attributes["tokens"])
+
+    def test_ids(self):
+        document = parse("<doc><item id='a'/><item id='b'/></doc>")
+        self.assertIs(document.root.children[1], document.ids["b"])
+
+    def test_events(self):
+        events = list(Events.iter_events(DTD + "<doc><item id='i1'/></doc>"))
+        self.assertEqual({"id": "i1", "kind": "a", "tokens": "x y", "note": "entity text"}, events[1][2])
+
+    def test_valid(self):
+        parse("<doc version='1.0'><item id='a' ref='b  a'/><item id='b' kind='b'/></doc>", VALIDATE)
+
+    def test_invalid(self):
+        cases = {
+            "Undeclared attribute": "<doc><item id='a' other='1'/></doc>",
+            "Missing required attribute": "<doc><item/></doc>",
+            "Wrong fixed value": "<doc version='2.0'/>",
+            "Value not in enumeration": "<doc><item id='a' kind='c'/></doc>",
+            "Repeated ID": "<doc><item id='a'/><item id='a'/></doc>",
+            "Invalid ID": "<doc><item id='1'/></doc>",
+            "Unmatched IDREF": "<doc><item id='a' ref='a b'/></doc>",
+        }
+        for name, body in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(ValidityError):
+                    parse(body, VALIDATE)
+                parse(body)
+
+    def test_lazy_idrefs(self):
+        # IDREFs in a lazily built document are checked once the whole tree is built
+        options = ParserOptions(validate=True, lazy=True)
+        document = parse("<doc><item id='a' ref='a b'/></doc>", options)
+        with self.assertRaises(ValidityError):
+            document.root.materialise(recursive=True)
+        parse("<doc><item id='a' ref='a'/><item id='b' ref='a b'/></doc>", options).root.materialise(recursive=True)
+
+    def test_notation_declarations(self):
+        document = Document("<!DOCTYPE a [<!NOTATION n PUBLIC 'pub'><!NOTATION m SYSTEM 'sys'>]><a/>")
+        document.parse()
+        self.assertEqual({"n": ("pub", None), "m": (None, "sys")}, document.notations)
+        with self.assertRaises(XMLError):
+            Document("<!DOCTYPE a [<!NOTATION n PUBLIC '[' 'sys'>]><a/>").parse()
@@ -0,0 +1,55 @@
+import unittest
+from array import array
+
+import Columns
+from Columns import Field
+from classes.Error import XMLError
+
+ROWS = "<rows>\n  <row id='1'><price> 2.5 </price><name>a</name><name>ignored</name></row>\n" \
+       "  <row id='2'>own <price>-1e3</price> text<name>b<i>!</i></name></row>\n  <total>3</total>\n</rows>"
+
+
+class ExtractColumnsTests(unittest.TestCase):
+    def test_columns(self):
+        columns = Columns.extract_columns(ROWS, "/rows/row", [Field("id", "@id", Field.Type.INT),
+                                                               Field("price", "price", Field.Type.FLOAT),
+                                                               Field("name", "name"),
+                                                               Field("text", ".")])
+        self.assertEqual(array("q", [1, 2]), columns["id"])
+        self.assertEqual(array("d", [2.5, -1000.0]), columns["price"])
+        self.assertEqual(["a", "b!"], columns["name"])
+        self.assertEqual(["", "own  text"], columns["text"])
+
+    def test_defaults(self):
+        columns = Columns.extract_columns(ROWS, "//row", [Field("missing", "@missing", Field.Type.INT, default="0")])
+        self.assertEqual(array("q", [0, 0]), columns["missing"])
+        with self.assertRaises(ValueError):
+            Columns.extract_columns(ROWS, "//row", [Field("missing", "missing")])
+
+    def test_invalid_fields(self):
+        cases = {
+            "Unknown type": lambda: Field("a", "@a", "complex"),
+            "Empty source": lambda: Field("a", ""),
+            "Repeated name": lambda: Columns.extract_columns(ROWS, "//row", [Field("a", "@id"), Field("a", "name")]),
+            "Invalid path": lambda: Columns.extract_columns(ROWS, "row", [Field("a", "@id")]),
+            "Unconvertible value": lambda: Columns.extract_columns(ROWS, "//row", [Field("a", "name", "int")]),
+            "Out of range value": lambda: Columns.extract_columns("<r a='99999999999999999999'/>", "/r",
+                                                                  [Field("a", "@a", "int")]),
+        }
+        for name, case in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(ValueError):
+                    case()
+
+    def test_parse_errors(self):
+        with self.assertRaises(XMLError):
+            Columns.extract_columns("<rows><row id='1'></rows>", "/rows/row", [Field("id", "@id")])
+
+    @unittest.skipIf(Columns.numpy is None, "NumPy is not installed")
+    def test_numpy(self):
+        columns = Columns.extract_columns(ROWS, "/rows/row", [Field("id", "@id", Field.Type.INT),
+                                                               Field("price", "price", Field.Type.FLOAT),
+                                                               Field("name", "name")], as_numpy=True)
+        self.assertEqual("int64", columns["id"].dtype)
+        self.assertEqual([2.5, -1000.0], columns["price"].tolist())
+        self.assertEqual(["a", "b!"], columns["name"].tolist())
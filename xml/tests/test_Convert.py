@@ -0,0 +1,54 @@
+import io
+import json
+import unittest
+
+import Convert
+from classes.Error import XMLError
+
+ORDERS = "<orders>\n  <order id='1'><item>a</item><item>b</item></order>\n" \
+         "  <order id='2'><item sku='x'>c</item><note/></order>\n</orders>"
+
+
+class DictConverterTests(unittest.TestCase):
+    def test_conventions(self):
+        self.assertEqual({"orders": {"order": [{"@id": "1", "item": ["a", "b"]},
+                                               {"@id": "2", "item": {"@sku": "x", "#text": "c"}, "note": None}]}},
+                         Convert.to_dict(ORDERS))
+
+    def test_custom_conventions(self):
+        converter = Convert.DictConverter(attribute_prefix="", text_key="value", force_list=["item"])
+        result = converter.convert(ORDERS)["orders"]["order"]
+        self.assertEqual({"id": "1", "item": ["a", "b"]}, result[0])
+        self.assertEqual({"id": "2", "item": [{"sku": "x", "value": "c"}], "note": None}, result[1])
+
+    def test_text(self):
+        cases = {
+            "<a>one<b/>two</a>": {"a": {"b": None, "#text": "onetwo"}},
+            "<a> &lt;x&gt; </a>": {"a": "<x>"},
+            "<a>\n  <!-- c -->\n</a>": {"a": None},
+        }
+        for xml, expected in cases.items():
+            with self.subTest(xml):
+                self.assertEqual(expected, Convert.to_dict(xml))
+        self.assertEqual({"a": " x "}, Convert.DictConverter(strip_whitespace=False).convert("<a> x </a>"))
+
+    def test_records(self):
+        records = list(Convert.DictConverter().iter_records(ORDERS, "/orders/order"))
+        self.assertEqual([{"order": {"@id": "1", "item": ["a", "b"]}},
+                          {"order": {"@id": "2", "item": {"@sku": "x", "#text": "c"}, "note": None}}], records)
+        self.assertEqual(["a", "b", {"@sku": "x", "#text": "c"}],
+                         [record["item"] for record in Convert.DictConverter().iter_records(ORDERS, "//item")])
+
+    def test_json_lines(self):
+        stream = io.StringIO()
+        self.assertEqual(2, Convert.DictConverter().write_json_lines(stream, ORDERS, "/orders/order"))
+        lines = stream.getvalue().splitlines()
+        self.assertEqual({"order": {"@id": "1", "item": ["a", "b"]}}, json.loads(lines[0]))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            Convert.DictConverter().iter_records(ORDERS, "orders")
+        records = Convert.DictConverter().iter_records("<a><b/><b></a>", "/a/b")
+        self.assertEqual({"b": None}, next(records))
+        with self.assertRaises(XMLError):
+            next(records)
@@ -0,0 +1,72 @@
+import unittest
+
+import Diff
+from Diff import Edit
+from Options import ParserOptions
+from classes.Document import Document
+
+
+def parse(xml: str, options: ParserOptions = None) -> Document:
+    document = Document(xml, options)
+    document.parse()
+    return document
+
+
+def describe(edits):
+    return [(edit.type, edit.path, edit.name, edit.old_value, edit.new_value, edit.position) for edit in edits]
+
+
+class DiffTests(unittest.TestCase):
+    def test_identical(self):
+        xml = "<rows><row id='1'>one<?pi data?></row><row id='2'/></rows>"
+        self.assertEqual([], Diff.diff(parse(xml), parse(xml)))
+
+    def test_attributes(self):
+        edits = Diff.diff(parse("<a><b x='1' y='2'/></a>"), parse("<a><b x='3' z='4'/></a>"))
+        self.assertEqual([(Edit.Type.UPDATE_ATTRIBUTE, "/a[1]/b[1]", "x", "1", "3", None),
+                          (Edit.Type.UPDATE_ATTRIBUTE, "/a[1]/b[1]", "y", "2", None, None),
+                          (Edit.Type.UPDATE_ATTRIBUTE, "/a[1]/b[1]", "z", None, "4", None)], describe(edits))
+
+    def test_text(self):
+        edits = Diff.diff(parse("<a><b/><b>one<c/>two</b></a>"), parse("<a><b/><b>one<c/>three</b></a>"))
+        self.assertEqual([(Edit.Type.UPDATE_TEXT, "/a[1]/b[2]/text()[2]", None, "two", "three", None)],
+                         describe(edits))
+
+    def test_shared_subtrees(self):
+        options = ParserOptions(share_subtrees=True)
+        edits = Diff.diff(parse("<a><b>one</b><c><b>one</b></c></a>", options),
+                          parse("<a><b>one</b><c><b>two</b></c></a>", options))
+        self.assertEqual([(Edit.Type.UPDATE_TEXT, "/a[1]/c[1]/b[1]/text()[1]", None, "one", "two", None)],
+                         describe(edits))
+
+    def test_insert_and_delete(self):
+        edits = Diff.diff(parse("<a><b/><c/><d/></a>"), parse("<a><b/><d/><e>new</e></a>"))
+        self.assertEqual([(Edit.Type.DELETE, "/a[1]/c[1]", None, None, None, None),
+                          (Edit.Type.INSERT, "/a[1]", None, None, None, 2)], describe(edits))
+        self.assertEqual("e", edits[1].node.name)
+
+    def test_unchanged_content_aligned(self):
+        # The inserted element doesn't cause the elements after it to be compared with the wrong old elements
+        old = "<a><b>1</b><b>2</b><b>3</b></a>"
+        edits = Diff.diff(parse(old), parse("<a><b>1</b><b>new</b><b>2</b><b>3</b></a>"))
+        self.assertEqual([(Edit.Type.INSERT, "/a[1]", None, None, None, 1)], describe(edits))
+
+    def test_key_attributes(self):
+        old = parse("<rows><row id='1'>a</row><row id='2'>b</row><row id='3'>c</row></rows>")
+        new = parse("<rows><row id='1'>a</row><row id='3'>C</row><row id='4'>d</row></rows>")
+        with self.subTest("Without keys"):
+            self.assertEqual([(Edit.Type.UPDATE_ATTRIBUTE, "/rows[1]/row[2]", "id", "2", "3", None),
+                              (Edit.Type.UPDATE_TEXT, "/rows[1]/row[2]/text()[1]", None, "b", "C", None),
+                              (Edit.Type.UPDATE_ATTRIBUTE, "/rows[1]/row[3]", "id", "3", "4", None),
+                              (Edit.Type.UPDATE_TEXT, "/rows[1]/row[3]/text()[1]", None, "c", "d", None)],
+                             describe(Diff.diff(old, new)))
+        with self.subTest("With keys"):
+            self.assertEqual([(Edit.Type.DELETE, "/rows[1]/row[2]", None, None, None, None),
+                              (Edit.Type.UPDATE_TEXT, "/rows[1]/row[3]/text()[1]", None, "c", "C", None),
+                              (Edit.Type.INSERT, "/rows[1]", None, None, None, 2)],
+                             describe(Diff.diff(old, new, key_attributes=["id"])))
+
+    def test_different_roots(self):
+        edits = Diff.diff(parse("<a/>"), parse("<b/>"))
+        self.assertEqual([(Edit.Type.DELETE, "/a[1]", None, None, None, None),
+                          (Edit.Type.INSERT, "/", None, None, None, 0)], describe(edits))
@@ -1,4 +1,5 @@
-from classes.Element import Element
+from classes.Document import Document
+from classes.Element import Element, sort_document_order
 from tests.mocks.MockEntity import MockEntity
 from classes.Error import XMLError
 import unittest
@@ -74,6 +75,25 @@ class ElementTests(unittest.TestCase):
         element.parse_to_end({})
         self.assertEqual({"attr1": "Value1", "attr2": "Value2"}, element.attributes)
 
+    def test_attribute_values_containing_markup_characters(self):
+        element = Element("<Element attr1='a > \"b\"' attr2=\"'/>'\">text</Element>")
+        element.parse_to_end({})
+        self.assertEqual({"attr1": "a > \"b\"", "attr2": "'/>'"}, element.attributes)
+        self.assertEqual("text", element.text[0].text)
+
+    def test_malformed_attributes(self):
+        cases = {
+            "Missing whitespace": "<Element attr1='a'attr2='b'/>",
+            "Missing value": "<Element attr/>",
+            "Invalid delimiter": "<Element attr=a/>",
+            "Unterminated value": "<Element attr='a/>",
+            "Unterminated tag": "<Element attr='a'",
+        }
+        for name, xml in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(XMLError):
+                    Element(xml).parse_to_end({})
+
     def test_attribute_general_entity_replacement(self):
         entity = MockEntity("entity", expansion_text="ENTITY TEXT")
         element = Element("<Element attr='Entity &entity; text'/>")
@@ -156,6 +176,17 @@ class ElementTests(unittest.TestCase):
         with self.assertRaises(XMLError):
             element.parse_to_end({})
 
+    def test_end_tag_name_prefixes(self):
+        for end_tag in ["</Element1>", "</Element12>", "</Element1 x>", "</Element1"]:
+            with self.subTest(end_tag):
+                element = Element(f"<Element>some text{end_tag} some more text")
+                with self.assertRaises(XMLError):
+                    element.parse_to_end({})
+
+    def test_end_tag_trailing_whitespace(self):
+        element = Element("<Element>some text</Element \n\t> some more text")
+        self.assertEqual(" some more text", element.parse_to_end({}))
+
 
 """
     =====================
@@ -211,3 +242,50 @@ class ElementNestingTests(unittest.TestCase):
         self.assertEqual("Target", element.processing_instructions[0].target)
 
         self.assertEqual(4, len(element.content))
+
+
+class DocumentOrderTests(unittest.TestCase):
+    def setUp(self):
+        self.document = Document("<a>one<b><c/>two<?pi?></b>three<d/></a>")
+        self.document.parse()
+
+    def test_numbering(self):
+        a = self.document.root
+        b, d = a.children
+        c = b.children[0]
+        nodes = [a, a.text[0], b, c, b.text[0], b.processing_instructions[0], a.text[1], d]
+        self.assertEqual(list(range(8)), [node.order for node in nodes])
+        self.assertEqual([7, 5, 3, 7], [a.end_order, b.end_order, c.end_order, d.end_order])
+        self.assertEqual(8, self.document.node_count)
+
+    def test_parents(self):
+        b = self.document.root.children[0]
+        self.assertIs(self.document.root, b.parent)
+        self.assertIs(b, b.text[0].parent)
+        self.assertIs(b, b.processing_instructions[0].parent)
+
+    def test_is_ancestor_of(self):
+        a = self.document.root
+        b, d = a.children
+        c = b.children[0]
+        with self.subTest("Descendants"):
+            self.assertTrue(a.is_ancestor_of(c))
+            self.assertTrue(b.is_ancestor_of(b.processing_instructions[0]))
+            self.assertTrue(a.is_ancestor_of(a.text[1]))
+        with self.subTest("Others"):
+            self.assertFalse(b.is_ancestor_of(b))
+            self.assertFalse(b.is_ancestor_of(d))
+            self.assertFalse(b.is_ancestor_of(a.text[1]))
+            self.assertFalse(c.is_ancestor_of(b))
+        with self.subTest("Unnumbered"):
+            element = Element("<a><b>text</b></a>")
+            element.parse_to_end({})
+            self.assertIsNone(element.order)
+            self.assertTrue(element.is_ancestor_of(element.children[0].text[0]))
+            self.assertFalse(element.children[0].is_ancestor_of(element))
+
+    def test_sort_document_order(self):
+        a = self.document.root
+        b, d = a.children
+        nodes = [d, a.text[1], b.children[0], a]
+        self.assertEqual([a, b.children[0], a.text[1], d], sort_document_order(nodes))
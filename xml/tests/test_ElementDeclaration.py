@@ -0,0 +1,122 @@
+import unittest
+
+import Records
+from Options import ParserOptions
+from classes.Document import Document
+from classes.ElementDeclaration import ElementDeclaration, ContentModel
+from classes.Error import XMLError, ValidityError
+
+VALIDATE = ParserOptions(validate=True)
+DTD = "<!DOCTYPE doc [<!ELEMENT doc (head?, (p | list)+, foot)><!ELEMENT head (#PCDATA)><!ELEMENT p (#PCDATA | b)*>" \
+      "<!ELEMENT b (#PCDATA)><!ELEMENT list (item, item*)><!ELEMENT item ANY><!ELEMENT foot EMPTY>]>"
+
+
+def declaration(xml: str) -> ElementDeclaration:
+    element_declaration = ElementDeclaration(xml)
+    element_declaration.parse_to_end()
+    return element_declaration
+
+
+def accepts(content_model: ContentModel, names: list) -> bool:
+    state = ContentModel.START
+    for name in names:
+        state = content_model.transitions[state].get(name)
+        if state is None:
+            return False
+    return content_model.accepting[state]
+
+
+class ContentModelTests(unittest.TestCase):
+    def test_content_types(self):
+        cases = {
+            "<!ELEMENT a EMPTY>": ElementDeclaration.Type.EMPTY,
+            "<!ELEMENT a ANY >": ElementDeclaration.Type.ANY,
+            "<!ELEMENT a (#PCDATA)>": ElementDeclaration.Type.MIXED,
+            "<!ELEMENT a ( #PCDATA | b | c )*>": ElementDeclaration.Type.MIXED,
+            "<!ELEMENT a (b)>": ElementDeclaration.Type.CHILDREN,
+        }
+        for xml, content_type in cases.items():
+            with self.subTest(xml):
+                self.assertEqual(content_type, declaration(xml).content_type)
+        self.assertEqual({"b", "c"}, declaration("<!ELEMENT a (#PCDATA|b|c)*>").mixed_names)
+
+    def test_automaton(self):
+        content_model = declaration("<!ELEMENT a (b?, (c | d)+, e*)>").content_model
+        for names in [["c"], ["b", "c"], ["b", "d", "c", "d"], ["c", "e", "e"]]:
+            with self.subTest(names):
+                self.assertTrue(accepts(content_model, names))
+        for names in [[], ["b"], ["b", "b", "c"], ["c", "e", "d"], ["e"]]:
+            with self.subTest(names):
+                self.assertFalse(accepts(content_model, names))
+
+    def test_nondeterministic_models_are_determinised(self):
+        content_model = declaration("<!ELEMENT a ((b, c) | (b, d))>").content_model
+        self.assertTrue(accepts(content_model, ["b", "c"]))
+        self.assertTrue(accepts(content_model, ["b", "d"]))
+        self.assertEqual(1, len(content_model.transitions[ContentModel.START]))
+
+    def test_expected(self):
+        content_model = declaration("<!ELEMENT a (b, c?)>").content_model
+        self.assertEqual("b", content_model.expected(ContentModel.START))
+        self.assertEqual("c, the end of the element", content_model.expected(1))
+
+    def test_malformed_declarations(self):
+        for xml in ["<!ELEMENT a>", "<!ELEMENTa EMPTY>", "<!ELEMENT a EMPTY", "<!ELEMENT a (b|c,d)>",
+                    "<!ELEMENT a (b) *>", "<!ELEMENT a (#PCDATA|b)>", "<!ELEMENT a (b,)>", "<!ELEMENT a empty>"]:
+            with self.subTest(xml):
+                with self.assertRaises(XMLError):
+                    declaration(xml)
+
+
+class ValidationTests(unittest.TestCase):
+    def parse(self, body: str, options: ParserOptions = VALIDATE) -> Document:
+        document = Document(DTD + body, options)
+        document.parse()
+        return document
+
+    def test_valid(self):
+        for body in ["<doc><p/><foot/></doc>",
+                     "<doc><head>h</head><p>a <b>b</b> c</p><list><item>x<b/></item></list><foot/></doc>",
+                     "<doc>\n  <p/>\n  <foot></foot>\n</doc>"]:
+            with self.subTest(body):
+                self.parse(body)
+
+    def test_invalid(self):
+        cases = {
+            "Undeclared element": "<doc><p/><foot/><x/></doc>",
+            "Wrong root": "<p/>",
+            "Missing child": "<doc><p/></doc>",
+            "Child out of order": "<doc><p/><head/><foot/></doc>",
+            "Child not in mixed content": "<doc><p><p/></p><foot/></doc>",
+            "Text in element content": "<doc>text<p/><foot/></doc>",
+            "Whitespace reference in element content": "<doc>&#32;<p/><foot/></doc>",
+            "Whitespace CDATA section in element content": "<doc><![CDATA[ ]]><p/><foot/></doc>",
+            "Text in empty element": "<doc><p/><foot> </foot></doc>",
+            "Processing instruction in empty element": "<doc><p/><foot><?pi?></foot></doc>",
+            "Incomplete self-closing element": "<doc><p/><list/><foot/></doc>",
+        }
+        for name, body in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(ValidityError):
+                    self.parse(body)
+                # Validity is only checked if asked for
+                self.parse(body, ParserOptions())
+
+    def test_error_location(self):
+        with self.assertRaises(ValidityError) as context:
+            self.parse("<doc>\n<p/>\n<head/>\n<foot/></doc>")
+        self.assertEqual((3, 1), (context.exception.line, context.exception.column))
+
+    def test_repeated_declaration(self):
+        with self.assertRaises(ValidityError):
+            Document("<!DOCTYPE a [<!ELEMENT a EMPTY><!ELEMENT a ANY>]><a/>", VALIDATE).parse()
+
+    def test_lazy_elements(self):
+        document = self.parse("<doc><list><item/><p/></list><foot/></doc>", ParserOptions(lazy=True, validate=True))
+        with self.assertRaises(ValidityError):
+            document.root.materialise(recursive=True)
+
+    def test_records(self):
+        records = Records.iter_records(DTD + "<doc><p/><head/><foot/></doc>", "/doc/p", options=VALIDATE)
+        with self.assertRaises(ValidityError):
+            list(records)
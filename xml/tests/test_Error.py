@@ -0,0 +1,59 @@
+import unittest
+
+from classes.Document import Document
+from classes.Error import XMLError, LineIndex
+
+
+class LineIndexTests(unittest.TestCase):
+    def test_positions(self):
+        index = LineIndex("ab\ncd\r\nef\rgh")
+        self.assertEqual((1, 1), index.position(0))
+        self.assertEqual((1, 3), index.position(2))
+        self.assertEqual((2, 1), index.position(3))
+        self.assertEqual((2, 2), index.position(4))
+        self.assertEqual((3, 1), index.position(7))
+        self.assertEqual((4, 2), index.position(11))
+
+
+class ErrorLocationTests(unittest.TestCase):
+    def parse_error(self, xml: str) -> XMLError:
+        with self.assertRaises(XMLError) as context:
+            Document(xml).parse()
+        return context.exception
+
+    def test_unlocated_without_document(self):
+        error = XMLError("Message", source="<root>")
+        self.assertIsNone(error.offset)
+        self.assertIsNone(error.line)
+        self.assertIsNone(error.column)
+
+    def test_mismatched_end_tag(self):
+        error = self.parse_error("<root>\n  <child>\n  </chlid>\n</root>")
+        self.assertEqual(9, error.offset)
+        self.assertEqual((2, 3), (error.line, error.column))
+
+    def test_text(self):
+        error = self.parse_error("<root>\n  text ]]> more\n</root>")
+        self.assertEqual(14, error.offset)
+        self.assertEqual((2, 8), (error.line, error.column))
+
+    def test_comment(self):
+        error = self.parse_error("<root>\n<!-- a -- b -->\n</root>")
+        self.assertEqual((2, 8), (error.line, error.column))
+
+    def test_attribute_value(self):
+        error = self.parse_error("<root>\n<child attr='&undeclared;'/>\n</root>")
+        self.assertEqual((2, 13), (error.line, error.column))
+
+    def test_entity_replacement_text(self):
+        error = self.parse_error("<!DOCTYPE root [<!ENTITY e '<a>'>]>\n<root>\n  &e;\n</root>")
+        self.assertEqual((3, 3), (error.line, error.column))
+
+    def test_prolog(self):
+        error = self.parse_error("<?xml version='1.0' standalone='maybe'?>\n<root/>")
+        self.assertIsNotNone(error.offset)
+        self.assertEqual(1, error.line)
+
+    def test_message_includes_location(self):
+        error = self.parse_error("<root>\n</toor>")
+        self.assertIn("Line 1, column 1", str(error))
@@ -0,0 +1,67 @@
+import unittest
+
+import Events
+from Events import START, END, TEXT, PI
+from Options import ParserOptions
+from classes.Error import XMLError
+
+
+def events(xml: str, options: ParserOptions = None) -> list:
+    return list(Events.iter_events(xml, options))
+
+
+class EventTests(unittest.TestCase):
+    def test_elements(self):
+        self.assertEqual([(START, "a", {"x": "1"}), (TEXT, "one"), (START, "b", {}), (END, "b"), (TEXT, "two"),
+                          (END, "a")],
+                         events("<?xml version='1.0'?><a x='1'>one<b/>two</a><!-- end -->"))
+
+    def test_text_is_coalesced(self):
+        xml = "<a>one <!-- c --> &amp; <![CDATA[<two>]]>&#33;\r\n</a>"
+        self.assertEqual([(START, "a", {}), (TEXT, "one  & <two>!\n"), (END, "a")], events(xml))
+
+    def test_processing_instructions(self):
+        self.assertEqual([(START, "a", {}), (TEXT, "x"), (PI, "pi", "data"), (PI, "empty", None), (END, "a")],
+                         events("<a>x<?pi data?><?empty?></a>"))
+
+    def test_entities(self):
+        xml = "<!DOCTYPE a [<!ENTITY e '<b>&f;</b>'><!ENTITY f 'text'>]><a v='&f;'>&e;</a>"
+        self.assertEqual([(START, "a", {"v": "text"}), (START, "b", {}), (TEXT, "text"), (END, "b"), (END, "a")],
+                         events(xml))
+
+    def test_matches_tree_whitespace_handling(self):
+        xml = "<!DOCTYPE a [<!ELEMENT a (b)*>]><a>\n  <b> </b>\n</a>"
+        self.assertEqual([(START, "a", {}), (START, "b", {}), (TEXT, " "), (END, "b"), (END, "a")],
+                         events(xml, ParserOptions(whitespace=ParserOptions.Whitespace.IGNORABLE)))
+        self.assertEqual([(START, "a", {}), (START, "b", {}), (END, "b"), (END, "a")],
+                         events(xml, ParserOptions(whitespace=ParserOptions.Whitespace.DROP)))
+
+    def test_document(self):
+        parser = Events.EventParser("<!DOCTYPE a [<!ENTITY e 'x'>]><a/>")
+        self.assertEqual([(START, "a", {}), (END, "a")], list(parser))
+        self.assertIn("e", parser.document.general_entities)
+
+    def test_errors(self):
+        cases = {
+            "Mismatched end-tag": "<a><b></a></b>",
+            "Unclosed element": "<a><b></b>",
+            "Repeated attribute": "<a x='1' x='2'/>",
+            "Invalid start-tag": "<a x=1/>",
+            "Invalid element name": "<a><1b/></a>",
+            "CDATA end in text": "<a>]]></a>",
+            "Double hyphen in comment": "<a><!-- -- --></a>",
+            "Invalid character": "<a>\u0001</a>",
+            "Undefined entity": "<a>&e;</a>",
+            "Recursive entity": "<!DOCTYPE a [<!ENTITY e '&e;'>]><a>&e;</a>",
+            "Unbalanced entity": "<!DOCTYPE a [<!ENTITY e '<b>'>]><a>&e;</b></a>",
+            "Content after root": "<a/><b/>",
+        }
+        for name, xml in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(XMLError):
+                    events(xml)
+
+    def test_error_location(self):
+        with self.assertRaises(XMLError) as context:
+            events("<a>\n  <b></c>\n</a>")
+        self.assertEqual((2, 6), (context.exception.line, context.exception.column))
@@ -0,0 +1,147 @@
+import unittest
+
+import Flat
+from Flat import FlatTree, FlatTreeBuilder, FlatNode
+from Options import ParserOptions
+from classes.Document import Document
+from classes.Element import Element
+from classes.Text import Text
+
+XML = "<a x='1' y='&#233;'><b>one<?pi data?><c/></b>two<b></b><?empty?>\U0001F600</a>"
+
+
+def parse(xml: str, options: ParserOptions = None) -> Document:
+    document = Document(xml, options)
+    document.parse()
+    return document
+
+
+def describe(node) -> tuple:
+    if isinstance(node, Element):
+        return (node.name, node.attributes, node.is_self_closing, [describe(item) for item in node.content],
+                [child.name for child in node.children])
+    if isinstance(node, Text):
+        return ("text", node.text)
+    return ("pi", node.target, node.data)
+
+
+class FlatTreeTests(unittest.TestCase):
+    def test_encode(self):
+        root = parse(XML).root
+        tree = FlatTree.encode([root])
+        self.assertEqual(9, len(tree))
+        self.assertEqual([0], list(tree.roots()))
+        self.assertEqual([1, 5, 6, 7, 8], list(tree.child_indices(0)))
+        self.assertEqual([-1, 0, 1, 1, 1, 0, 0, 0, 0], list(tree.parents))
+        self.assertEqual([FlatTree.Kind.ELEMENT, FlatTree.Kind.ELEMENT, FlatTree.Kind.TEXT,
+                          FlatTree.Kind.PROCESSING_INSTRUCTION, FlatTree.Kind.EMPTY_ELEMENT], list(tree.kinds)[:5])
+        self.assertEqual({"x": "1", "y": "é"}, tree.attributes(0))
+        self.assertEqual("b", tree.name(tree.names[6]))
+        self.assertEqual(tree.names[1], tree.names[6])
+
+    def test_round_trip(self):
+        root = parse(XML).root
+        encoded = FlatTree.encode(root.content)
+        cases = {
+            "Encoded": encoded,
+            "From bytes": FlatTree.from_buffer(encoded.to_bytes()),
+        }
+        for name, tree in cases.items():
+            with self.subTest(name):
+                parent = Element.build("a", {})
+                content = [tree.materialise(index, parent) for index in tree.roots()]
+                self.assertEqual([describe(item) for item in root.content], [describe(item) for item in content])
+                self.assertIs(parent, content[0].parent)
+                self.assertIs(content[0], content[0].content[0].parent)
+
+    def test_materialise_indices(self):
+        root = parse(XML).root
+        indices = {}
+        tree = FlatTree.encode([root], indices)
+        nodes = {}
+        copy = tree.materialise(0, nodes=nodes)
+        self.assertEqual(0, indices[id(root)])
+        self.assertIs(copy.children[0].children[0], nodes[indices[id(root.children[0].children[0])]])
+
+    def test_empty(self):
+        tree = FlatTree.from_buffer(FlatTree.encode([]).to_bytes())
+        self.assertEqual(0, len(tree))
+        self.assertEqual([], list(tree.roots()))
+
+    def test_invalid_buffer(self):
+        encoded = FlatTree.encode([parse(XML).root]).to_bytes()
+        for name, buffer in {"Tag": b"ABCD" + encoded[4:], "Truncated": encoded[:-8]}.items():
+            with self.subTest(name):
+                with self.assertRaises(ValueError):
+                    FlatTree.from_buffer(buffer)
+
+    def test_shared_memory(self):
+        root = parse(XML).root
+        segment = FlatTree.encode([root]).to_shared_memory()
+        segment.close()
+        tree = FlatTree.from_shared_memory(segment.name)
+        copy = tree.materialise(0)
+        tree.release()
+        self.assertEqual(describe(root), describe(copy))
+        with self.assertRaises(FileNotFoundError):
+            FlatTree.from_shared_memory(segment.name)
+
+    def test_namespaces(self):
+        options = ParserOptions(namespaces=True)
+        root = parse("<a xmlns='urn:a' xmlns:p='urn:p'><p:b p:x='1'/></a>", options).root
+        tree = FlatTree.encode(root.content)
+        child = tree.materialise(0, root)
+        self.assertIs(root.children[0].qname, child.qname)
+        self.assertEqual(root.children[0].qualified_attributes, child.qualified_attributes)
+
+
+class FlatNodeTests(unittest.TestCase):
+    def test_parse(self):
+        xml = "<!DOCTYPE a [<!ENTITY e 'entity'>]><a x='1'><b>one &e;<?pi data?></b>two<b y='2'></b></a>"
+        tree = Flat.parse(xml)
+        self.assertEqual(describe(parse(xml).root), describe(tree.root.materialise()))
+        self.assertIn("e", tree.document.general_entities)
+
+    def test_cursor(self):
+        root = Flat.parse("<a x='1'><b>one<?pi data?></b>two<b y='2'><c/>three</b></a>").root
+        first, text, second = root.content
+        with self.subTest("Element"):
+            self.assertEqual("a", root.name)
+            self.assertEqual({"x": "1"}, root.attributes)
+            self.assertEqual("1", root.get("x"))
+            self.assertIsNone(root.get("y"))
+            self.assertEqual([first, second], root.children)
+            self.assertEqual([text], root.text)
+            self.assertIsNone(root.parent)
+            self.assertEqual(root, first.parent)
+        with self.subTest("Text"):
+            self.assertEqual("two", text.text)
+            self.assertIsNone(text.name)
+            self.assertEqual([], text.content)
+        with self.subTest("Processing instruction"):
+            instruction = first.processing_instructions[0]
+            self.assertEqual(("pi", "data"), (instruction.target, instruction.data))
+        with self.subTest("Traversal"):
+            self.assertEqual(["b", "b", "c"], [node.name for node in root.iter()])
+            self.assertEqual([second], list(root.iter("b"))[1:])
+            self.assertEqual("onetwothree", root.text_content())
+            self.assertTrue(root.is_ancestor_of(second.children[0]))
+            self.assertFalse(first.is_ancestor_of(second))
+            self.assertEqual((0, 7), (root.order, root.end_order))
+            self.assertEqual(first.end_order, first.order + 2)
+
+    def test_equality(self):
+        tree = Flat.parse("<a><b/></a>")
+        self.assertEqual(tree.root.children[0], FlatNode(tree, 1))
+        self.assertEqual(1, len({tree.root, tree.node(0)}))
+        self.assertNotEqual(tree.root, Flat.parse("<a><b/></a>").root)
+
+    def test_builder_misuse(self):
+        builder = FlatTreeBuilder()
+        with self.subTest("Unopened element"):
+            with self.assertRaises(ValueError):
+                builder.end()
+        with self.subTest("Unended element"):
+            builder.start("a", {})
+            with self.assertRaises(ValueError):
+                builder.build()
@@ -0,0 +1,102 @@
+import unittest
+
+from Options import ParserOptions
+from classes.Document import Document
+from classes.Element import Element, sort_document_order
+from classes.LazyElement import LazyElement
+from classes.Error import XMLError
+from tests.mocks.MockEntity import MockEntity
+
+LAZY = ParserOptions(lazy=True)
+
+
+class LazyElementTests(unittest.TestCase):
+    def test_builds_on_access(self):
+        element = LazyElement("<root attr='value'>text<child><grandchild/></child><?pi data?></root> after", LAZY)
+        unparsed_xml = element.parse_to_end({})
+
+        self.assertEqual(" after", unparsed_xml)
+        self.assertEqual("root", element.name)
+        self.assertFalse(element.is_materialised)
+
+        self.assertEqual({"attr": "value"}, element.attributes)
+        self.assertTrue(element.is_materialised)
+        self.assertEqual("text", element.content[0].text)
+        self.assertEqual("pi", element.processing_instructions[0].target)
+
+        child = element.children[0]
+        self.assertIsInstance(child, LazyElement)
+        self.assertEqual("child", child.name)
+        self.assertFalse(child.is_materialised)
+        self.assertEqual("grandchild", child.children[0].name)
+
+    def test_matches_eager_parse(self):
+        xml = "<a x='1'> one <b>two<c y='&#65;'/>three</b><!-- c --> four &ent; <d/></a>"
+        entities = {"ent": MockEntity("ent", "<e>five</e>")}
+        eager = Element(xml)
+        eager.parse_to_end(entities)
+        lazy = LazyElement(xml, LAZY)
+        lazy.parse_to_end(entities)
+
+        def describe(element):
+            return (element.name, element.attributes,
+                    [describe(item) if isinstance(item, Element) else getattr(item, "text", None)
+                     for item in element.content])
+
+        self.assertEqual(describe(eager), describe(lazy))
+
+    def test_document_order(self):
+        element = LazyElement("<a>one<b><c/>two</b><d/></a>", LAZY)
+        element.parse_to_end({})
+        b, d = element.children
+        self.assertEqual([(0, 3), (1, 2), (3, 3)], [(e.order, e.end_order) for e in [element, b, d]])
+        self.assertFalse(b.is_materialised)
+        self.assertTrue(element.is_ancestor_of(d))
+        self.assertFalse(b.is_ancestor_of(d))
+        self.assertEqual((2, 2), (b.children[0].order, b.children[0].end_order))
+
+    def test_scan_errors_raised_on_parse(self):
+        element = LazyElement("<a><b></a>", LAZY)
+        with self.assertRaises(XMLError):
+            element.parse_to_end({})
+
+    def test_markup_before_root(self):
+        for xml in ["<![CDATA[x]]><r/>", "<!DOCTYPE r []><![CDATA[x]]><r>t</r>"]:
+            with self.subTest(xml=xml):
+                with self.assertRaises(XMLError):
+                    Document(xml, LAZY).parse()
+
+    def test_deferred_errors(self):
+        element = LazyElement("<a><b attr='&undeclared;'/></a>", LAZY)
+        element.parse_to_end({})
+        with self.assertRaises(XMLError):
+            element.materialise(recursive=True)
+
+    def test_deferred_errors_located(self):
+        document = Document("<?xml version='1.0'?>\n<r>\n  <a x='1' x='2'/>\n</r>", LAZY)
+        document.parse()
+        with self.assertRaises(XMLError) as context:
+            document.root.children[0].attributes
+        self.assertEqual(37, context.exception.offset)
+        self.assertEqual((3, 12), (context.exception.line, context.exception.column))
+
+    def test_document(self):
+        document = Document("<?xml version='1.0'?><root><child>text</child></root><!-- end -->", LAZY)
+        document.parse()
+        self.assertIsInstance(document.root, LazyElement)
+        self.assertEqual("text", document.root.children[0].text[0].text)
+
+    def test_entity_elements_not_numbered(self):
+        document = Document("<!DOCTYPE r [<!ENTITY e \"<x><y/></x>\">]><r><a><c/></a>&e;<b/></r>", LAZY)
+        document.parse()
+        root = document.root
+        a, x, b = root.children
+        self.assertEqual([(0, 3), (1, 2), (3, 3)], [(e.order, e.end_order) for e in [root, a, b]])
+        self.assertEqual((None, None), (x.order, x.end_order))
+        self.assertEqual((None, None), (x.children[0].order, x.children[0].end_order))
+        self.assertTrue(root.is_ancestor_of(x))
+        self.assertTrue(x.is_ancestor_of(x.children[0]))
+        self.assertFalse(a.is_ancestor_of(x))
+        self.assertEqual([a, b], sort_document_order([b, a]))
+        with self.assertRaises(ValueError):
+            sort_document_order([b, x, a])
@@ -0,0 +1,100 @@
+import unittest
+
+import Namespaces
+from Options import ParserOptions
+from classes.Document import Document
+from classes.Error import XMLError
+
+NAMESPACES = ParserOptions(namespaces=True)
+
+
+def parse(xml: str, options: ParserOptions = NAMESPACES) -> Document:
+    document = Document(xml, options)
+    document.parse()
+    return document
+
+
+class NameTableTests(unittest.TestCase):
+    def test_interning(self):
+        table = Namespaces.NameTable()
+        self.assertIs(table.qname("urn:a", "name"), table.qname("urn:a", "name"))
+        self.assertIsNot(table.qname("urn:a", "name"), table.qname("urn:b", "name"))
+        self.assertIsNot(table.qname(None, "name"), table.qname("urn:a", "name"))
+        self.assertEqual(3, len(table))
+
+    def test_split_name(self):
+        self.assertEqual(("", "name"), Namespaces.split_name("name"))
+        self.assertEqual(("a", "name"), Namespaces.split_name("a:name"))
+        for name in [":name", "a:", "a:b:c"]:
+            with self.subTest(name):
+                with self.assertRaises(XMLError):
+                    Namespaces.split_name(name)
+
+
+class NamespaceResolutionTests(unittest.TestCase):
+    def test_disabled_by_default(self):
+        document = parse("<a:root xmlns:a='urn:a'/>", ParserOptions())
+        self.assertIsNone(document.root.qname)
+        self.assertEqual("a:root", document.root.name)
+
+    def test_element_names(self):
+        document = parse("<root xmlns='urn:default' xmlns:a='urn:a'><a:child/><child/></root>")
+        root = document.root
+        self.assertEqual(("urn:default", "root"), (root.namespace_uri, root.local_name))
+        self.assertEqual(("urn:a", "child"), (root.children[0].namespace_uri, root.children[0].local_name))
+        self.assertIs(Namespaces.NAME_TABLE.qname("urn:default", "child"), root.children[1].qname)
+
+    def test_names_are_identical_across_documents(self):
+        first = parse("<a:root xmlns:a='urn:a'/>")
+        second = parse("<b:root xmlns:b='urn:a'/>")
+        self.assertIs(first.root.qname, second.root.qname)
+
+    def test_scope_is_inherited(self):
+        document = parse("<root xmlns:a='urn:a'><child><a:grandchild/></child></root>")
+        child = document.root.children[0]
+        self.assertIs(document.root.namespaces, child.namespaces)
+        self.assertEqual("urn:a", child.children[0].namespace_uri)
+
+    def test_redeclaration(self):
+        document = parse("<a:root xmlns:a='urn:a'><a:child xmlns:a='urn:b'/><a:child/></a:root>")
+        self.assertEqual(["urn:b", "urn:a"], [child.namespace_uri for child in document.root.children])
+
+    def test_undeclaring_default(self):
+        document = parse("<root xmlns='urn:default'><child xmlns=''/></root>")
+        self.assertIsNone(document.root.children[0].namespace_uri)
+
+    def test_attributes(self):
+        document = parse("<root xmlns='urn:default' xmlns:a='urn:a' plain='1' a:prefixed='2' xml:lang='en'/>")
+        table = Namespaces.NAME_TABLE
+        self.assertEqual({table.qname(None, "plain"): "1",
+                          table.qname("urn:a", "prefixed"): "2",
+                          table.qname(Namespaces.XML_NAMESPACE, "lang"): "en"},
+                         document.root.qualified_attributes)
+        self.assertIn("xmlns:a", document.root.attributes)
+
+    def test_lazy_elements(self):
+        document = parse("<root xmlns:a='urn:a'><child><a:grandchild/></child></root>",
+                         ParserOptions(lazy=True, namespaces=True))
+        self.assertEqual("urn:a", document.root.children[0].children[0].namespace_uri)
+
+    def test_errors(self):
+        cases = {
+            "Undeclared element prefix": "<a:root/>",
+            "Undeclared attribute prefix": "<root a:attr='1'/>",
+            "Out of scope prefix": "<root><child xmlns:a='urn:a'/><a:child/></root>",
+            "Undeclared prefix": "<root xmlns:a=''/>",
+            "Repeated expanded attribute": "<root xmlns:a='urn:x' xmlns:b='urn:x' a:attr='1' b:attr='2'/>",
+            "Declared xmlns": "<root xmlns:xmlns='urn:a'/>",
+            "Rebound xml": "<root xmlns:xml='urn:a'/>",
+            "Bound xml namespace": f"<root xmlns:a='{Namespaces.XML_NAMESPACE}'/>",
+            "Invalid qualified name": "<a:b:root xmlns:a='urn:a'/>",
+        }
+        for name, xml in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(XMLError):
+                    parse(xml)
+
+    def test_error_location(self):
+        with self.assertRaises(XMLError) as context:
+            parse("<root>\n  <a:child/>\n</root>")
+        self.assertEqual((2, 3), (context.exception.line, context.exception.column))
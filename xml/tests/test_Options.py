@@ -0,0 +1,129 @@
+import unittest
+
+from Options import ParserOptions
+from classes.Comment import Comment
+from classes.Document import Document
+from classes.Element import Element
+from classes.Entity import Entity
+from classes.Error import XMLError
+from classes.ProcessingInstruction import ProcessingInstruction
+from classes.Text import Text
+
+FULL = ParserOptions(ParserOptions.Validation.FULL)
+STRUCTURAL = ParserOptions(ParserOptions.Validation.STRUCTURAL)
+TRUSTED = ParserOptions(ParserOptions.Validation.TRUSTED)
+
+
+class ParserOptionsTests(unittest.TestCase):
+    def test_unknown_level(self):
+        with self.assertRaises(ValueError):
+            ParserOptions("lenient")
+
+    def test_default_is_full_validation(self):
+        element = Element("<-name/>")
+        with self.assertRaises(XMLError):
+            element.parse_to_end({})
+
+    """
+        ======================
+        CHARACTER VALIDATION
+        ======================
+        Skipped by both the structural & trusted levels
+    """
+
+    def test_names(self):
+        for options in [STRUCTURAL, TRUSTED]:
+            with self.subTest(options.validation):
+                element = Element("<-name -attr='value'/>", options)
+                element.parse_to_end({})
+                self.assertEqual("-name", element.name)
+                self.assertEqual({"-attr": "value"}, element.attributes)
+
+                processing_instruction = ProcessingInstruction("<?-target data?>", options)
+                processing_instruction.parse_to_end({})
+                self.assertEqual("-target", processing_instruction.target)
+
+                entity = Entity("<!ENTITY -entity 'value'>", options)
+                entity.parse_to_end({})
+                self.assertEqual("-entity", entity.name)
+
+        with self.subTest(FULL.validation):
+            with self.assertRaises(XMLError):
+                Element("<-name/>", FULL).parse_to_end({})
+
+    def test_characters(self):
+        for options in [STRUCTURAL, TRUSTED]:
+            with self.subTest(options.validation):
+                text = Text(options)
+                text.add_text("text \u0001<end/>")
+                text.check_wellformedness()
+
+                Comment("<!-- \u0001 -->", options).parse_to_end({})
+                Element("<name attr='\u0001'/>", options).parse_to_end({})
+
+        with self.subTest(FULL.validation):
+            text = Text(FULL)
+            text.add_text("text \u0001<end/>")
+            with self.assertRaises(XMLError):
+                text.check_wellformedness()
+
+    """
+        =====================
+        STRUCTURAL VALIDATION
+        =====================
+        Skipped only by the trusted level
+    """
+
+    def test_structure_checked_unless_trusted(self):
+        cases = [
+            ("Mismatched tags", lambda options: Element("<a></b>", options).parse_to_end({})),
+            ("']]>' in text", lambda options: Text(options).add_text("text ]]> text<end/>")),
+            ("'--' in comment", lambda options: Comment("<!-- a -- b -->", options).parse_to_end({})),
+            ("'<' in attribute", lambda options: Element("<a attr='<'/>", options).parse_to_end({})),
+        ]
+        for name, parse in cases:
+            for options in [FULL, STRUCTURAL]:
+                with self.subTest(f"{name} ({options.validation})"):
+                    with self.assertRaises(XMLError):
+                        parse(options)
+            with self.subTest(f"{name} ({TRUSTED.validation})"):
+                parse(TRUSTED)
+
+    def test_options_reach_nested_content(self):
+        document = Document("<!DOCTYPE -root [<!ENTITY -e 'x'>]><-root><-child>\u0001<?-pi?></-child></-root>",
+                            STRUCTURAL)
+        document.parse()
+        self.assertEqual("-child", document.root.children[0].name)
+        self.assertEqual("\u0001", document.root.children[0].text[0].text)
+
+    """
+        ===========
+        WHITESPACE
+        ===========
+    """
+
+    def test_unknown_whitespace_handling(self):
+        with self.assertRaises(ValueError):
+            ParserOptions(whitespace="strip")
+
+    def test_whitespace_kept_by_default(self):
+        document = Document("<root>\n  <child/>\n</root>")
+        document.parse()
+        self.assertEqual(["\n  ", "\n"], [text.text for text in document.root.text])
+
+    def test_drop_whitespace(self):
+        options = ParserOptions(whitespace=ParserOptions.Whitespace.DROP)
+        document = Document("<root>\n  <child> text </child>\n  <!-- comment -->\n  <child/>\n</root>", options)
+        document.parse()
+        self.assertEqual(2, len(document.root.content))
+        self.assertEqual(" text ", document.root.children[0].text[0].text)
+
+    def test_drop_ignorable_whitespace(self):
+        dtd = "<!DOCTYPE root [<!ELEMENT root (child*)> <!ELEMENT child (#PCDATA|child)*>]>"
+        for lazy in [False, True]:
+            with self.subTest(lazy=lazy):
+                options = ParserOptions(whitespace=ParserOptions.Whitespace.IGNORABLE, lazy=lazy)
+                document = Document(f"{dtd}<root>\n  <child> <child/> </child>\n</root>", options)
+                document.parse()
+                self.assertEqual(1, len(document.root.content))
+                self.assertEqual([" ", " "], [text.text for text in document.root.children[0].text])
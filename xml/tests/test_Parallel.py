@@ -0,0 +1,104 @@
+import unittest
+
+import Parallel
+from Options import ParserOptions
+from classes.Document import Document
+from classes.Element import Element
+from classes.Error import XMLError
+
+DOCUMENT = """<?xml version="1.0"?>
+<!DOCTYPE rows [
+    <!ENTITY company "Example &amp; Co">
+    <!ATTLIST row id ID #IMPLIED>
+]>
+<rows xmlns:x="urn:x">
+    <row id="r1"><name>&company;</name><?pi one?></row>
+    <!-- <row id="commented"/> -->
+    <row id="r2"><x:name>two</x:name><![CDATA[</row>]]></row>
+    <row id="r3" note="a > b">three</row>
+    text
+    <row id="r4"/>
+</rows>
+<!-- end -->
+"""
+
+
+def serial_parse(xml: str) -> Document:
+    document = Document(xml)
+    document.parse()
+    return document
+
+
+def describe(element: Element) -> list:
+    """
+        Every node within the given element in document order, with its order & what it contains
+    """
+    nodes = []
+    stack = [element]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Element):
+            nodes.append((node.order, node.end_order, node.name, sorted(node.attributes.items())))
+            stack.extend(reversed(node.content))
+        else:
+            nodes.append((node.order, type(node).__name__, getattr(node, "text", None) or node.data))
+    return nodes
+
+
+class ParallelTests(unittest.TestCase):
+    def test_same_as_serial(self):
+        expected = serial_parse(DOCUMENT)
+        for chunk_size, shared_memory in [(1, True), (1, False), (40, True), (1 << 20, True)]:
+            with self.subTest(chunk_size=chunk_size, shared_memory=shared_memory):
+                document = Parallel.parse(DOCUMENT, processes=2, chunk_size=chunk_size, shared_memory=shared_memory)
+                self.assertEqual(describe(expected.root), describe(document.root))
+                self.assertEqual(expected.node_count, document.node_count)
+                self.assertEqual(["r1", "r2", "r3", "r4"], sorted(document.ids))
+                self.assertIs(document.root.children[1], document.ids["r2"])
+                for child in document.root.content:
+                    self.assertIs(document.root, child.parent)
+
+    def test_names_interned(self):
+        options = ParserOptions(namespaces=True)
+        expected = Document(DOCUMENT, options)
+        expected.parse()
+        for shared_memory in [True, False]:
+            with self.subTest(shared_memory=shared_memory):
+                document = Parallel.parse(DOCUMENT, options, processes=2, chunk_size=1, shared_memory=shared_memory)
+                name = document.root.children[1].children[0]
+                self.assertIs(expected.root.children[1].children[0].qname, name.qname)
+                self.assertEqual("urn:x", name.namespace_uri)
+                self.assertIs(document, name.document)
+
+    def test_iter_children(self):
+        with self.subTest("Several chunks"):
+            rows = list(Parallel.iter_children(DOCUMENT, processes=2, chunk_size=1))
+            self.assertEqual(["r1", "r2", "r3", "r4"], [row.attributes["id"] for row in rows])
+        with self.subTest("Single chunk"):
+            rows = list(Parallel.iter_children("<rows><row/><row/></rows>", processes=2))
+            self.assertEqual(2, len(rows))
+
+    def test_errors_located(self):
+        # Errors are reported where a serial parse reports them
+        cases = {
+            "Within a chunk": "<rows>\n<row/>\n<row a='1' a='2'/>\n<row/>\n</rows>",
+            "Mismatched end-tag": "<rows>\n<row/>\n</row>\n<row/>\n</rows>",
+            "Undefined entity": "<rows>\n<row/>\n<row>&undefined;</row>\n<row/>\n</rows>",
+            "After the root element": "<rows>\n<row/>\n<row/>\n</rows>\n<extra/>",
+            "Unclosed element": "<rows>\n<row/>\n<row><unclosed>text</row>\n<row/>\n</rows>",
+            "Unterminated comment": "<rows>\n<row/>\n<!-- text\n<row/>\n</rows>",
+        }
+        for name, xml in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(XMLError) as expected:
+                    serial_parse(xml)
+                with self.assertRaises(XMLError) as context:
+                    Parallel.parse(xml, processes=2, chunk_size=1)
+                self.assertEqual(expected.exception.offset, context.exception.offset)
+                self.assertEqual(expected.exception.message, context.exception.message)
+
+    def test_unsupported_options(self):
+        for options in [ParserOptions(validate=True), ParserOptions(lazy=True)]:
+            with self.subTest(options=options):
+                with self.assertRaises(ValueError):
+                    Parallel.parse(DOCUMENT, options)
@@ -0,0 +1,100 @@
+import threading
+import unittest
+
+import Profiling
+from Options import ParserOptions
+from RegularExpressions import RegEx
+from classes.Document import Document
+from classes.Element import Element
+from xml import xml
+
+
+class RecordingSink:
+    def __init__(self):
+        self.records = []
+
+    def record(self, construct, phase, elapsed, own_elapsed):
+        self.records.append((construct, phase, elapsed, own_elapsed))
+
+
+class ProfilingTests(unittest.TestCase):
+    def test_disabled_by_default(self):
+        document = xml.parse("<root/>")
+        self.assertIsNone(document.stats)
+
+    def test_records_constructs_and_phases(self):
+        document = xml.parse("<?xml version='1.0'?><!DOCTYPE root [<!ENTITY e 'text'>]><root a='&e;'>&e;</root>",
+                             profile=True)
+        constructs = document.stats.constructs
+
+        self.assertEqual(1, constructs["Document.parse_xml_declaration"].calls)
+        self.assertEqual(1, constructs["Document.parse_doctype_declaration"].calls)
+        self.assertIn("Element.parse_attributes", constructs)
+        self.assertIn("Text.add_text", constructs)
+        self.assertIn("Helpers.parse_string_literal", constructs)
+        self.assertIn("RegEx.Name.fullmatch", constructs)
+
+        for phase in ["xml declaration", "dtd", "entity expansion", "tags", "text"]:
+            with self.subTest(phase):
+                self.assertIn(phase, document.stats.phases)
+
+        # Regular expressions are attributed to the phase of their caller
+        self.assertNotEqual("validation", constructs["RegEx.Name.fullmatch"].phase)
+
+    def test_declarations_and_validation(self):
+        xml_string = "<!DOCTYPE root [<!ELEMENT root (a*)><!ELEMENT a EMPTY><!ATTLIST a b CDATA #IMPLIED>]>" \
+                     "<root><a/></root>"
+        constructs = xml.parse(xml_string, ParserOptions(validate=True), profile=True).stats.constructs
+        self.assertEqual("dtd", constructs["ElementDeclaration.parse_to_end"].phase)
+        self.assertEqual("dtd", constructs["AttributeListDeclaration.parse_to_end"].phase)
+        self.assertEqual("validation", constructs["Element.validate_child"].phase)
+
+        constructs = xml.parse("<root><a/></root>", ParserOptions(lazy=True), profile=True).stats.constructs
+        self.assertEqual(1, constructs["LazyElement.parse_to_end"].calls)
+
+    def test_recursive_calls_counted_once(self):
+        document = xml.parse("<a><b><c/></b></a>", profile=True)
+        parse_to_end = document.stats.constructs["Element.parse_to_end"]
+        self.assertEqual(3, parse_to_end.calls)
+        self.assertLessEqual(parse_to_end.total_time, document.stats.constructs["Document.parse"].total_time)
+
+    def test_pluggable_sink(self):
+        sink = RecordingSink()
+        document = xml.parse("<root>text</root>", sink=sink)
+        self.assertTrue(any(record[0] == "Text.add_text" for record in sink.records))
+        self.assertEqual(len(sink.records), sum(stats.calls for stats in document.stats.constructs.values()))
+
+    def test_restores_originals(self):
+        parse_to_end = Element.parse_to_end
+        name = RegEx.Name
+        with self.assertRaises(RuntimeError):
+            with Profiling.instrument(Profiling.ParseStats()):
+                Document("<root/>").parse()
+                raise RuntimeError()
+        self.assertIs(parse_to_end, Element.parse_to_end)
+        self.assertIs(name, RegEx.Name)
+
+    def test_overlapping_blocks(self):
+        parse_to_end = Element.parse_to_end
+        entered, exit_first = threading.Event(), threading.Event()
+        first = Profiling.ParseStats()
+
+        def profile_first():
+            with Profiling.instrument(first):
+                entered.set()
+                exit_first.wait()
+                Document("<a><b/></a>").parse()
+
+        thread = threading.Thread(target=profile_first)
+        thread.start()
+        entered.wait()
+        second = Profiling.ParseStats()
+        with Profiling.instrument(second):
+            Document("<a/>").parse()
+        exit_first.set()
+        thread.join()
+
+        # Each block only records its own thread's calls, & the originals are restored once both have exited
+        self.assertEqual(1, second.constructs["Element.parse_to_end"].calls)
+        self.assertEqual(2, first.constructs["Element.parse_to_end"].calls)
+        self.assertIs(parse_to_end, Element.parse_to_end)
@@ -0,0 +1,106 @@
+import gc
+import unittest
+import weakref
+
+import Records
+from Options import ParserOptions
+from classes.Error import XMLError
+
+ROWS = "<?xml version='1.0'?><!DOCTYPE rows [<!ENTITY e 'entity'>]>" \
+       "<rows id='r'>\n  <row n='1'>one</row>\n  <meta>m</meta>\n  <row n='2'>&e;<b/></row>\n</rows><!-- end -->"
+
+
+class RecordPathTests(unittest.TestCase):
+    def test_absolute(self):
+        path = Records.RecordPath("/rows/row")
+        self.assertTrue(path.matches(["rows", "row"]))
+        self.assertFalse(path.matches(["rows", "row", "row"]))
+        self.assertTrue(path.may_contain(["rows"]))
+        self.assertFalse(path.may_contain(["feed"]))
+
+    def test_anywhere(self):
+        path = Records.RecordPath("//group/*")
+        self.assertTrue(path.matches(["root", "a", "group", "row"]))
+        self.assertFalse(path.matches(["group"]))
+        self.assertTrue(path.may_contain(["root", "a"]))
+
+    def test_invalid(self):
+        for path in ["rows/row", "/rows//row", "/"]:
+            with self.subTest(path):
+                with self.assertRaises(ValueError):
+                    Records.iter_records("<rows/>", path)
+
+
+class IterRecordsTests(unittest.TestCase):
+    def test_yields_built_records(self):
+        records = list(Records.iter_records(ROWS, "/rows/row"))
+        self.assertEqual(["1", "2"], [record.attributes["n"] for record in records])
+        self.assertEqual("one", records[0].text[0].text)
+        self.assertEqual("entity", records[1].text[0].text)
+        self.assertEqual("b", records[1].children[0].name)
+
+    def test_records_in_entities(self):
+        xml = "<!DOCTYPE rows [<!ENTITY r2 '<row n=\"2\">two</row>'><!ENTITY rs 'text &r2;<row n=\"3\"/>'>]>" \
+              "<rows><row n='1'/>&r2;<group>&rs;</group></rows>"
+        records = list(Records.iter_records(xml, "//row"))
+        self.assertEqual(["1", "2", "2", "3"], [record.attributes["n"] for record in records])
+        self.assertEqual("two", records[1].text[0].text)
+
+        group = records[2].parent
+        self.assertEqual("group", group.name)
+        self.assertEqual([], group.children)
+        self.assertEqual(["text "], [text.text for text in group.text])
+
+        with self.assertRaises(XMLError):
+            list(Records.iter_records("<!DOCTYPE rows [<!ENTITY r 'text</rows>'>]><rows>&r;</rows>", "//row"))
+
+    def test_records_removed_from_parent(self):
+        records = list(Records.iter_records(ROWS, "/rows/row"))
+        parent = records[0].parent
+        self.assertEqual({"id": "r"}, parent.attributes)
+        self.assertEqual(["meta"], [child.name for child in parent.children])
+        self.assertIs(parent, records[0].document.root)
+
+    def test_records_released(self):
+        # Only the current record is alive while the next is being parsed
+        previous = None
+        for record in Records.iter_records(ROWS, "/rows/*"):
+            gc.collect()
+            self.assertIsNone(previous and previous())
+            previous = weakref.ref(record)
+
+    def test_predicate(self):
+        records = Records.iter_records(ROWS, "//row", predicate=lambda record: record.attributes["n"] == "2")
+        self.assertEqual(["2"], [record.attributes["n"] for record in records])
+
+    def test_wildcard_and_root(self):
+        self.assertEqual(["row", "meta", "row"], [record.name for record in Records.iter_records(ROWS, "/rows/*")])
+        self.assertEqual(["rows"], [record.name for record in Records.iter_records(ROWS, "/rows")])
+
+    def test_nested_records(self):
+        xml = "<feed><group><entry>a</entry></group><group><entry>b</entry><entry>c</entry></group></feed>"
+        records = Records.iter_records(xml, "/feed/group/entry")
+        self.assertEqual(["a", "b", "c"], [record.text[0].text for record in records])
+
+    def test_dropped_whitespace(self):
+        options = ParserOptions(whitespace=ParserOptions.Whitespace.DROP)
+        records = list(Records.iter_records(ROWS, "/rows/row", options=options))
+        self.assertEqual(1, len(records[0].parent.content))
+
+    def test_errors(self):
+        cases = {
+            "Within a record": "<rows><row></wor></rows>",
+            "Between records": "<rows><row/>a ]]> b<row/></rows>",
+            "After the root element": "<rows><row/></rows><extra/>",
+        }
+        for name, xml in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(XMLError) as context:
+                    list(Records.iter_records(xml, "/rows/row"))
+                self.assertIsNotNone(context.exception.offset)
+
+    def test_records_before_error_are_yielded(self):
+        records = Records.iter_records("<rows><row n='1'/><row n='2'></rows>", "/rows/row")
+        self.assertEqual("1", next(records).attributes["n"])
+        with self.assertRaises(XMLError):
+            next(records)
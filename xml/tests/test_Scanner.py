@@ -0,0 +1,45 @@
+import unittest
+
+import Scanner
+from classes.Error import XMLError
+
+
+class ScannerTests(unittest.TestCase):
+    def test_spans(self):
+        xml = "<root a='1'><one/><two>text<three></three></two></root> trailing"
+        spans = Scanner.scan_element(xml)
+
+        self.assertEqual(["root", "one", "two", "three"], spans.names)
+        self.assertEqual(xml.index(" trailing"), spans.ends[0])
+        self.assertEqual(xml.index("<two>"), spans.starts[2])
+        self.assertEqual(xml.index("</root>"), spans.ends[2])
+        self.assertEqual([1, 2], list(spans.children(0)))
+        self.assertEqual([3], list(spans.children(2)))
+
+    def test_self_closing_root(self):
+        spans = Scanner.scan_element("<root attr='value'/><next/>")
+        self.assertEqual(1, len(spans))
+        self.assertEqual(20, spans.ends[0])
+
+    def test_skips_markup_lookalikes(self):
+        xml = "<root a='</root>' b=\"/>\"><!-- <a> --><?pi <b>?><![CDATA[</root>]]></root>"
+        spans = Scanner.scan_element(xml)
+        self.assertEqual(["root"], spans.names)
+        self.assertEqual(len(xml), spans.ends[0])
+
+    def test_position(self):
+        spans = Scanner.scan_element("text <root><child/></root>", 5)
+        self.assertEqual(5, spans.starts[0])
+        self.assertEqual(11, spans.starts[1])
+
+    def test_wellformedness(self):
+        for name, xml in [("Mismatched tags", "<a><b></a></b>"),
+                          ("Unclosed element", "<a><b></b>"),
+                          ("Unclosed comment", "<a><!-- </a>"),
+                          ("Unclosed CDATA", "<a><![CDATA[ </a>"),
+                          ("Unclosed processing instruction", "<a><?pi </a>"),
+                          ("Unclosed start-tag", "<a><b attr='>'</a>"),
+                          ("Not an element", "text")]:
+            with self.subTest(name):
+                with self.assertRaises(XMLError):
+                    Scanner.scan_element(xml)
@@ -0,0 +1,61 @@
+import unittest
+
+from Options import ParserOptions
+from classes.Document import Document
+
+SHARED = ParserOptions(share_subtrees=True)
+
+
+class SubtreeTableTests(unittest.TestCase):
+    def parse(self, xml: str, options: ParserOptions = SHARED) -> Document:
+        document = Document(xml, options)
+        document.parse()
+        return document
+
+    def test_identical_subtrees_shared(self):
+        document = self.parse("<a><b x='1'><c>text</c><?pi data?></b><b x='1'><c>text</c><?pi data?></b></a>")
+        first, second = document.root.children
+        self.assertIs(first, second)
+        self.assertIsNone(first.parent)
+        self.assertIs(first, first.processing_instructions[0].parent)
+
+    def test_unshared_parent(self):
+        document = self.parse("<a><x><b/></x><y><b/><c/></y></a>")
+        x, y = document.root.children
+        self.assertIsNone(x.children[0].parent)
+        self.assertIs(y, y.children[1].parent)
+
+    def test_different_subtrees_not_shared(self):
+        cases = {
+            "Name": "<a><b/><c/></a>",
+            "Attribute value": "<a><b x='1'/><b x='2'/></a>",
+            "Attribute order": "<a><b x='1' y='2'/><b y='2' x='1'/></a>",
+            "Text": "<a><b>one</b><b>two</b></a>",
+            "Descendant": "<a><b><c>one</c></b><b><c>two</c></b></a>",
+            "Processing instruction": "<a><b><?pi one?></b><b><?pi two?></b></a>",
+            "Empty-element tag": "<a><b/><b></b></a>",
+        }
+        for name, xml in cases.items():
+            with self.subTest(name):
+                first, second = self.parse(xml).root.children
+                self.assertIsNot(first, second)
+
+    def test_shared_parts(self):
+        document = self.parse("<a><b x='1'>one<c/></b><b x='1'>one<d/></b></a>")
+        first, second = document.root.children
+        self.assertIsNot(first, second)
+        self.assertIs(first.attributes["x"], second.attributes["x"])
+        self.assertIs(first.text[0].text, second.text[0].text)
+
+    def test_not_numbered(self):
+        document = self.parse("<a><b/></a>")
+        self.assertIsNone(document.root.order)
+        self.assertIsNone(document.root.children[0].order)
+
+    def test_disabled(self):
+        with self.subTest("By default"):
+            first, second = self.parse("<a><b/><b/></a>", ParserOptions()).root.children
+            self.assertIsNot(first, second)
+        with self.subTest("When lazy"):
+            first, second = self.parse("<a><b/><b/></a>", ParserOptions(lazy=True, share_subtrees=True)).root.children
+            self.assertIsNot(first, second)
@@ -1,4 +1,5 @@
 from tests.mocks.MockEntity import MockEntity
+from classes.Document import Document
 from classes.Text import Text
 from classes.Error import XMLError
 import unittest
@@ -157,3 +158,43 @@ class TextTests(unittest.TestCase):
         with self.assertRaises(XMLError):
             text.add_text("Some text with a forbidden ]]> <end/>")
             text.check_wellformedness()
+
+    """
+        =============
+        SOURCE SPANS
+        =============
+    """
+
+    def test_source_spans(self):
+        cases = {
+            "Plain": ("<a>", "Some text<end/>", "Some text", True),
+            "With ']'": ("<a>", "Some ] text<end/>", "Some ] text", True),
+            "Character reference": ("<a>", "Some &#65; text<end/>", "Some A text", False),
+            "CDATA section": ("<a>", "Some <![CDATA[<b>]]> text<end/>", "Some <b> text", False),
+            "Line endings": ("<a>", "Some\r\ntext<end/>", "Some\ntext", False),
+        }
+        for name, (prefix, xml, expected, is_span) in cases.items():
+            with self.subTest(name):
+                buffer = prefix + xml
+                text = Text()
+                text.add_text(buffer[len(prefix):], buffer=buffer)
+                self.assertEqual(is_span, text.is_span)
+                text.check_wellformedness()
+                self.assertEqual(expected, text.text)
+                self.assertFalse(text.is_span)
+
+    def test_text_in_replacement_text(self):
+        # Elements within an entity's replacement text are parsed from the replacement text, not the document
+        document = Document("<!DOCTYPE r [<!ENTITY e '<x>two&#38;#13;</x>'>]><r>&e;</r>")
+        document.parse()
+        self.assertEqual("two\r", document.root.children[0].text[0].text)
+
+    def test_source_span_checks(self):
+        buffer = "<a> \n\t<b/>Some \u0001 text<c/>"
+        whitespace, forbidden = Text(), Text()
+        whitespace.add_text(buffer[3:], buffer=buffer)
+        forbidden.add_text(buffer[10:], buffer=buffer)
+        self.assertTrue(whitespace.is_whitespace())
+        self.assertFalse(forbidden.is_whitespace())
+        with self.assertRaises(XMLError):
+            forbidden.check_wellformedness()
@@ -0,0 +1,105 @@
+import io
+import unittest
+
+from Writer import XMLWriter
+from classes.Document import Document
+
+
+def write(calls, **arguments) -> str:
+    stream = io.BytesIO()
+    with XMLWriter(stream, **arguments) as writer:
+        calls(writer)
+    return stream.getvalue().decode(arguments.get("encoding", "utf-8"))
+
+
+class XMLWriterTests(unittest.TestCase):
+    def test_elements(self):
+        def calls(writer):
+            writer.start("root", {"a": "1"})
+            writer.start("empty")
+            writer.end("empty")
+            writer.start("child")
+            writer.text("text")
+            writer.end()
+            writer.end("root")
+        self.assertEqual("<root a=\"1\"><empty/><child>text</child></root>", write(calls))
+
+    def test_escaping(self):
+        def calls(writer):
+            writer.start("root", {"a": "<\"&'\t\n\r>"})
+            writer.text("<&]]>\r\n\"")
+            writer.end()
+        self.assertEqual("<root a=\"&lt;&quot;&amp;'&#9;&#10;&#13;&gt;\">&lt;&amp;]]&gt;&#13;\n\"</root>", write(calls))
+
+    def test_declaration_pis_and_comments(self):
+        def calls(writer):
+            writer.declaration(standalone=True)
+            writer.comment(" before ")
+            writer.start("root")
+            writer.pi("target", "data")
+            writer.end()
+            writer.pi("after")
+        self.assertEqual("<?xml version=\"1.0\" encoding=\"utf-8\" standalone=\"yes\"?>\n"
+                         "<!-- before --><root><?target data?></root><?after?>", write(calls))
+
+    def test_encoding(self):
+        def calls(writer):
+            writer.start("root")
+            writer.text("café ☃")
+            writer.end()
+        self.assertEqual("<root>café &#9731;</root>", write(calls, encoding="latin-1"))
+
+        # The byte order mark is only written once, however many times the output is flushed
+        output = write(lambda writer: (writer.start("root"), writer.text("x" * 32), writer.end()),
+                       encoding="utf-16", buffer_size=8)
+        self.assertEqual("<root>" + "x" * 32 + "</root>", output)
+
+    def test_buffering(self):
+        stream = io.BytesIO()
+        writer = XMLWriter(stream, buffer_size=16)
+        writer.start("root")
+        self.assertEqual(b"", stream.getvalue())
+        writer.text("x" * 32)
+        self.assertEqual(b"<root>" + b"x" * 32, stream.getvalue())
+        writer.end()
+        writer.close()
+        self.assertEqual(b"<root>" + b"x" * 32 + b"</root>", stream.getvalue())
+
+    def test_misuse(self):
+        cases = {
+            "Mismatched end": lambda writer: (writer.start("a"), writer.end("b")),
+            "End without start": lambda writer: writer.end(),
+            "Unclosed element": lambda writer: (writer.start("a"), writer.close()),
+            "Second root": lambda writer: (writer.start("a"), writer.end(), writer.start("b")),
+            "Text outside root": lambda writer: writer.text("text"),
+            "Invalid name": lambda writer: writer.start("1a"),
+            "Invalid comment": lambda writer: writer.comment("a -- b"),
+            "Invalid pi data": lambda writer: writer.pi("target", "?>"),
+            "Late declaration": lambda writer: (writer.start("a"), writer.declaration()),
+            "Invalid text character": lambda writer: (writer.start("a"), writer.text("a\u0000b")),
+            "Invalid attribute character": lambda writer: writer.start("a", {"b": "\u0001"}),
+        }
+        for name, calls in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(ValueError):
+                    calls(XMLWriter(io.BytesIO()))
+
+    def test_writes_parsed_trees(self):
+        xml = "<?pi data?><root a=\"&amp;\"><child>a &lt; b</child><?target?><mixed>x<b/>y</mixed></root><?end?>"
+        document = Document(xml)
+        document.parse()
+
+        def calls(writer):
+            writer.write(document)
+        self.assertEqual(xml, write(calls))
+
+    def test_mixes_trees_and_calls(self):
+        document = Document("<row><cell>1</cell></row>")
+        document.parse()
+
+        def calls(writer):
+            writer.start("rows")
+            writer.write(document.root)
+            writer.write(document.root.children[0].text[0])
+            writer.end("rows")
+        self.assertEqual("<rows><row><cell>1</cell></row>1</rows>", write(calls))
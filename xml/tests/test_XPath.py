@@ -0,0 +1,103 @@
+import unittest
+
+import XPath
+from Options import ParserOptions
+from classes.Document import Document
+from classes.Element import Element
+
+XML = """<!DOCTYPE rows [<!ATTLIST row key ID #IMPLIED>]>
+<rows>
+    <row key='r1' type='a'><name>one</name><price>10</price></row>
+    <row key='r2' type='b'><name>two</name><price>25</price><row key='r3' type='a'><name>three</name></row></row>
+    <?pi data?>
+    <row type='a'><name>four</name></row>
+</rows>"""
+
+
+class XPathTests(unittest.TestCase):
+    def setUp(self):
+        self.document = Document(XML)
+        self.document.parse()
+
+    def names(self, expression: str, context=None):
+        return [element.attributes.get("key", element.name)
+                for element in XPath.select(context or self.document, expression)]
+
+    def test_paths(self):
+        with self.subTest("Absolute"):
+            self.assertEqual(["r1", "r2", "row"], self.names("/rows/row"))
+        with self.subTest("Descendants"):
+            self.assertEqual(["r1", "r2", "r3", "row"], self.names("//row"))
+            self.assertEqual(["r3"], self.names(".//row", self.document.root.children[1]))
+        with self.subTest("Relative"):
+            self.assertEqual(["name", "price", "r3"], self.names("*", self.document.root.children[1]))
+        with self.subTest("Parent & self"):
+            self.assertEqual(["r1", "r2"], self.names("//price/.."))
+            self.assertEqual(["r2"], self.names("//row[row]/."))
+        with self.subTest("Document"):
+            self.assertEqual([self.document], XPath.select(self.document.root, "/"))
+
+    def test_node_tests(self):
+        self.assertEqual(["one", "two", "three", "four"], [text.text for text in XPath.select(self.document,
+                                                                                              "//name/text()")])
+        self.assertEqual(["pi"], [pi.target for pi in XPath.select(self.document, "/rows/processing-instruction()")])
+        self.assertEqual(["r1", "a", "r2", "b"], XPath.select(self.document, "/rows/row[position() < 3]/@*"))
+
+    def test_predicates(self):
+        with self.subTest("Attributes"):
+            self.assertEqual(["r1", "r3", "row"], self.names("//row[@type='a']"))
+            self.assertEqual(["row"], self.names("//row[not(@key)]"))
+        with self.subTest("Children"):
+            self.assertEqual(["r1", "r2"], self.names("//row[price > 9]"))
+            self.assertEqual(["r2", "row"], self.names("//row[name = 'two' or name = 'four']"))
+            self.assertEqual(["r2", "r3"], self.names("//row[starts-with(name, 't')]"))
+        with self.subTest("Positions"):
+            # Positions count among each element's children, unless the node-set is filtered as a whole
+            self.assertEqual(["r1", "r3"], self.names("//row[1]"))
+            self.assertEqual(["row"], self.names("/rows/row[last()]"))
+            self.assertEqual(["r2"], self.names("(//row)[2]"))
+            self.assertEqual(["row"], self.names("//row[@type='a'][2]"))
+
+    def test_functions(self):
+        self.assertEqual(4.0, XPath.evaluate(self.document, "count(//row)"))
+        self.assertEqual("two", XPath.evaluate(self.document, "string(//row[2]/name)"))
+        self.assertEqual("rows", XPath.evaluate(self.document, "name(/*)"))
+        self.assertEqual(["r1", "r3"], self.names("id('r3 r1')"))
+        self.assertEqual(["three"], [text.text for text in XPath.select(self.document, "id('r3')/name/text()")])
+
+    def test_union(self):
+        self.assertEqual(["name", "price", "name", "price", "name", "name"], self.names("//price | //name"))
+
+    def test_outside_document(self):
+        element = Element("<a><b>x</b><c><b>y</b></c></a>")
+        element.parse_to_end({})
+        self.assertEqual(["x", "y"], [b.text[0].text for b in XPath.select(element, "c/b | b")])
+        with self.assertRaises(ValueError):
+            XPath.select(element, "/a")
+
+    def test_lazy_document(self):
+        document = Document(XML, ParserOptions(lazy=True))
+        document.parse()
+        self.assertEqual(["r1", "r3", "row"], self.names("//row[@type='a']", document))
+
+        with self.subTest("Entity"):
+            document = Document("<!DOCTYPE r [<!ENTITY e \"<x><y/></x>\">]><r><a><c/></a>&e;<b/></r>",
+                                ParserOptions(lazy=True))
+            document.parse()
+            self.assertEqual(["c", "y"], self.names("/r/*/*", document))
+            self.assertEqual(["y"], self.names("/r//y", document))
+
+    def test_shared_subtrees(self):
+        document = Document("<x><a/><y><a/></y></x>", ParserOptions(share_subtrees=True))
+        document.parse()
+        for expression in ["name(//y/a/..)", "count(//x/a)"]:
+            with self.subTest(expression), self.assertRaises(ValueError):
+                XPath.evaluate(document, expression)
+
+    def test_compile(self):
+        self.assertIs(XPath.compile("//row"), XPath.compile("//row"))
+        for expression in ["//", "a[", "unknown()", "following::a", "a b", "contains('a')"]:
+            with self.subTest(expression), self.assertRaises(ValueError):
+                XPath.compile(expression)
+        with self.assertRaises(ValueError):
+            XPath.select(self.document, "count(//row)")
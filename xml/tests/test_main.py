@@ -14,3 +14,26 @@ class Test(unittest.TestCase):
         with self.subTest("#D#A"):
             document = xml.parse("<root>\u000d\u000a</root>")
             self.assertEqual("\u000a", document.root.text[0].text)
+        with self.subTest("CDATA"):
+            document = xml.parse("<root><![CDATA[a\u000d\u000ab]]></root>")
+            self.assertEqual("a\u000ab", document.root.text[0].text)
+        with self.subTest("Attribute value"):
+            document = xml.parse("<root attr='a\u000d\u000ab'/>")
+            self.assertEqual("a b", document.root.attributes["attr"])
+        with self.subTest("Processing instruction"):
+            document = xml.parse("<root><?target a\u000d\u000ab?></root>")
+            self.assertEqual("a\u000ab", document.root.processing_instructions[0].data)
+        with self.subTest("Entity value"):
+            document = xml.parse("<!DOCTYPE root [<!ENTITY e 'a\u000d\u000ab'>]><root>&e;</root>")
+            self.assertEqual("a\u000ab", document.root.text[0].text)
+
+    def test_keeps_referenced_carriage_returns(self):
+        with self.subTest("Character reference"):
+            document = xml.parse("<root>&#13;</root>")
+            self.assertEqual("\u000d", document.root.text[0].text)
+        with self.subTest("Entity replacement text"):
+            document = xml.parse("<!DOCTYPE root [<!ENTITY e '&#13;&#10;'>]><root>&e;</root>")
+            self.assertEqual("\u000d\u000a", document.root.text[0].text)
+        with self.subTest("Attribute value"):
+            document = xml.parse("<!DOCTYPE root [<!ENTITY e '&#13;&#10;'>]><root attr='a&e;b'/>")
+            self.assertEqual("a  b", document.root.attributes["attr"])
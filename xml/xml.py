@@ -1,23 +1,48 @@
+from typing import Optional
+
+from Options import ParserOptions
 from classes.Document import Document
 
 
-def parse(xml: str) -> Document:
-    # Normalise whitespace
-    xml = xml.replace("\u000d\u000a", "\u000a")
-    xml = xml.replace("\u000d", "\u000a")
+def parse(xml: str, options: Optional[ParserOptions] = None, profile: bool = False, sink=None) -> Document:
+    """
+        Parses the given xml string into a Document
+    :param xml:
+    :param options: The options to parse with (see `ParserOptions`). Defaults to full validation
+    :param profile: Whether to record per-phase timings into `Document.stats` (see `Profiling`)
+    :param sink: An optional sink to receive every timing record as it is made. Implies `profile`
+    :return:
+    """
+    if profile or sink is not None:
+        return __parse_instrumented(xml, options, sink)
 
-    # Parse document
-    document = Document(xml)
+    # Parse document (line endings are normalised as text is copied out, see `Helpers.normalise_newlines`)
+    document = Document(xml, options)
     document.parse()
     return document
 
 
-def parse_file(path: str) -> Document:
+def __parse_instrumented(xml: str, options: Optional[ParserOptions], sink) -> Document:
+    import Profiling
+
+    stats = Profiling.ParseStats(sink)
+    with Profiling.instrument(stats):
+        # Parse document
+        document = Document(xml, options)
+        document.stats = stats
+        document.parse()
+        return document
+
+
+def parse_file(path: str, options: Optional[ParserOptions] = None, profile: bool = False, sink=None) -> Document:
     """
         A convenience function to parse the xml from a file at the given path
     :param path:
+    :param options: See `parse`
+    :param profile: See `parse`
+    :param sink: See `parse`
     :return:
     """
     with open(path) as file:
         xml = file.read()
-        return parse(xml)
+        return parse(xml, options, profile, sink)